@@ -0,0 +1,96 @@
+"""
+Whether a student may apply for TA positions.
+
+The dashboards, course list, course overview, apply and accept views all need
+the same facts about a student: which term counts as theirs, how many active
+applications they have in it, whether they already TA a course and whether
+they accepted an offer. get_eligibility() answers all of them with one query
+and memoizes the answer on the user object, so the checks of one request
+(request.user) share it. Nothing is kept across requests: the cache is per
+process, so a write made by another worker or a management command could not
+invalidate it, and a shared cache lookup would cost as much as the query.
+"""
+from django.db.models import BigIntegerField, Count, Exists, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from courses.models import Course, Term
+from offers.models import Offer, OfferStatus
+from users.models import CustomUser as User
+from .models import Application, ApplicationStatus
+
+MAX_APPLICATIONS_PER_TERM = 5
+
+# Statuses that count toward the per-term limit (Rejected/Withdrawn do not count)
+COUNTED_STATUSES = [
+    ApplicationStatus.PENDING.value,
+    ApplicationStatus.ACCEPTED.value,
+    ApplicationStatus.CONFIRMED.value,
+]
+
+
+class Eligibility:
+    def __init__(self, term_id, active_applications, is_ta, has_accepted_offer, accepted_offer_in_term):
+        self.term_id = term_id
+        self.active_applications = active_applications
+        self.is_ta = is_ta
+        self.has_accepted_offer = has_accepted_offer
+        self.accepted_offer_in_term = accepted_offer_in_term
+
+    @property
+    def at_limit(self):
+        return self.active_applications >= MAX_APPLICATIONS_PER_TERM
+
+    @property
+    def can_apply(self):
+        return not (self.at_limit or self.has_accepted_offer)
+
+
+def get_eligibility(user, term_id=None, fresh=False):
+    """
+    Eligibility of `user` in term `term_id`, or in their own term when None:
+    the term of the course they TA, else Term.current(). Memoized on `user`;
+    `fresh` re-queries, for checks made right before a write.
+    """
+    answers = user.__dict__.setdefault('_eligibility', {})
+    if fresh or term_id not in answers:
+        answers[term_id] = _query_eligibility(user, term_id)
+    return answers[term_id]
+
+
+def _query_eligibility(user, term_id):
+    if term_id is None:
+        current = Term.current()
+        term = Coalesce(
+            Subquery(Course.objects.filter(current_tas=OuterRef('pk')).values('academic_term_id')[:1]),
+            Value(current.pk if current else None),
+            output_field=BigIntegerField(),
+        )
+    else:
+        term = Value(term_id, output_field=BigIntegerField())
+    active_applications = (
+        Application.objects.filter(
+            student=OuterRef('pk'),
+            course__academic_term_id=OuterRef('eligibility_term'),
+            status__in=COUNTED_STATUSES,
+        )
+        .order_by()
+        .values('student')
+        .annotate(n=Count('pk'))
+        .values('n')
+    )
+    accepted_offers = Offer.objects.filter(recipient=OuterRef('pk'), status=OfferStatus.ACCEPTED.value)
+    row = (
+        User.objects.filter(pk=user.pk)
+        .annotate(eligibility_term=term)
+        .annotate(
+            active_applications=Coalesce(Subquery(active_applications), Value(0), output_field=IntegerField()),
+            is_ta=Exists(Course.current_tas.through.objects.filter(customuser_id=OuterRef('pk'))),
+            has_accepted_offer=Exists(accepted_offers),
+            accepted_offer_in_term=Exists(accepted_offers.filter(course__academic_term_id=OuterRef('eligibility_term'))),
+        )
+        .values_list('eligibility_term', 'active_applications', 'is_ta', 'has_accepted_offer', 'accepted_offer_in_term')
+        .first()
+    )
+    if row is None:
+        return Eligibility(term_id, 0, False, False, False)
+    return Eligibility(*row)
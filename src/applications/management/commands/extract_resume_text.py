@@ -0,0 +1,45 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from applications.resume_text import EXTRACT_BATCH_SIZE, claim_pending, extract_claimed, queue_missing, retry_failed
+from applications.search import get_search_backend
+
+
+class Command(BaseCommand):
+    help = "Worker that extracts the text of submitted resumes so professors can filter applicants by keyword."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true", help="Process the queue once and exit.")
+        parser.add_argument("--interval", type=float, default=5.0, help="Seconds to sleep when the queue is empty.")
+        parser.add_argument("--batch-size", type=int, default=EXTRACT_BATCH_SIZE)
+        parser.add_argument(
+            "--queue-missing", action="store_true",
+            help="First queue applications whose resume was never indexed (e.g. submitted before indexing existed).",
+        )
+        parser.add_argument(
+            "--retry-failed", action="store_true",
+            help="First requeue failed resumes and ones left claimed by a stopped worker.",
+        )
+        parser.add_argument(
+            "--rebuild-index", action="store_true",
+            help="First rebuild the resume search index from the extracted text (e.g. after a restore).",
+        )
+
+    def handle(self, *args, **options):
+        if options["queue_missing"]:
+            self.stdout.write(f"Queued {queue_missing()} resumes that were never indexed.")
+        if options["rebuild_index"]:
+            backend = get_search_backend()
+            self.stdout.write(f"Indexed {backend.rebuild()} resumes with the {backend.name} search backend.")
+        if options["retry_failed"]:
+            self.stdout.write(f"Requeued {retry_failed()} resumes.")
+        while True:
+            rows = claim_pending(options["batch_size"])
+            if not rows:
+                if options["once"]:
+                    return
+                time.sleep(options["interval"])
+                continue
+            done, failed = extract_claimed(rows)
+            self.stdout.write(f"Indexed {done} resumes, {failed} could not be read.")
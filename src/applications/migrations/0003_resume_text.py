@@ -0,0 +1,25 @@
+# Generated by Django 4.2.6 on 2026-10-18 10:04
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('applications', '0002_add_withdrawn_status_and_reason'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResumeText',
+            fields=[
+                ('application', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='resume_text', serialize=False, to='applications.application')),
+                ('digest', models.CharField(blank=True, db_index=True, max_length=64)),
+                ('text', models.TextField(blank=True)),
+                ('status', models.IntegerField(choices=[(1, 'PENDING'), (2, 'EXTRACTING'), (3, 'DONE'), (4, 'FAILED')], default=1)),
+                ('error', models.TextField(blank=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
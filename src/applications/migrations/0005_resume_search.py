@@ -0,0 +1,71 @@
+# Generated by Django 4.2.6 on 2026-10-18 10:24
+
+import courses.models
+from django.db import migrations, models
+import django.db.models.deletion
+
+# Frozen copies of applications.search at the time of this migration, so later
+# changes to that module cannot change what this migration builds
+
+POSTGRES_INDEX_NAME = 'resume_search_idx'
+
+# ResumeTextStatus.DONE
+DONE = 3
+
+
+def fts_rowid(application_id):
+    return application_id.int & ((1 << 63) - 1)
+
+
+def create_search_index(apps, schema_editor):
+    ResumeText = apps.get_model('applications', 'ResumeText')
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        from django.contrib.postgres.indexes import GinIndex
+        from django.contrib.postgres.search import SearchVector
+        schema_editor.add_index(ResumeText, GinIndex(SearchVector('text', config='simple'), name=POSTGRES_INDEX_NAME))
+    elif vendor == 'sqlite':
+        schema_editor.execute(
+            "CREATE VIRTUAL TABLE applications_resume_fts USING fts5("
+            "application_id UNINDEXED, text, tokenize='unicode61')"
+        )
+        rows = [
+            (fts_rowid(r.application_id), r.application_id.hex, r.text)
+            for r in ResumeText.objects.filter(status=DONE).exclude(text='').iterator(chunk_size=1000)
+        ]
+        with schema_editor.connection.cursor() as cursor:
+            cursor.executemany(
+                'INSERT INTO applications_resume_fts (rowid, application_id, text) VALUES (%s, %s, %s)',
+                rows,
+            )
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute(f'DROP INDEX IF EXISTS {POSTGRES_INDEX_NAME}')
+    elif vendor == 'sqlite':
+        schema_editor.execute('DROP TABLE IF EXISTS applications_resume_fts')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('applications', '0004_application_snapshot_fields'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResumeSearchEntry',
+            fields=[
+                ('application', models.OneToOneField(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='resume_search_entry', serialize=False, to='applications.application')),
+                ('text', models.TextField()),
+                ('document', courses.models.FullTextField(db_column='applications_resume_fts')),
+            ],
+            options={
+                'db_table': 'applications_resume_fts',
+                'managed': False,
+            },
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -1,13 +1,14 @@
 from django.db import models
 from users.models import CustomUser as User
-from courses.models import Course
+from courses.models import Course, FullTextField
+from main.storage import blob_storage
 from enum import Enum
 from django.urls import reverse
 import uuid
 
 
 def application_resume_upload_path(instance, filename):
-    """Store resume under application_resumes/<application_id>/ so each application has its own snapshot."""
+    """Only the filename is kept: BlobStorage stores the snapshot by content (see main.storage)."""
     return f'application_resumes/{instance.id}/{filename}'
 
 
@@ -44,7 +45,8 @@ class Application(models.Model):
     other_notes = models.CharField(max_length=300, blank=True)
 
     # Snapshot of profile at time of application (for professor review)
-    resume = models.FileField(upload_to=application_resume_upload_path, blank=True, null=True)
+    resume = models.FileField(
+        upload_to=application_resume_upload_path, storage=blob_storage, max_length=255, blank=True, null=True)
     skills_snapshot = models.JSONField(default=list, blank=True)  # [{"name": "Python"}, ...]
     courses_snapshot = models.JSONField(default=list, blank=True)  # [{"course_name": "...", "grade": "..."}]
 
@@ -81,3 +83,54 @@ class Application(models.Model):
         self.status = ApplicationStatus.WITHDRAWN.value
         self.withdrawal_reason = reason
         self.save()
+
+
+class ResumeTextStatus(Enum):
+    '''
+    Enum for the text extraction state of an application's resume snapshot
+    PENDING - Waiting for the worker (manage.py extract_resume_text)
+    EXTRACTING - Claimed by a worker
+    DONE - text holds the searchable words of the resume
+    FAILED - The file could not be read (unsupported type, damaged or scanned); error says why
+    '''
+    PENDING = 1
+    EXTRACTING = 2
+    DONE = 3
+    FAILED = 4
+
+
+class ResumeText(models.Model):
+    """Searchable text of an application's resume snapshot (see applications.resume_text)."""
+    application = models.OneToOneField(
+        Application, on_delete=models.CASCADE, primary_key=True, related_name='resume_text')
+    # Blob the text was extracted from; applications sharing a blob share the extraction
+    digest = models.CharField(max_length=64, blank=True, db_index=True)
+    text = models.TextField(blank=True)
+    status = models.IntegerField(choices=[(
+        tag.value, tag.name) for tag in ResumeTextStatus], default=ResumeTextStatus.PENDING.value)
+    error = models.TextField(blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Resume text for {self.application_id} ({self.get_status()})"
+
+    def get_status(self):
+        return ResumeTextStatus(self.status).name
+
+
+class ResumeSearchEntry(models.Model):
+    '''
+    Row of the SQLite FTS5 resume search table, created by migration
+    0005_resume_search and kept up to date by applications.search. Only used
+    for joins; rows are written with raw SQL. `document` maps to the table's
+    hidden column of the same name, which is what MATCH is run against.
+    '''
+    application = models.OneToOneField(
+        Application, on_delete=models.DO_NOTHING, primary_key=True, db_constraint=False,
+        related_name='resume_search_entry')
+    text = models.TextField()
+    document = FullTextField(db_column='applications_resume_fts')
+
+    class Meta:
+        managed = False
+        db_table = 'applications_resume_fts'
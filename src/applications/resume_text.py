@@ -0,0 +1,195 @@
+"""
+Keyword search over application resume snapshots.
+
+When an application is submitted with a resume, a ResumeText row is queued
+for it (applications.signals). The worker (manage.py extract_resume_text)
+extracts the text of PDF and DOCX files once per stored blob: applications
+sharing a resume (see main.storage) share the extraction, and an application
+whose blob was already extracted is indexed on the spot without waiting for
+the worker.
+
+The text is stored as its lowercased words between single spaces.
+filter_by_resume_keywords() matches every search word as a word prefix
+("java" matches "Java" and "JavaScript" but not "Lava") through the search
+index of applications.search.
+"""
+import logging
+import os
+import zipfile
+
+from defusedxml import DefusedXmlException, ElementTree
+from django.db.models import Q
+
+from main.search import search_words
+from main.storage import blob_digest
+from .models import Application, ResumeText, ResumeTextStatus
+from .search import get_search_backend
+
+logger = logging.getLogger(__name__)
+
+# Resume rows claimed per worker pass
+EXTRACT_BATCH_SIZE = 20
+
+# Word stores the text of a .docx body in <w:t> runs inside <w:p> paragraphs
+DOCX_NAMESPACE = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+
+
+class UnreadableResume(Exception):
+    pass
+
+
+def index_text(text):
+    words = search_words(text)
+    return f" {' '.join(words)} " if words else ''
+
+
+def filter_by_resume_keywords(queryset, q):
+    """Applications whose extracted resume text contains every word of `q` (as a word prefix)."""
+    return get_search_backend().search(queryset, q)
+
+
+def count_still_indexing(queryset):
+    """How many of `queryset`'s applications have a resume whose text keyword search cannot match yet."""
+    return queryset.filter(
+        Q(resume_text__status__in=[ResumeTextStatus.PENDING.value, ResumeTextStatus.EXTRACTING.value])
+        # Submitted before indexing existed, or not queued yet
+        | (Q(resume_text=None) & ~Q(resume='') & Q(resume__isnull=False))
+    ).count()
+
+
+def extract_pdf_text(f):
+    try:
+        from pypdf import PdfReader
+        from pypdf.errors import PyPdfError
+    except ImportError:
+        raise UnreadableResume("pypdf is not installed")
+    try:
+        return '\n'.join(page.extract_text() or '' for page in PdfReader(f).pages)
+    except (PyPdfError, ValueError, KeyError) as e:
+        raise UnreadableResume(f"Damaged PDF: {e}")
+
+
+def extract_docx_text(f):
+    try:
+        with zipfile.ZipFile(f) as docx:
+            root = ElementTree.fromstring(docx.read('word/document.xml'))
+    except (zipfile.BadZipFile, KeyError, ElementTree.ParseError, DefusedXmlException) as e:
+        raise UnreadableResume(f"Damaged DOCX: {e}")
+    return '\n'.join(
+        ''.join(run.text or '' for run in paragraph.iter(f'{DOCX_NAMESPACE}t'))
+        for paragraph in root.iter(f'{DOCX_NAMESPACE}p')
+    )
+
+
+EXTRACTORS = {
+    '.pdf': extract_pdf_text,
+    '.docx': extract_docx_text,
+}
+
+
+def extract_text(field_file):
+    extension = os.path.splitext(field_file.name)[1].lower()
+    extractor = EXTRACTORS.get(extension)
+    if extractor is None:
+        raise UnreadableResume(f"Text cannot be extracted from {extension or 'extensionless'} files")
+    with field_file.open('rb') as f:
+        return extractor(f)
+
+
+def queue_resume_text(application):
+    """Index `application`'s resume: at once if its blob was already extracted, else via the worker."""
+    if not application.resume:
+        ResumeText.objects.filter(application=application).delete()
+        return
+    digest = blob_digest(application.resume.name) or ''
+    done = None
+    if digest:
+        done = (
+            ResumeText.objects.filter(digest=digest, status=ResumeTextStatus.DONE.value)
+            .values_list('text', flat=True)
+            .first()
+        )
+    ResumeText.objects.update_or_create(application=application, defaults={
+        'digest': digest,
+        'text': done or '',
+        'status': ResumeTextStatus.DONE.value if done is not None else ResumeTextStatus.PENDING.value,
+        'error': '',
+    })
+
+
+def claim_pending(limit=EXTRACT_BATCH_SIZE):
+    """
+    Claim up to `limit` pending rows for this worker. Like the course upload
+    jobs, each claim is a conditional UPDATE on the status, so two workers
+    never extract the same row.
+    """
+    claimed = []
+    pending = (
+        ResumeText.objects.filter(status=ResumeTextStatus.PENDING.value)
+        .select_related('application')
+        .order_by('updated_at')[:limit]
+    )
+    for row in pending:
+        if ResumeText.objects.filter(pk=row.pk, status=ResumeTextStatus.PENDING.value).update(
+                status=ResumeTextStatus.EXTRACTING.value):
+            claimed.append(row)
+    return claimed
+
+
+def extract_claimed(rows):
+    """Extract each distinct resume among claimed `rows` once; returns (done, failed) row counts."""
+    done = failed = 0
+    extracted = {}
+    indexed = []
+    for row in rows:
+        key = row.digest or row.application.resume.name
+        if key not in extracted and row.digest:
+            # Extracted by an earlier batch (queued before that extraction finished)
+            text = (
+                ResumeText.objects.filter(digest=row.digest, status=ResumeTextStatus.DONE.value)
+                .values_list('text', flat=True)
+                .first()
+            )
+            if text is not None:
+                extracted[key] = (text, '')
+        if key not in extracted:
+            try:
+                extracted[key] = (index_text(extract_text(row.application.resume)), '')
+            except UnreadableResume as e:
+                extracted[key] = (None, str(e))
+            except (OSError, ValueError) as e:
+                logger.warning(f"Resume for application {row.pk} could not be opened: {e}")
+                extracted[key] = (None, f"File could not be opened: {e}")
+        text, error = extracted[key]
+        # Conditional, in case the application got a different resume meanwhile
+        updated = ResumeText.objects.filter(
+            pk=row.pk, digest=row.digest, status=ResumeTextStatus.EXTRACTING.value,
+        ).update(
+            text=text or '',
+            error=error,
+            status=ResumeTextStatus.FAILED.value if text is None else ResumeTextStatus.DONE.value,
+        )
+        if updated and text is None:
+            failed += 1
+        elif updated:
+            done += 1
+            indexed.append((row.pk, text))
+    # update() sends no post_save, so index the extracted text here
+    get_search_backend().index(indexed)
+    return done, failed
+
+
+def queue_missing():
+    """Queue every application with a resume but no ResumeText row (e.g. submitted before indexing existed)."""
+    count = 0
+    for application in Application.objects.exclude(resume='').exclude(resume=None).filter(resume_text=None).iterator():
+        queue_resume_text(application)
+        count += 1
+    return count
+
+
+def retry_failed():
+    """Send failed rows, and rows claimed by a worker that died, back to the queue."""
+    return ResumeText.objects.filter(
+        status__in=[ResumeTextStatus.FAILED.value, ResumeTextStatus.EXTRACTING.value],
+    ).update(status=ResumeTextStatus.PENDING.value, error='')
@@ -0,0 +1,68 @@
+"""
+Resume keyword search.
+
+filter_by_resume_keywords() used to run a LIKE '% word%' per search word over
+the extracted resume text, which no index can serve. The shared backends
+(main.search) filter an Application queryset down to the applications whose
+extracted resume text contains every search word as a word prefix:
+
+- SQLite: the FTS5 table applications_resume_fts (see ResumeSearchEntry).
+  Rows follow ResumeText saves and deletes (applications.signals) and the
+  worker's conditional updates (applications.resume_text).
+- PostgreSQL: search_vector() over ResumeText.text, served by the GIN
+  expression index created in migration 0005_resume_search.
+- Other databases: the old unindexed scan.
+
+settings.RESUME_SEARCH_BACKEND can name a backend instead.
+"""
+from main.search import SearchIndex, get_backend
+from .models import Application, ResumeText, ResumeTextStatus
+
+
+def search_vector():
+    """The tsvector PostgreSQL searches match; the GIN index is built on this exact expression."""
+    from django.contrib.postgres.search import SearchVector
+    return SearchVector('text', config='simple')
+
+
+class ResumeIndex(SearchIndex):
+    '''
+    Indexes (application_id, text) pairs; an empty text only removes the
+    application's entry.
+    '''
+    model = Application
+    backend_setting = 'RESUME_SEARCH_BACKEND'
+    table = 'applications_resume_fts'
+    key_column = 'application_id'
+    columns = ('text',)
+
+    def filter_icontains(self, queryset, words):
+        queryset = queryset.filter(resume_text__status=ResumeTextStatus.DONE.value)
+        # The text is stored as lowercased words between single spaces (see
+        # resume_text.index_text), so " java" is a word prefix
+        for word in words:
+            queryset = queryset.filter(resume_text__text__contains=f' {word}')
+        return queryset
+
+    def filter_fts(self, queryset, query):
+        return queryset.filter(resume_search_entry__document__match=query)
+
+    def filter_tsquery(self, queryset, query):
+        matching = ResumeText.objects.filter(status=ResumeTextStatus.DONE.value).alias(
+            document=search_vector()).filter(document=query)
+        return queryset.filter(pk__in=matching.values('application_id'))
+
+    def entry(self, row):
+        application_id, text = row
+        return application_id, ((text,) if text else None)
+
+    def all_objects(self):
+        return (
+            ResumeText.objects.filter(status=ResumeTextStatus.DONE.value)
+            .exclude(text='')
+            .values_list('application_id', 'text')
+        )
+
+
+def get_search_backend():
+    return get_backend(ResumeIndex())
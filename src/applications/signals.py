@@ -0,0 +1,23 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Application, ResumeText, ResumeTextStatus
+from .resume_text import queue_resume_text
+from .search import get_search_backend
+
+
+@receiver(post_save, sender=Application)
+def index_submitted_resume(sender, instance, created, **kwargs):
+    if created and instance.resume:
+        queue_resume_text(instance)
+
+
+@receiver(post_save, sender=ResumeText)
+def index_resume_text(sender, instance, **kwargs):
+    done = instance.status == ResumeTextStatus.DONE.value
+    get_search_backend().index([(instance.pk, instance.text if done else '')])
+
+
+@receiver(post_delete, sender=ResumeText)
+def unindex_resume_text(sender, instance, **kwargs):
+    get_search_backend().unindex([instance.pk])
@@ -1,3 +1,106 @@
-from django.test import TestCase
+from django.test import TestCase, override_settings
 
-# Create your tests here.
+from main.testing import create_course
+from users.models import CustomUser
+from offers.models import Offer, OfferStatus
+from .eligibility import MAX_APPLICATIONS_PER_TERM, get_eligibility
+from .models import Application, ApplicationStatus, ResumeText, ResumeTextStatus
+from .resume_text import count_still_indexing, extract_claimed, filter_by_resume_keywords, index_text
+
+
+class EligibilityTests(TestCase):
+    def setUp(self):
+        self.student = CustomUser.objects.create_user(email='student@bc.edu', password='x')
+        self.courses = [create_course(str(i)) for i in range(MAX_APPLICATIONS_PER_TERM + 1)]
+
+    def apply(self, course, status=ApplicationStatus.PENDING):
+        return Application.objects.create(student=self.student, course=course, status=status.value)
+
+    def test_counts_active_applications_in_the_term(self):
+        self.apply(self.courses[0])
+        self.apply(self.courses[1], status=ApplicationStatus.WITHDRAWN)
+        other_term = create_course(term='Spring 2020')
+        self.apply(other_term)
+        eligibility = get_eligibility(self.student)
+        self.assertEqual(eligibility.term_id, self.courses[0].academic_term_id)
+        self.assertEqual(eligibility.active_applications, 1)
+        self.assertEqual(get_eligibility(self.student, other_term.academic_term_id).active_applications, 1)
+        self.assertTrue(eligibility.can_apply)
+
+    def test_answer_is_memoized_per_user_object(self):
+        for course in self.courses[:MAX_APPLICATIONS_PER_TERM - 1]:
+            self.apply(course)
+        self.assertTrue(get_eligibility(self.student).can_apply)
+        with self.assertNumQueries(0):
+            get_eligibility(self.student)
+        application = self.apply(self.courses[MAX_APPLICATIONS_PER_TERM - 1])
+        self.assertFalse(get_eligibility(self.student).at_limit)
+        self.assertTrue(get_eligibility(self.student, fresh=True).at_limit)
+
+        # A new request loads a new user object, which sees every write
+        professor = CustomUser.objects.create_user(email='prof@bc.edu', password='x', professor=True)
+        Offer.objects.create(
+            application=application, course=application.course, recipient=self.student, sender=professor,
+            status=OfferStatus.ACCEPTED.value)
+        self.courses[0].current_tas.add(self.student)
+        eligibility = get_eligibility(CustomUser.objects.get(pk=self.student.pk))
+        self.assertTrue(eligibility.has_accepted_offer)
+        self.assertTrue(eligibility.is_ta)
+
+
+class ResumeSearchTests(TestCase):
+    def setUp(self):
+        self.course = create_course()
+        self.apps = [
+            Application.objects.create(
+                student=CustomUser.objects.create_user(email=f'student{i}@bc.edu', password='x'), course=self.course)
+            for i in range(4)
+        ]
+
+    def index(self, app, text, status=ResumeTextStatus.DONE):
+        ResumeText.objects.update_or_create(
+            application=app, defaults={'text': index_text(text), 'status': status.value})
+
+    def matches(self, q):
+        return set(filter_by_resume_keywords(Application.objects.all(), q))
+
+    def check_backend(self):
+        self.index(self.apps[0], 'Java, SQL and Django')
+        self.index(self.apps[1], 'JavaScript; lava lamps')
+        self.index(self.apps[2], 'Java developer', status=ResumeTextStatus.PENDING)
+        self.assertEqual(self.matches('java'), set(self.apps[:2]))
+        self.assertEqual(self.matches('JAVA sql'), {self.apps[0]})
+        self.assertEqual(self.matches('ava'), set())
+        self.assertEqual(self.matches(''), set(self.apps))
+
+        # The index follows status changes and deletes
+        self.index(self.apps[0], 'Java, SQL and Django', status=ResumeTextStatus.PENDING)
+        self.assertEqual(self.matches('sql'), set())
+        ResumeText.objects.filter(application=self.apps[1]).delete()
+        self.assertEqual(self.matches('java'), set())
+        self.index(self.apps[2], 'Java developer')
+        self.assertEqual(self.matches('java'), {self.apps[2]})
+
+    @override_settings(RESUME_SEARCH_BACKEND='sqlite_fts')
+    def test_sqlite_fts_backend(self):
+        self.check_backend()
+
+    @override_settings(RESUME_SEARCH_BACKEND='sqlite_fts')
+    def test_worker_updates_are_indexed(self):
+        ResumeText.objects.create(
+            application=self.apps[0], digest='a' * 64, text=index_text('Python'), status=ResumeTextStatus.DONE.value)
+        row = ResumeText.objects.create(
+            application=self.apps[1], digest='a' * 64, status=ResumeTextStatus.EXTRACTING.value)
+        self.assertEqual(extract_claimed([row]), (1, 0))
+        self.assertEqual(self.matches('python'), set(self.apps[:2]))
+
+    @override_settings(RESUME_SEARCH_BACKEND='icontains')
+    def test_icontains_backend(self):
+        self.check_backend()
+
+    def test_still_indexing_counts_resumes_never_queued(self):
+        self.index(self.apps[0], '', status=ResumeTextStatus.PENDING)
+        self.index(self.apps[1], 'Java')
+        # A resume stored without a ResumeText row, e.g. submitted before indexing existed
+        Application.objects.filter(pk=self.apps[2].pk).update(resume='application_resumes/cv.pdf')
+        self.assertEqual(count_still_indexing(Application.objects.all()), 2)
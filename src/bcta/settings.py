@@ -96,6 +96,9 @@ if DEBUG:
         "default": {
             "ENGINE": "django.db.backends.sqlite3",
             "NAME": os.path.join(BASE_DIR, "db.sqlite3"),
+            # File-backed test database: the shared in-memory one fails concurrent
+            # writers with "table is locked" instead of waiting (see offers.tests)
+            "TEST": {"NAME": os.path.join(BASE_DIR, "test_db.sqlite3")},
         }
     }
 else:
@@ -166,8 +169,28 @@ STATIC_URL = "/static/"
 MEDIA_URL = "/media/"
 MEDIA_ROOT = os.path.join(BASE_DIR, "media")
 
+# How resumes, CVs and profile photos are sent after the permission check
+# (main.sendfile): "" streams them from Django, "x-accel-redirect" hands them to
+# nginx through the internal SENDFILE_URL location (aliased to MEDIA_ROOT) and
+# "x-sendfile" to Apache mod_xsendfile / lighttpd.
+SENDFILE_BACKEND = os.getenv("SENDFILE_BACKEND", "")
+SENDFILE_URL = os.getenv("SENDFILE_URL", "/protected-media/")
+
 STATICFILES_DIRS = [os.path.join(BASE_DIR, "static")]
 
+# Generated exports (schedule XLSX) cached on disk; kept out of MEDIA_ROOT so they are never publicly served
+EXPORT_CACHE_DIR = os.getenv("EXPORT_CACHE_DIR", os.path.join(BASE_DIR, "export_cache"))
+
+# Uploaded schedule sheets waiting for the course upload worker; also outside
+# MEDIA_ROOT, and each file is deleted when its job finishes
+UPLOAD_JOB_DIR = os.getenv("UPLOAD_JOB_DIR", os.path.join(BASE_DIR, "upload_jobs"))
+
+# Course search backend (courses.search): "sqlite_fts", "postgres" or "icontains"; empty picks one for the database
+COURSE_SEARCH_BACKEND = os.getenv("COURSE_SEARCH_BACKEND", "")
+
+# Resume keyword search backend (applications.search), with the same choices
+RESUME_SEARCH_BACKEND = os.getenv("RESUME_SEARCH_BACKEND", "")
+
 if socket.gethostname() == "cscita":
     STATIC_ROOT = "usr/local/test/bc-tasystem/src/static/"
 else:
@@ -176,9 +199,13 @@ else:
 
 # EMAIL
 EMAIL_BACKEND = "django.core.mail.backends.smtp.EmailBackend"
-EMAIL_HOST = "smtp.gmail.com"
-EMAIL_PORT = 587
-EMAIL_USE_TLS = True
+# Notification emails are queued in the outbox and delivered by
+# `manage.py send_queued_emails`. For local testing point EMAIL_HOST/EMAIL_PORT
+# at a stand-in SMTP server (e.g. `python -m aiosmtpd -n -l localhost:1025`)
+# and set EMAIL_USE_TLS=0.
+EMAIL_HOST = os.getenv("EMAIL_HOST", "smtp.gmail.com")
+EMAIL_PORT = int(os.getenv("EMAIL_PORT", "587"))
+EMAIL_USE_TLS = os.getenv("EMAIL_USE_TLS", "1") == "1"
 EMAIL_USE_SSL = False
 EMAIL_HOST_USER = (
     "wuaye@bc.edu" 
@@ -213,4 +240,13 @@ if env_str not in (BcTaEnvironment.DEV, BcTaEnvironment.PROD):
         f"Invalid ENV value: {env_str}. Must be one of {[e.value for e in BcTaEnvironment]}"
     )
 ENV = BcTaEnvironment(env_str)
+
+# Template debug bookkeeping (origin and line tracking for the debug error
+# page) follows DEBUG, which is hardcoded on; production renders without it.
+# Templates are cached either way: with "loaders" unset, Django wraps the
+# default loaders in the cached loader whatever DEBUG is.
+# (manage.py benchmark_templates compares the two configurations.)
+if ENV == BcTaEnvironment.PROD:
+    TEMPLATES[0]["OPTIONS"]["debug"] = False
+
 SITE_HOSTNAME = os.getenv("SITE_HOSTNAME", "127.0.0.1:8000")
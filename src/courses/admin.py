@@ -1,5 +1,7 @@
 from django.contrib import admin
-from .models import Course
+from .models import Course, CourseUploadJob, Term
 
 # Register your models here.
-admin.site.register(Course)
\ No newline at end of file
+admin.site.register(Course)
+admin.site.register(CourseUploadJob)
+admin.site.register(Term)
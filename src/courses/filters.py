@@ -0,0 +1,103 @@
+import hashlib
+import uuid
+
+from django.db.models import Q
+
+from .models import Course, Term
+from .search import get_search_backend
+
+COURSE_LEVELS = ('1', '2', '3', '4', '5')
+STATUS_FILTERS = ('active', 'closed')
+
+# Course list/export order; served by the (subject_code, course_number) index
+COURSE_ORDERING = ('subject_code', 'course_number', 'course', 'section')
+
+
+class CourseFilterSpec:
+    """
+    The course list filters (q, term, professor, status, class_type,
+    course_level) parsed once from GET parameters.
+
+    Values are normalized and invalid ones dropped when the spec is built, and
+    the filters are compiled into a single Q object; `q` goes through the
+    search backend, which also ranks the results (see `ordering`). The course
+    list, its exports and stats all build from the same spec, and `cache_key`
+    is stable for equivalent parameters so results and aggregates can be
+    cached per filter set.
+    """
+
+    FIELDS = ('q', 'term', 'professor', 'status', 'class_type', 'course_level')
+
+    def __init__(self, q='', term='', professor='', status='', class_type='', course_level=''):
+        self.q = (q or '').strip()
+        self.term = (term or '').strip()
+        self.professor = professor if is_uuid(professor) else ''
+        self.status = status if status in STATUS_FILTERS else ''
+        self.class_type = (class_type or '').strip()
+        self.course_level = course_level if course_level in COURSE_LEVELS else ''
+        self.condition = self._compile()
+
+    @classmethod
+    def from_params(cls, params):
+        return cls(**{name: params.get(name, '') for name in cls.FIELDS})
+
+    def _compile(self):
+        condition = Q()
+        if self.term:
+            condition &= Q(academic_term__key=Term.key_for(self.term))
+        if self.professor:
+            condition &= Q(professor_id=self.professor)
+        if self.status == 'active':
+            condition &= Q(status=True)
+        elif self.status == 'closed':
+            condition &= Q(status=False)
+        if self.class_type:
+            condition &= Q(class_type=self.class_type)
+        if self.course_level:
+            condition &= Q(course_level=int(self.course_level))
+        return condition
+
+    def apply(self, queryset=None):
+        if queryset is None:
+            queryset = Course.objects.all()
+        queryset = queryset.filter(self.condition)
+        if self.q:
+            queryset = get_search_backend().search(queryset, self.q)
+        return queryset
+
+    @property
+    def ordering(self):
+        """Most relevant first when searching, otherwise by course code."""
+        if self.q:
+            return ('-search_rank',) + COURSE_ORDERING
+        return COURSE_ORDERING
+
+    def as_tuple(self):
+        # Case-insensitive fields are lowered so "Fall 2025" and "fall 2025" share a key
+        return (
+            ' '.join(self.q.lower().split()), Term.key_for(self.term), self.professor, self.status,
+            self.class_type, self.course_level,
+        )
+
+    @property
+    def cache_key(self):
+        digest = hashlib.sha1(repr(self.as_tuple()).encode()).hexdigest()
+        return f'courses:filter:{digest}'
+
+    def as_params(self):
+        """The non-empty filters as a dict, e.g. for building links."""
+        return {name: getattr(self, name) for name in self.FIELDS if getattr(self, name)}
+
+    def __eq__(self, other):
+        return isinstance(other, CourseFilterSpec) and self.as_tuple() == other.as_tuple()
+
+    def __hash__(self):
+        return hash(self.as_tuple())
+
+
+def is_uuid(value):
+    try:
+        uuid.UUID(str(value))
+    except ValueError:
+        return False
+    return True
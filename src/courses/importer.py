@@ -0,0 +1,468 @@
+from contextlib import nullcontext
+from itertools import islice
+from random import randint
+
+from django.contrib.auth.hashers import make_password
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from openpyxl import load_workbook
+
+from users.models import CustomUser as User
+from users.instructor_data import instructors
+from .models import Course, Term
+from .search import get_search_backend
+from .signals import courses_changed
+
+# Lectures that are staffed through their discussion/lab sections instead
+EXCLUDED_LECTURES = [
+    "Computer Science I",
+    "Computer Science II",
+    "Computer Organization and Lab",
+]
+
+DEFAULT_INSTRUCTOR_PASSWORD = "password"
+
+# Registrar sheet layout, in column order
+SHEET_HEADER = [
+    "Term", "Type", "Course", "Section", "Course Title", "Instructors",
+    "RoomName", "TimeSlot", "Max Enroll", "RoomSize",
+]
+SHEET_COLUMN_COUNT = len(SHEET_HEADER)
+
+# Other spellings of the header cells seen in registrar exports (compared without spaces/case)
+HEADER_ALIASES = {
+    "type": {"classtype"},
+    "instructors": {"instructor"},
+    "roomname": {"room"},
+    "maxenroll": {"maxenrollment"},
+}
+
+# Columns that must be filled in on every course row
+REQUIRED_COLUMNS = [0, 1, 2, 3, 4, 5, 8, 9]
+# Columns that must hold whole numbers
+NUMERIC_COLUMNS = [8, 9]
+
+# Row errors kept for display; the failed row count is always exact
+MAX_REPORTED_ERRORS = 500
+# Courses/professors listed in a dry-run preview
+PREVIEW_LIMIT = 50
+
+# Rows handed to the database per bulk round trip
+CHUNK_SIZE = 500
+
+# Import modes: APPEND always inserts; UPSERT matches rows on UPSERT_KEY and
+# only writes inserts and changed rows
+APPEND = "append"
+UPSERT = "upsert"
+IMPORT_MODES = [(APPEND, "Add all rows as new courses"), (UPSERT, "Update existing courses")]
+
+# Natural key of a course section within a term; the term is compared by
+# Term.key_for(), so "Fall 2025" and "fall 2025" are the same term
+UPSERT_KEY = ("term", "course", "section", "class_type")
+
+# Course fields that come from the sheet (compared in upsert mode)
+SHEET_FIELDS = [
+    "term", "class_type", "course", "section", "course_title",
+    "instructor_first_name", "instructor_last_name", "room_name", "timeslot",
+    "max_enroll", "room_size", "num_tas", "professor",
+]
+
+
+def iter_sheet_rows(excel_file):
+    """
+    Yield the active sheet's rows as value tuples without loading the workbook.
+
+    openpyxl's read-only mode parses the sheet XML lazily, so memory stays flat
+    however many rows the registrar export has.
+    """
+    workbook = load_workbook(excel_file, read_only=True, data_only=True)
+    try:
+        yield from workbook.active.iter_rows(values_only=True)
+    finally:
+        workbook.close()
+
+
+def sheet_row_count(excel_file):
+    """Row count from the sheet's stored dimensions (None if the file does not record them)."""
+    workbook = load_workbook(excel_file, read_only=True)
+    try:
+        return workbook.active.max_row
+    finally:
+        workbook.close()
+
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def split_instructor_name(raw_name):
+    """Split a registrar "Last, First" instructor cell into (first, last)."""
+    try:
+        first_name = raw_name.split(",")[1].strip()
+        last_name = raw_name.split(",")[0].strip()
+    except (AttributeError, IndexError):
+        first_name = raw_name
+        last_name = ""
+    return first_name, last_name
+
+
+def instructor_email(first_name, last_name):
+    key = f"{last_name}, {first_name}"
+    if key in instructors:
+        return instructors[key]["Short Email"]
+    return f"{first_name}.{last_name}@bc.edu"
+
+
+def compute_num_tas(class_type, max_enroll):
+    """One TA per discussion/lab section, one per 20 students for lectures (at least 1)."""
+    if class_type == "Discussion" or class_type == "Lab":
+        return 1
+    num_tas = int(max_enroll) // 20
+    return 1 if num_tas == 0 else num_tas
+
+
+def normalize_header(value):
+    return "".join(str(value or "").split()).lower()
+
+
+def check_header(row):
+    """Return an error message if a header row does not match SHEET_HEADER, else None."""
+    found = [normalize_header(v) for v in row[:SHEET_COLUMN_COUNT]]
+    expected = [normalize_header(v) for v in SHEET_HEADER]
+    # zip() stops at the shorter list, so a truncated header must be caught first
+    if len(found) == len(expected) and all(
+            f == e or f in HEADER_ALIASES.get(e, ()) for f, e in zip(found, expected)):
+        return None
+    return (
+        "Column layout does not match the expected order "
+        f"({', '.join(SHEET_HEADER)}); found ({', '.join(str(v) for v in row[:SHEET_COLUMN_COUNT])})"
+    )
+
+
+def validate_row(row):
+    """List the problems with a course row that would stop it from importing."""
+    problems = []
+    for index in REQUIRED_COLUMNS:
+        if row[index] is None or str(row[index]).strip() == "":
+            problems.append(f"{SHEET_HEADER[index]} is empty")
+    for index in NUMERIC_COLUMNS:
+        value = row[index]
+        if value is None or str(value).strip() == "":
+            continue
+        try:
+            number = float(value)
+        except (TypeError, ValueError):
+            problems.append(f"{SHEET_HEADER[index]} must be a number (got {value!r})")
+            continue
+        if number < 0 or number != int(number):
+            problems.append(f"{SHEET_HEADER[index]} must be a whole number (got {value!r})")
+    return problems
+
+
+def course_key(course):
+    return (Term.key_for(course.term),) + tuple(getattr(course, f) for f in UPSERT_KEY[1:])
+
+
+class CourseImporter:
+    """
+    Set-based import of a registrar schedule sheet.
+
+    Rows are consumed as a stream in chunks of `chunk_size`. Each chunk resolves
+    its instructors with a single query and inserts missing professors and
+    courses with bulk_create, all inside one transaction, so the number of
+    queries depends on the number of chunks rather than rows and only one
+    chunk is held in memory at a time.
+
+    In UPSERT mode each chunk is diffed against the courses already stored
+    under the same UPSERT_KEY: new keys are bulk-inserted, changed rows are
+    bulk-updated and unchanged rows cost no writes. With `delete_missing`,
+    courses in the uploaded terms that the sheet no longer lists are deleted.
+
+    Rows that fail validate_row are skipped, counted in `failed` and recorded
+    in `errors` as (row number, message). With `atomic=False` every chunk
+    commits on its own, which lets a background job publish progress while it
+    runs.
+
+    With `dry_run=True` the same scan runs without writing anything: missing
+    professors and courses are only planned, and `preview` lists a sample of
+    what would be created or changed.
+    """
+
+    def __init__(self, chunk_size=CHUNK_SIZE, mode=APPEND, delete_missing=False, atomic=True, dry_run=False):
+        if mode not in (APPEND, UPSERT):
+            raise ValueError(f"Unknown import mode: {mode}")
+        self.chunk_size = chunk_size
+        self.mode = mode
+        self.delete_missing = delete_missing and mode == UPSERT
+        self.atomic = atomic
+        self.dry_run = dry_run
+        self.errors = []
+        self.failed = 0
+        self.rows_read = 0
+        self.preview = {"new_professors": [], "created_courses": [], "updated_courses": []}
+        # email -> User, shared across chunks so each instructor is looked up once
+        self.professors = {}
+        # term name -> Term, resolved once per distinct name
+        self.terms = {}
+        # UPSERT_KEY -> Course for every course written or matched so far
+        self.seen = {}
+        self.seen_terms = set()
+        self.seen_term_keys = set()
+        self.appended_terms = set()
+        # bulk writes skip the post_save receiver, so chunks are indexed here
+        self.search = get_search_backend()
+
+    def parse_row(self, row):
+        """Turn a sheet row into Course field values, or None for header/blank/excluded rows."""
+        row = tuple(row) + (None,) * (SHEET_COLUMN_COUNT - len(row))
+        if not row[0] or row[0] == "Term":
+            return None
+        if row[4] in EXCLUDED_LECTURES and row[1] == "Lecture":
+            return None
+        problems = validate_row(row)
+        if problems:
+            raise ValueError("; ".join(problems))
+        first_name, last_name = split_instructor_name(row[5])
+        parsed = {
+            "term": row[0],
+            "class_type": row[1],
+            "course": row[2],
+            "section": row[3],
+            "course_title": row[4],
+            "instructor_first_name": first_name,
+            "instructor_last_name": last_name,
+            "instructor_email": instructor_email(first_name, last_name),
+            "room_name": row[6],
+            "timeslot": row[7],
+            "max_enroll": int(float(row[8])),
+            "room_size": int(float(row[9])),
+            "num_tas": compute_num_tas(row[1], int(float(row[8]))),
+        }
+        # Coerce to the stored types so upsert comparisons see 1 and "1" as equal
+        for name in SHEET_FIELDS:
+            if name in parsed and parsed[name] is not None:
+                parsed[name] = Course._meta.get_field(name).to_python(parsed[name])
+        return parsed
+
+    def run(self, rows, progress=None):
+        """
+        Import an iterable of sheet rows. Returns a summary dict of what changed
+        (or, for a dry run, what would change).
+
+        `progress`, if given, is called as progress(rows_read, rows_failed) after
+        each chunk is written.
+        """
+        summary = {
+            "created_courses": 0,
+            "updated_courses": 0,
+            "unchanged_courses": 0,
+            "deleted_courses": 0,
+            "created_professors": 0,
+        }
+        # One transaction for the whole sheet, or one per chunk when not atomic
+        outer = transaction.atomic if self.atomic and not self.dry_run else nullcontext
+        inner = nullcontext if self.atomic or self.dry_run else transaction.atomic
+        try:
+            with outer():
+                for chunk in chunked(self.iter_parsed(rows), self.chunk_size):
+                    with inner():
+                        self.import_chunk(chunk, summary)
+                    if progress:
+                        progress(self.rows_read, self.failed)
+                if self.delete_missing:
+                    with inner():
+                        summary["deleted_courses"] = self.delete_unlisted_courses()
+        finally:
+            # Bulk writes skip model signals; tell listeners (export cache) which terms changed
+            if not self.dry_run:
+                courses_changed.send(sender=Course, terms=self.seen_terms | self.appended_terms)
+        if progress:
+            progress(self.rows_read, self.failed)
+        summary["failed_rows"] = self.failed
+        return summary
+
+    def iter_parsed(self, rows):
+        for row_number, row in enumerate(rows, 1):
+            self.rows_read = row_number
+            if row and row[0] == "Term":
+                message = check_header(tuple(row))
+                if message and not self.dry_run:
+                    raise ValueError(message)
+                if message:
+                    self.record_error(row_number, message)
+                continue
+            try:
+                parsed = self.parse_row(row)
+            except (ValueError, TypeError, ValidationError) as e:
+                self.record_error(row_number, "; ".join(e.messages) if isinstance(e, ValidationError) else str(e))
+                continue
+            if parsed is not None:
+                yield parsed
+
+    def record_error(self, row_number, message):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append((row_number, message))
+
+    def add_preview(self, section, item):
+        if self.dry_run and len(self.preview[section]) < PREVIEW_LIMIT:
+            self.preview[section].append(item)
+
+    def import_chunk(self, chunk, summary):
+        summary["created_professors"] += self.resolve_instructors(chunk)
+        self.resolve_terms(chunk)
+        courses = [self.build_course(p, self.professors[p["instructor_email"]]) for p in chunk]
+        if self.mode == UPSERT:
+            self.upsert_courses(courses, summary)
+        else:
+            for course in courses:
+                self.appended_terms.add(course.term)
+                self.add_preview("created_courses", course)
+            if not self.dry_run:
+                Course.objects.bulk_create(courses)
+                self.search.index(courses)
+            summary["created_courses"] += len(courses)
+
+    def upsert_courses(self, courses, summary):
+        """Insert new keys, bulk-update changed courses and skip unchanged ones."""
+        self.load_existing(courses)
+        to_create = {}
+        to_update = {}
+        for course in courses:
+            key = course_key(course)
+            self.seen_terms.add(course.term)
+            self.seen_term_keys.add(key[0])
+            existing = to_create.get(key) or self.seen.get(key)
+            if existing is None:
+                to_create[key] = course
+                continue
+            # Compare raw column values (professor_id) so no related rows are fetched
+            changed = [
+                f.attname
+                for f in map(Course._meta.get_field, SHEET_FIELDS)
+                if getattr(existing, f.attname) != getattr(course, f.attname)
+            ]
+            if not changed:
+                if key not in to_create and existing.pk not in to_update:
+                    summary["unchanged_courses"] += 1
+                continue
+            if key not in to_create and existing.pk not in to_update:
+                self.add_preview("updated_courses", (existing, changed))
+            for f in changed:
+                setattr(existing, f, getattr(course, f))
+            if key not in to_create:
+                to_update[existing.pk] = existing
+        for course in to_create.values():
+            self.add_preview("created_courses", course)
+        if to_create:
+            if not self.dry_run:
+                Course.objects.bulk_create(to_create.values())
+                self.search.index(list(to_create.values()))
+            self.seen.update(to_create)
+        if to_update and not self.dry_run:
+            Course.objects.bulk_update(to_update.values(), SHEET_FIELDS)
+            self.search.index(list(to_update.values()))
+        summary["created_courses"] += len(to_create)
+        summary["updated_courses"] += len(to_update)
+
+    def load_existing(self, courses):
+        """Pull stored courses matching this chunk's keys into self.seen with one query."""
+        keys = {course_key(c) for c in courses} - set(self.seen)
+        if not keys:
+            return
+        candidates = Course.objects.filter(
+            academic_term__key__in={k[0] for k in keys},
+            course__in={k[1] for k in keys},
+        ).order_by("id")
+        for course in candidates:
+            key = course_key(course)
+            # Earlier duplicate uploads may have stored a key twice; the first wins
+            # and the rest are cleaned up by delete_missing
+            if key in keys and key not in self.seen:
+                self.seen[key] = course
+
+    def delete_unlisted_courses(self):
+        """Delete courses in the uploaded terms that were not in the sheet."""
+        kept = {c.pk for c in self.seen.values()}
+        stale = [
+            pk
+            for pk in Course.objects.filter(academic_term__key__in=self.seen_term_keys).values_list("id", flat=True)
+            if pk not in kept
+        ]
+        if not self.dry_run:
+            for batch in chunked(stale, self.chunk_size):
+                Course.objects.filter(id__in=batch).delete()
+        return len(stale)
+
+    def resolve_instructors(self, parsed):
+        """Make sure every instructor in `parsed` is in self.professors; returns how many were created."""
+        wanted = {}
+        for p in parsed:
+            if p["instructor_email"] not in self.professors:
+                wanted.setdefault(
+                    p["instructor_email"],
+                    (p["instructor_first_name"], p["instructor_last_name"]),
+                )
+        if not wanted:
+            return 0
+
+        self.professors.update(
+            (u.email, u) for u in User.objects.filter(email__in=list(wanted))
+        )
+        missing = [email for email in wanted if email not in self.professors]
+        if missing:
+            # Hash the shared default password once instead of once per professor
+            if self.dry_run:
+                password, eagleids = "", [0] * len(missing)
+            else:
+                password = make_password(DEFAULT_INSTRUCTOR_PASSWORD)
+                eagleids = self.generate_eagleids(len(missing))
+            new_users = [
+                User(
+                    email=email,
+                    professor=True,
+                    eagleid=eagleid,
+                    first_name=wanted[email][0],
+                    last_name=wanted[email][1],
+                    password=password,
+                )
+                for email, eagleid in zip(missing, eagleids)
+            ]
+            for user in new_users:
+                self.add_preview("new_professors", user)
+            if not self.dry_run:
+                User.objects.bulk_create(new_users)
+            self.professors.update((u.email, u) for u in new_users)
+        return len(missing)
+
+    def resolve_terms(self, parsed):
+        """Make sure every term named in `parsed` is in self.terms (creating Terms unless dry-running)."""
+        names = {p["term"] for p in parsed} - set(self.terms)
+        if names and not self.dry_run:
+            self.terms.update(Term.for_names(names))
+
+    def build_course(self, parsed, instructor):
+        fields = {k: v for k, v in parsed.items() if k != "instructor_email"}
+        fields["instructor_first_name"] = instructor.first_name
+        fields["instructor_last_name"] = instructor.last_name
+        course = Course(professor=instructor, academic_term=self.terms.get(parsed["term"]), **fields)
+        # bulk_create skips Course.save(), so derive the code fields here
+        course.set_code_fields()
+        return course
+
+    def generate_eagleids(self, count):
+        """Draw `count` unused random Eagle IDs, checking collisions in one query per round."""
+        eagleids = set()
+        while len(eagleids) < count:
+            candidates = {randint(10000000, 99999999) for _ in range(count - len(eagleids))}
+            candidates -= eagleids
+            taken = set(
+                User.objects.filter(eagleid__in=candidates).values_list("eagleid", flat=True)
+            )
+            eagleids |= candidates - taken
+        return list(eagleids)
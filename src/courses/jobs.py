@@ -0,0 +1,98 @@
+import logging
+from datetime import timedelta
+
+from django.utils import timezone
+
+from .importer import UPSERT, CourseImporter, iter_sheet_rows, sheet_row_count
+from .models import CourseUploadJob, UploadJobStatus
+
+logger = logging.getLogger(__name__)
+
+# Row errors kept on the job for display; the count in rows_failed is always exact
+MAX_STORED_ROW_ERRORS = 200
+
+# A RUNNING job whose heartbeat is this old was left by a worker that died
+STALE_JOB_SECONDS = 10 * 60
+
+
+def claim_next_job():
+    """
+    Claim the oldest queued upload for this worker, or return None.
+
+    The claim is a conditional UPDATE on the status, so two workers polling at
+    the same time can never both pick up the same job. Jobs left RUNNING by a
+    worker that died are reclaimed first (see reclaim_stale_jobs).
+    """
+    reclaim_stale_jobs()
+    while True:
+        job = (
+            CourseUploadJob.objects.filter(status=UploadJobStatus.QUEUED.value)
+            .order_by('created_at')
+            .first()
+        )
+        if job is None:
+            return None
+        now = timezone.now()
+        claimed = CourseUploadJob.objects.filter(
+            pk=job.pk, status=UploadJobStatus.QUEUED.value
+        ).update(status=UploadJobStatus.RUNNING.value, started_at=now, heartbeat_at=now)
+        if claimed:
+            job.refresh_from_db()
+            return job
+
+
+def reclaim_stale_jobs():
+    """
+    Requeue RUNNING jobs whose heartbeat is older than STALE_JOB_SECONDS.
+
+    An upsert import can safely run again from the start. An append import
+    cannot (its committed chunks would be inserted twice), so it is failed
+    instead. Returns how many jobs were reclaimed.
+    """
+    stale = CourseUploadJob.objects.filter(
+        status=UploadJobStatus.RUNNING.value,
+        heartbeat_at__lt=timezone.now() - timedelta(seconds=STALE_JOB_SECONDS),
+    )
+    requeued = stale.filter(mode=UPSERT).update(status=UploadJobStatus.QUEUED.value)
+    stopped = list(stale.exclude(mode=UPSERT))
+    for job in stopped:
+        # Conditional on the old heartbeat, in case the worker was only slow
+        if CourseUploadJob.objects.filter(pk=job.pk, heartbeat_at=job.heartbeat_at).update(
+                status=UploadJobStatus.FAILED.value,
+                error="The worker stopped during the import; rows imported before it stopped were kept.",
+                finished_at=timezone.now(),
+                excel_file=''):
+            job.excel_file.delete(save=False)
+    return requeued + len(stopped)
+
+
+def run_job(job):
+    """Import a claimed job's sheet, committing chunk by chunk and publishing progress."""
+    def report(rows_read, rows_failed):
+        CourseUploadJob.objects.filter(pk=job.pk).update(
+            rows_processed=rows_read, rows_failed=rows_failed, heartbeat_at=timezone.now()
+        )
+
+    importer = CourseImporter(mode=job.mode, delete_missing=job.delete_missing, atomic=False)
+    try:
+        with job.excel_file.open('rb') as f:
+            job.rows_total = sheet_row_count(f)
+            CourseUploadJob.objects.filter(pk=job.pk).update(rows_total=job.rows_total)
+            f.seek(0)
+            job.summary = importer.run(iter_sheet_rows(f), progress=report)
+        job.status = UploadJobStatus.SUCCEEDED.value
+    except Exception as e:
+        logger.exception(f"Course upload job {job.pk} failed")
+        job.status = UploadJobStatus.FAILED.value
+        job.error = str(e)
+    job.rows_processed = importer.rows_read
+    job.rows_failed = importer.failed
+    job.row_errors = importer.errors[:MAX_STORED_ROW_ERRORS]
+    job.finished_at = timezone.now()
+    # The sheet is only needed while importing
+    job.excel_file.delete(save=False)
+    job.save(update_fields=[
+        'status', 'error', 'summary', 'rows_total', 'rows_processed', 'rows_failed',
+        'row_errors', 'finished_at', 'excel_file',
+    ])
+    return job
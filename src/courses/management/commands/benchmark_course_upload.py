@@ -0,0 +1,69 @@
+import os
+import tempfile
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand
+from openpyxl import Workbook, load_workbook
+
+from courses.importer import SHEET_HEADER, CourseImporter, iter_sheet_rows
+
+
+def write_synthetic_sheet(path, rows):
+    """Write a registrar-shaped sheet with `rows` course rows (write-only, so generation stays cheap)."""
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet()
+    sheet.append(SHEET_HEADER)
+    for i in range(rows):
+        sheet.append([
+            "Fall 2025",
+            "Lecture" if i % 3 else "Discussion",
+            f"CSCI{1000 + i % 900}",
+            f"{i % 99:02d}",
+            f"Synthetic Course {i % 900}",
+            f"Professor{i % 150}, Test",
+            "Fulton Hall 250",
+            "MWF 10:00-10:50",
+            40 + i % 60,
+            100,
+        ])
+    workbook.save(path)
+
+
+def full_mode_rows(path):
+    """The previous parse path: load every cell object before handing rows out."""
+    workbook = load_workbook(path)
+    yield from workbook.active.iter_rows(values_only=True)
+
+
+class Command(BaseCommand):
+    help = "Compare memory and time of full vs streaming (read-only) parsing of a synthetic course upload sheet."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=50000)
+
+    def handle(self, *args, **options):
+        rows = options["rows"]
+        fd, path = tempfile.mkstemp(suffix=".xlsx")
+        os.close(fd)
+        try:
+            self.stdout.write(f"Writing synthetic sheet with {rows} rows...")
+            write_synthetic_sheet(path, rows)
+            for label, reader in (("full", full_mode_rows), ("streaming", iter_sheet_rows)):
+                elapsed, peak, parsed = self.measure(reader, path)
+                self.stdout.write(
+                    f"{label:>10}: {parsed} rows parsed in {elapsed:.2f}s, peak memory {peak / 1024 / 1024:.1f} MiB"
+                )
+        finally:
+            os.remove(path)
+
+    def measure(self, reader, path):
+        # Parse only: the importer's row handling without touching the database
+        importer = CourseImporter()
+        tracemalloc.start()
+        started = time.perf_counter()
+        parsed = sum(1 for row in reader(path) if importer.parse_row(row) is not None)
+        elapsed = time.perf_counter() - started
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return elapsed, peak, parsed
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from courses.search import get_search_backend
+
+
+class Command(BaseCommand):
+    help = "Rebuild the course search index from the courses table (e.g. after raw SQL edits or a restore)."
+
+    def handle(self, *args, **options):
+        backend = get_search_backend()
+        count = backend.rebuild()
+        self.stdout.write(f"Indexed {count} courses with the {backend.name} search backend.")
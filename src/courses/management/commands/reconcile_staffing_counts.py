@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from courses.staffing import reconcile_staffing
+
+
+class Command(BaseCommand):
+    help = "Recount Course.filled_ta_slots and pending_offers where they have drifted from the TA and offer rows."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help="Report drifted courses without fixing them.")
+
+    def handle(self, *args, **options):
+        count = reconcile_staffing(dry_run=options['dry_run'])
+        if options['dry_run']:
+            self.stdout.write(f"{count} courses have drifted staffing counters.")
+        else:
+            self.stdout.write(f"Repaired staffing counters on {count} courses.")
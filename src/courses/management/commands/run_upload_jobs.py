@@ -0,0 +1,28 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from courses.jobs import claim_next_job, run_job
+
+
+class Command(BaseCommand):
+    help = "Worker that imports queued course upload jobs outside the web request."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true", help="Process the queue once and exit.")
+        parser.add_argument("--interval", type=float, default=2.0, help="Seconds to sleep when the queue is empty.")
+
+    def handle(self, *args, **options):
+        while True:
+            job = claim_next_job()
+            if job is None:
+                if options["once"]:
+                    return
+                time.sleep(options["interval"])
+                continue
+            self.stdout.write(f"Running course upload {job.pk}...")
+            job = run_job(job)
+            self.stdout.write(
+                f"Course upload {job.pk} {job.get_status()}: "
+                f"{job.rows_processed} rows processed, {job.rows_failed} failed"
+            )
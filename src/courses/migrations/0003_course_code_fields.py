@@ -0,0 +1,48 @@
+# Generated by Django 4.2.6 on 2026-10-18 09:36
+
+from django.db import migrations, models
+
+from courses.models import parse_course_code
+
+
+def backfill_code_fields(apps, schema_editor):
+    Course = apps.get_model('courses', 'Course')
+    batch = []
+    for course in Course.objects.only('id', 'course').iterator(chunk_size=1000):
+        course.subject_code, course.course_number, course.course_level = parse_course_code(course.course)
+        batch.append(course)
+        if len(batch) >= 1000:
+            Course.objects.bulk_update(batch, ['subject_code', 'course_number', 'course_level'])
+            batch = []
+    if batch:
+        Course.objects.bulk_update(batch, ['subject_code', 'course_number', 'course_level'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0002_course_upload_job'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='course',
+            name='course_level',
+            field=models.PositiveSmallIntegerField(blank=True, db_index=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='course',
+            name='course_number',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='course',
+            name='subject_code',
+            field=models.CharField(blank=True, default='', editable=False, max_length=20),
+        ),
+        migrations.AddIndex(
+            model_name='course',
+            index=models.Index(fields=['subject_code', 'course_number'], name='course_code_idx'),
+        ),
+        migrations.RunPython(backfill_code_fields, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,90 @@
+# Generated by Django 4.2.6 on 2026-10-18 09:39
+
+import courses.models
+from django.db import migrations, models
+import django.db.models.deletion
+
+# Frozen copies of courses.search at the time of this migration, so later
+# changes to that module cannot change what this migration builds
+
+POSTGRES_INDEX_NAME = 'course_search_idx'
+
+# bm25 weights: course_id (unindexed), code, title, instructors
+FTS_WEIGHTS = (0.0, 10.0, 4.0, 1.0)
+
+
+def fts_rowid(course_id):
+    return course_id.int & ((1 << 63) - 1)
+
+
+def create_search_index(apps, schema_editor):
+    Course = apps.get_model('courses', 'Course')
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        from django.contrib.postgres.indexes import GinIndex
+        from django.contrib.postgres.search import SearchVector
+        document = SearchVector(
+            'course', 'subject_code', 'course_number', 'course_title',
+            'instructor_first_name', 'instructor_last_name',
+            config='simple',
+        )
+        schema_editor.add_index(Course, GinIndex(document, name=POSTGRES_INDEX_NAME))
+    elif vendor == 'sqlite':
+        weights = ', '.join(str(w) for w in FTS_WEIGHTS)
+        schema_editor.execute(
+            "CREATE VIRTUAL TABLE courses_course_fts USING fts5("
+            "course_id UNINDEXED, code, title, instructors, tokenize='unicode61')"
+        )
+        schema_editor.execute(
+            f"INSERT INTO courses_course_fts (courses_course_fts, rank) VALUES ('rank', 'bm25({weights})')"
+        )
+        rows = [
+            (
+                fts_rowid(c.id),
+                c.id.hex,
+                ' '.join(str(v) for v in (c.course, c.subject_code, c.course_number) if v),
+                c.course_title,
+                f'{c.instructor_first_name} {c.instructor_last_name}',
+            )
+            for c in Course.objects.all().iterator(chunk_size=1000)
+        ]
+        with schema_editor.connection.cursor() as cursor:
+            cursor.executemany(
+                'INSERT INTO courses_course_fts (rowid, course_id, code, title, instructors) '
+                'VALUES (%s, %s, %s, %s, %s)',
+                rows,
+            )
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute(f'DROP INDEX IF EXISTS {POSTGRES_INDEX_NAME}')
+    elif vendor == 'sqlite':
+        schema_editor.execute('DROP TABLE IF EXISTS courses_course_fts')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0003_course_code_fields'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CourseSearchEntry',
+            fields=[
+                ('course', models.OneToOneField(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='search_entry', serialize=False, to='courses.course')),
+                ('code', models.TextField()),
+                ('title', models.TextField()),
+                ('instructors', models.TextField()),
+                ('document', courses.models.FullTextField(db_column='courses_course_fts')),
+                ('rank', models.FloatField()),
+            ],
+            options={
+                'db_table': 'courses_course_fts',
+                'managed': False,
+            },
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
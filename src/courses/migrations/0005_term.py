@@ -0,0 +1,55 @@
+# Generated by Django 4.2.6 on 2026-10-18 09:43
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+from courses.models import term_sort_key
+
+
+def backfill_terms(apps, schema_editor):
+    Course = apps.get_model('courses', 'Course')
+    Term = apps.get_model('courses', 'Term')
+    terms = {}
+    for raw in Course.objects.values_list('term', flat=True).distinct():
+        name = ' '.join((raw or '').split())
+        if not name:
+            continue
+        key = name.lower()
+        if key not in terms:
+            terms[key] = Term.objects.create(key=key, name=name, sort_key=term_sort_key(name))
+        Course.objects.filter(term=raw).update(academic_term=terms[key])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0004_course_search'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Term',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(editable=False, max_length=100, unique=True)),
+                ('name', models.CharField(max_length=100)),
+                ('sort_key', models.IntegerField(db_index=True, default=0)),
+                ('start_date', models.DateField(blank=True, null=True)),
+                ('end_date', models.DateField(blank=True, null=True)),
+                ('is_current', models.BooleanField(default=False)),
+            ],
+            options={
+                'ordering': ['-sort_key', 'name'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='term',
+            constraint=models.UniqueConstraint(condition=models.Q(('is_current', True)), fields=('is_current',), name='single_current_term'),
+        ),
+        migrations.AddField(
+            model_name='course',
+            name='academic_term',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='courses', to='courses.term'),
+        ),
+        migrations.RunPython(backfill_terms, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 4.2.6 on 2026-10-18 09:49
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+import django.db.models.expressions
+
+# OfferStatus.PENDING
+PENDING = 1
+
+
+def _count(queryset):
+    return Coalesce(
+        Subquery(queryset.order_by().values('course_id').annotate(n=Count('pk')).values('n')),
+        Value(0),
+        output_field=IntegerField(),
+    )
+
+
+def backfill_counters(apps, schema_editor):
+    Course = apps.get_model('courses', 'Course')
+    Offer = apps.get_model('offers', 'Offer')
+    Course.objects.update(
+        filled_ta_slots=_count(Course.current_tas.through.objects.filter(course_id=OuterRef('pk'))),
+        pending_offers=_count(Offer.objects.filter(course_id=OuterRef('pk'), status=PENDING)),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0005_term'),
+        ('offers', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='course',
+            name='filled_ta_slots',
+            field=models.IntegerField(db_index=True, default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='course',
+            name='pending_offers',
+            field=models.IntegerField(db_index=True, default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='course',
+            index=models.Index(django.db.models.expressions.CombinedExpression(models.F('num_tas'), '-', models.F('filled_ta_slots')), name='course_open_ta_slots_idx'),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
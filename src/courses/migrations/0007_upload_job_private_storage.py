@@ -0,0 +1,24 @@
+# Generated by Django 4.2.6 on 2026-10-18 10:12
+
+import courses.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0006_staffing_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='courseuploadjob',
+            name='heartbeat_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='courseuploadjob',
+            name='excel_file',
+            field=models.FileField(storage=courses.models.upload_job_storage, upload_to=courses.models.upload_job_path),
+        ),
+    ]
@@ -1,13 +1,127 @@
-from django.db import models
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+from django.db import models, transaction
 from users.models import CustomUser
 from django.urls import reverse
-from django.db.models import Q
+from django.db.models import F, Q
+from django.utils import timezone
+from enum import Enum
+import re
 import uuid
 
+# Leading subject letters, then the catalog number, e.g. "CSCI1101" or "MATH 2210.01"
+COURSE_CODE_RE = re.compile(r'^\s*(\D*?)\s*(\d+)')
+
+
+def parse_course_code(code):
+    """
+    Split a course code into (subject_code, course_number, course_level).
+    The level is the first digit of a catalog number of at least four digits
+    ("CSCI1101" -> ("CSCI", 1101, 1)); parts that cannot be read are None/"".
+    """
+    match = COURSE_CODE_RE.match(code or '')
+    if not match:
+        return '', None, None
+    subject, digits = match.groups()
+    level = int(digits[0]) if len(digits) >= 4 else None
+    return subject.strip().upper()[:20], int(digits), level
+
+
+TERM_SEASONS = {'winter': 1, 'spring': 2, 'summer': 3, 'fall': 4}
+TERM_RE = re.compile(r'(winter|spring|summer|fall)\D*(\d{4})|(\d{4})\D*(winter|spring|summer|fall)', re.IGNORECASE)
+
+# Course columns only ever changed by courses.staffing; Course.save() writes back their stored values
+STAFFING_COUNTERS = ('filled_ta_slots', 'pending_offers')
+
+
+def term_sort_key(name):
+    """Chronological sort key for a term name: "Fall 2025" -> 20254; 0 when unreadable."""
+    match = TERM_RE.search(name or '')
+    if not match:
+        return 0
+    season = (match.group(1) or match.group(4)).lower()
+    year = match.group(2) or match.group(3)
+    return int(year) * 10 + TERM_SEASONS[season]
+
+
+class Term(models.Model):
+    '''
+    An academic term. Courses keep the sheet's term text in Course.term and
+    point here through Course.academic_term, so term filters are an indexed
+    integer join and terms sort chronologically by sort_key instead of as
+    strings. At most one term is flagged is_current; see Term.current().
+    '''
+    key = models.CharField(max_length=100, unique=True, editable=False)  # normalized lower-case name
+    name = models.CharField(max_length=100)
+    sort_key = models.IntegerField(default=0, db_index=True)
+    start_date = models.DateField(null=True, blank=True)
+    end_date = models.DateField(null=True, blank=True)
+    is_current = models.BooleanField(default=False)
+
+    class Meta:
+        ordering = ['-sort_key', 'name']
+        constraints = [
+            models.UniqueConstraint(fields=['is_current'], condition=Q(is_current=True), name='single_current_term'),
+        ]
+
+    def __str__(self):
+        return self.name
+
+    @staticmethod
+    def normalize(name):
+        return ' '.join((name or '').split())
+
+    @classmethod
+    def key_for(cls, name):
+        return cls.normalize(name).lower()
+
+    def save(self, *args, **kwargs):
+        self.name = self.normalize(self.name)
+        self.key = self.key_for(self.name)
+        # Derived from the name, so a renamed term re-sorts
+        self.sort_key = term_sort_key(self.name)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'name' in update_fields:
+            kwargs['update_fields'] = set(update_fields) | {'key', 'sort_key'}
+        with transaction.atomic():
+            if self.is_current:
+                Term.objects.filter(is_current=True).exclude(pk=self.pk).update(is_current=False)
+            super().save(*args, **kwargs)
+
+    @classmethod
+    def for_names(cls, names):
+        """Map each term name to its Term, creating missing ones; one query when they all exist."""
+        keys = {cls.key_for(name): cls.normalize(name) for name in names if cls.normalize(name)}
+        terms = {t.key: t for t in cls.objects.filter(key__in=keys)}
+        missing = [
+            cls(key=key, name=name, sort_key=term_sort_key(name))
+            for key, name in keys.items() if key not in terms
+        ]
+        if missing:
+            cls.objects.bulk_create(missing, ignore_conflicts=True)
+            terms.update((t.key, t) for t in cls.objects.filter(key__in=[t.key for t in missing]))
+        return {name: terms[cls.key_for(name)] for name in names if cls.normalize(name)}
+
+    @classmethod
+    def current(cls):
+        """
+        The current term: the one flagged is_current, else the one whose dates
+        contain today, else the latest by sort_key.
+        """
+        today = timezone.localdate()
+        return (
+            cls.objects.filter(is_current=True).first()
+            or cls.objects.filter(start_date__lte=today, end_date__gte=today).first()
+            or cls.objects.first()
+        )
+
 
 class Course(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     term = models.CharField(max_length=100)
+    # Resolved from `term` by Course.save() and the importer
+    academic_term = models.ForeignKey(
+        Term, on_delete=models.PROTECT, related_name='courses', null=True, blank=True, editable=False)
     class_type = models.CharField(max_length=100)
     course = models.CharField(max_length=100)
     section = models.CharField(max_length=100)
@@ -31,18 +145,176 @@ class Course(models.Model):
 
     has_discussions = models.BooleanField(default=False)
 
+    # Derived from `course` by set_code_fields() so level filtering and code
+    # ordering are index lookups instead of regex scans
+    subject_code = models.CharField(max_length=20, blank=True, default='', editable=False)
+    course_number = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    course_level = models.PositiveSmallIntegerField(null=True, blank=True, editable=False, db_index=True)
+
+    # Staffing counters kept by courses.staffing; see STAFFING_COUNTERS
+    filled_ta_slots = models.IntegerField(default=0, editable=False, db_index=True)
+    pending_offers = models.IntegerField(default=0, editable=False, db_index=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['subject_code', 'course_number'], name='course_code_idx'),
+            models.Index(F('num_tas') - F('filled_ta_slots'), name='course_open_ta_slots_idx'),
+        ]
+
     def __str__(self):
         return f"{self.course_title} ({self.section}) - {self.class_type}"
 
+    def save(self, *args, **kwargs):
+        self.set_code_fields()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or {'term', 'academic_term'} & set(update_fields):
+            # Saves of other columns (e.g. status) skip the Term lookup
+            self.set_academic_term()
+        if update_fields is None and not self._state.adding:
+            # Full saves write every column: reload the counters first, so a stale
+            # copy does not undo the updates made since it was loaded
+            counters = Course.objects.filter(pk=self.pk).values(*STAFFING_COUNTERS).first()
+            if counters:
+                self.__dict__.update(counters)
+        if update_fields is not None:
+            if 'course' in update_fields:
+                update_fields = set(update_fields) | {'subject_code', 'course_number', 'course_level'}
+            if 'term' in update_fields:
+                update_fields = set(update_fields) | {'academic_term'}
+            kwargs['update_fields'] = update_fields
+        super().save(*args, **kwargs)
+
+    def set_academic_term(self):
+        """Point academic_term at the Term named by `term`, unless it already does."""
+        cached = Course._meta.get_field('academic_term').get_cached_value(self, None)
+        if cached is not None and cached.key == Term.key_for(self.term):
+            return
+        self.academic_term = Term.for_names([self.term]).get(self.term)
+
+    def set_code_fields(self):
+        """Fill subject_code/course_number/course_level from `course`; bulk_create callers must call this."""
+        self.subject_code, self.course_number, self.course_level = parse_course_code(self.course)
+
     def get_absolute_url(self):
         return reverse('dashboard')
 
     def get_object(self):
         return self
 
+    @property
+    def ta_count(self):
+        """Number of current TAs, from the filled_ta_slots counter."""
+        return self.filled_ta_slots
+
     @property
     def ta_fill_percent(self):
         """Percentage of TA slots filled (0-100). Returns 0 if num_tas is 0."""
         if not self.num_tas:
             return 0
-        return min(100, int(100 * self.current_tas.count() / self.num_tas))
\ No newline at end of file
+        return min(100, int(100 * self.ta_count / self.num_tas))
+
+
+class FullTextField(models.TextField):
+    """A full-text table column that supports the `match` lookup (SQLite FTS5 MATCH)."""
+
+
+@FullTextField.register_lookup
+class Match(models.Lookup):
+    lookup_name = 'match'
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f'{lhs} MATCH {rhs}', lhs_params + rhs_params
+
+
+class CourseSearchEntry(models.Model):
+    '''
+    Row of the SQLite FTS5 course search table, created by migration
+    0004_course_search and kept up to date by courses.search. Only used for
+    joins and ranking; rows are written with raw SQL. `document` maps to the
+    table's hidden column of the same name, which is what MATCH is run against,
+    and `rank` is the table's bm25 rank (lower is better).
+    '''
+    course = models.OneToOneField(
+        Course, on_delete=models.DO_NOTHING, primary_key=True, db_constraint=False,
+        related_name='search_entry')
+    code = models.TextField()
+    title = models.TextField()
+    instructors = models.TextField()
+    document = FullTextField(db_column='courses_course_fts')
+    rank = models.FloatField()
+
+    class Meta:
+        managed = False
+        db_table = 'courses_course_fts'
+
+
+class UploadJobStatus(Enum):
+    '''
+    Enum for the status of a background course upload
+    QUEUED - Uploaded and waiting for the worker (manage.py run_upload_jobs)
+    RUNNING - Being imported by a worker (reclaimed once its heartbeat is STALE_JOB_SECONDS old)
+    SUCCEEDED - Import finished (rows that failed to parse are counted in rows_failed)
+    FAILED - Import stopped with an error; chunks written before the error are kept
+    '''
+    QUEUED = 1
+    RUNNING = 2
+    SUCCEEDED = 3
+    FAILED = 4
+
+
+def upload_job_storage():
+    """Private storage for uploaded sheets: outside MEDIA_ROOT, so never served."""
+    return FileSystemStorage(location=settings.UPLOAD_JOB_DIR)
+
+
+def upload_job_path(instance, filename):
+    # Named after the job rather than the uploaded file
+    return f'{instance.id}.xlsx'
+
+
+class CourseUploadJob(models.Model):
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    excel_file = models.FileField(upload_to=upload_job_path, storage=upload_job_storage)
+    mode = models.CharField(max_length=20, default='append')
+    delete_missing = models.BooleanField(default=False)
+    created_by = models.ForeignKey(
+        CustomUser, on_delete=models.SET_NULL, related_name='course_upload_jobs', null=True, blank=True)
+
+    status = models.IntegerField(choices=[(
+        tag.value, tag.name) for tag in UploadJobStatus], default=UploadJobStatus.QUEUED.value, db_index=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    # Refreshed after every chunk; a RUNNING job whose heartbeat stops was left by a dead worker
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    rows_total = models.PositiveIntegerField(null=True, blank=True)
+    rows_processed = models.PositiveIntegerField(default=0)
+    rows_failed = models.PositiveIntegerField(default=0)
+    summary = models.JSONField(default=dict, blank=True)
+    row_errors = models.JSONField(default=list, blank=True)  # [[row_number, "message"], ...]
+    error = models.TextField(blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"Course upload {self.id} ({self.get_status()})"
+
+    def get_status(self):
+        return UploadJobStatus(self.status).name
+
+    @property
+    def is_finished(self):
+        return self.status in (UploadJobStatus.SUCCEEDED.value, UploadJobStatus.FAILED.value)
+
+    @property
+    def eta_seconds(self):
+        """Seconds left at the current row rate, or None when it cannot be estimated yet."""
+        if self.status != UploadJobStatus.RUNNING.value or not (self.started_at and self.rows_total and self.rows_processed):
+            return None
+        elapsed = (timezone.now() - self.started_at).total_seconds()
+        remaining = max(self.rows_total - self.rows_processed, 0)
+        return round(elapsed / self.rows_processed * remaining)
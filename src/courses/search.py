@@ -0,0 +1,83 @@
+"""
+Course search.
+
+Search used to OR four `icontains` clauses, which no index can serve. The
+shared backends (main.search) filter a Course queryset down to the courses
+matching a search string; CourseIndex also annotates them with `search_rank`
+(higher is more relevant):
+
+- SQLite: the FTS5 table courses_course_fts (see CourseSearchEntry), ranked
+  with bm25 using the column weights set in migration 0004_course_search.
+- PostgreSQL: search_vector(), served by the GIN expression index from the
+  same migration, ranked with ts_rank.
+- Other databases: the old icontains lookup, unranked.
+
+settings.COURSE_SEARCH_BACKEND can name a backend instead.
+"""
+from django.db.models import F, Q, Value
+
+from main.search import SearchIndex, get_backend
+from .models import Course
+
+# Course columns the index is built from; saves of other columns skip reindexing
+INDEXED_FIELDS = frozenset({
+    'course', 'subject_code', 'course_number', 'course_title',
+    'instructor_first_name', 'instructor_last_name',
+})
+
+
+def search_vector():
+    """The tsvector PostgreSQL searches match; the GIN index is built on this exact expression."""
+    from django.contrib.postgres.search import SearchVector
+    return SearchVector(
+        'course', 'subject_code', 'course_number', 'course_title',
+        'instructor_first_name', 'instructor_last_name',
+        config='simple',
+    )
+
+
+class CourseIndex(SearchIndex):
+    model = Course
+    backend_setting = 'COURSE_SEARCH_BACKEND'
+    table = 'courses_course_fts'
+    key_column = 'course_id'
+    columns = ('code', 'title', 'instructors')
+
+    def no_match(self, queryset):
+        # Searches without any word match nothing, but still carry search_rank for ordering
+        return queryset.none().annotate(search_rank=Value(0.0))
+
+    def filter_icontains(self, queryset, words):
+        condition = Q()
+        for word in words:
+            condition &= (
+                Q(course__icontains=word) |
+                Q(course_title__icontains=word) |
+                Q(instructor_first_name__icontains=word) |
+                Q(instructor_last_name__icontains=word)
+            )
+        return queryset.filter(condition).annotate(search_rank=Value(0.0))
+
+    def filter_fts(self, queryset, query):
+        return queryset.filter(search_entry__document__match=query).annotate(
+            search_rank=-F('search_entry__rank'))
+
+    def filter_tsquery(self, queryset, query):
+        from django.contrib.postgres.search import SearchRank
+
+        return queryset.alias(search_document=search_vector()).filter(search_document=query).annotate(
+            search_rank=SearchRank(search_vector(), query))
+
+    def entry(self, course):
+        return course.pk, (
+            ' '.join(str(v) for v in (course.course, course.subject_code, course.course_number) if v),
+            course.course_title,
+            f'{course.instructor_first_name} {course.instructor_last_name}',
+        )
+
+    def all_objects(self):
+        return Course.objects.only('id', *INDEXED_FIELDS)
+
+
+def get_search_backend():
+    return get_backend(CourseIndex())
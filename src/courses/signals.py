@@ -0,0 +1,66 @@
+from collections import Counter
+
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import Signal, receiver
+
+from offers.models import Offer
+from users.models import CustomUser
+from .models import Course
+from .search import INDEXED_FIELDS, get_search_backend
+from .staffing import adjust_filled_ta_slots, refresh_filled_ta_slots, refresh_pending_offers
+
+CourseTA = Course.current_tas.through
+
+# Sent after bulk writes that bypass model signals (bulk_create, bulk_update,
+# queryset.update). `terms` is the set of affected term names, or None when
+# every term may have changed.
+courses_changed = Signal()
+
+
+@receiver(post_save, sender=Course)
+def index_course(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and not INDEXED_FIELDS & update_fields:
+        return
+    get_search_backend().index([instance])
+
+
+@receiver(post_delete, sender=Course)
+def unindex_course(sender, instance, **kwargs):
+    get_search_backend().unindex([instance.pk])
+
+
+@receiver(m2m_changed, sender=CourseTA)
+def count_ta_changes(sender, instance, action, reverse, pk_set, **kwargs):
+    # Through rows are auto-created, so m2m_changed is the only signal they send
+    if action == 'post_add' and pk_set:
+        # pk_set holds only the rows add() actually inserted
+        if reverse:
+            adjust_filled_ta_slots(dict.fromkeys(pk_set, 1))
+        else:
+            adjust_filled_ta_slots({instance.pk: len(pk_set)})
+    elif action in ('pre_remove', 'pre_clear'):
+        # remove() is handed ids that may not be TAs; count the rows about to go
+        rows = CourseTA.objects.filter(**{'customuser_id' if reverse else 'course_id': instance.pk})
+        if action == 'pre_remove':
+            rows = rows.filter(**{'course_id__in' if reverse else 'customuser_id__in': pk_set})
+        instance._removed_ta_courses = Counter(rows.values_list('course_id', flat=True))
+    elif action in ('post_remove', 'post_clear'):
+        removed = instance.__dict__.pop('_removed_ta_courses', {})
+        adjust_filled_ta_slots({course_id: -n for course_id, n in removed.items()})
+
+
+@receiver(pre_delete, sender=CustomUser)
+def remember_user_courses(sender, instance, **kwargs):
+    # Deleting a user cascades to their TA rows without any m2m signal
+    instance._ta_course_ids = list(instance.course_working_for.values_list('pk', flat=True))
+
+
+@receiver(post_delete, sender=CustomUser)
+def recount_user_courses(sender, instance, **kwargs):
+    refresh_filled_ta_slots(getattr(instance, '_ta_course_ids', []))
+
+
+@receiver(post_save, sender=Offer)
+@receiver(post_delete, sender=Offer)
+def count_pending_offers(sender, instance, **kwargs):
+    refresh_pending_offers([instance.course_id])
@@ -0,0 +1,92 @@
+"""
+Denormalized staffing counters on Course.
+
+Course.filled_ta_slots (current TAs) and Course.pending_offers (offers still
+awaiting an answer) stand in for Count('current_tas') and Count('offer_course')
+joins on the dashboards, the course list stats and the staffing filters. The
+receivers in courses.signals keep them current:
+
+- TA membership changes made through Course.current_tas (add, remove, set,
+  clear, in either direction) add to or subtract from filled_ta_slots in a
+  single UPDATE (filled_ta_slots = filled_ta_slots + n), so two requests
+  changing the same course cannot lose a step.
+- Writes that skip the m2m signals (user deletion, the TA inline in the user
+  admin) recount the affected courses with refresh_filled_ta_slots().
+- pending_offers is recounted for an offer's course whenever the offer is saved
+  or deleted. Code that changes offers with queryset.update() calls
+  refresh_pending_offers() itself.
+
+Course.save() never writes either column back. reconcile_staffing() repairs
+drift left by raw SQL or restores; see the reconcile_staffing_counts command.
+"""
+from django.db.models import Count, F, IntegerField, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from offers.models import Offer, OfferStatus
+from .models import Course
+
+# Courses recounted per UPDATE while reconciling
+RECONCILE_BATCH_SIZE = 500
+
+# Staffing buckets; UNDERSTAFFED and FULLY_STAFFED need with_open_ta_slots()
+UNDERSTAFFED = Q(open_ta_slots__gt=0)
+NO_TAS = Q(filled_ta_slots=0, num_tas__gt=0)
+FULLY_STAFFED = Q(open_ta_slots__lte=0, num_tas__gt=0)
+
+
+def with_open_ta_slots(queryset):
+    """Alias `open_ta_slots`, the expression the course_open_ta_slots_idx index is built on."""
+    return queryset.alias(open_ta_slots=F('num_tas') - F('filled_ta_slots'))
+
+
+def _count(queryset, field):
+    return Coalesce(
+        Subquery(queryset.order_by().values(field).annotate(n=Count('pk')).values('n')),
+        Value(0),
+        output_field=IntegerField(),
+    )
+
+
+def counted_ta_slots():
+    return _count(Course.current_tas.through.objects.filter(course_id=OuterRef('pk')), 'course_id')
+
+
+def counted_pending_offers():
+    return _count(Offer.objects.filter(course_id=OuterRef('pk'), status=OfferStatus.PENDING.value), 'course_id')
+
+
+def adjust_filled_ta_slots(changes):
+    """Apply {course_id: change in TA count} to filled_ta_slots."""
+    for course_id, change in changes.items():
+        if change:
+            Course.objects.filter(pk=course_id).update(filled_ta_slots=F('filled_ta_slots') + change)
+
+
+def refresh_filled_ta_slots(course_ids):
+    """Recount filled_ta_slots for `course_ids`, for writes that bypass the m2m signals."""
+    course_ids = set(course_ids)
+    if course_ids:
+        Course.objects.filter(pk__in=course_ids).update(filled_ta_slots=counted_ta_slots())
+
+
+def refresh_pending_offers(course_ids):
+    """Recount pending_offers for `course_ids`."""
+    course_ids = set(course_ids)
+    if course_ids:
+        Course.objects.filter(pk__in=course_ids).update(pending_offers=counted_pending_offers())
+
+
+def reconcile_staffing(dry_run=False):
+    """Recount both counters where they disagree with the rows; returns how many courses had drifted."""
+    drifted = list(
+        Course.objects.alias(actual_tas=counted_ta_slots(), actual_pending=counted_pending_offers())
+        .exclude(filled_ta_slots=F('actual_tas'), pending_offers=F('actual_pending'))
+        .values_list('pk', flat=True)
+    )
+    if not dry_run:
+        for start in range(0, len(drifted), RECONCILE_BATCH_SIZE):
+            Course.objects.filter(pk__in=drifted[start:start + RECONCILE_BATCH_SIZE]).update(
+                filled_ta_slots=counted_ta_slots(),
+                pending_offers=counted_pending_offers(),
+            )
+    return len(drifted)
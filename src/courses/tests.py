@@ -1,3 +1,321 @@
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from openpyxl import Workbook
+
+from applications.models import Application
+from main.testing import create_course
+from offers.models import Offer, OfferStatus
+from users.models import CustomUser
+
+from .filters import CourseFilterSpec
+from .importer import APPEND, SHEET_HEADER, UPSERT, CourseImporter, check_header
+from .jobs import STALE_JOB_SECONDS, claim_next_job, run_job
+from .models import Course, CourseUploadJob, Term, UploadJobStatus, parse_course_code, upload_job_storage
+from .search import get_search_backend
+from .staffing import reconcile_staffing
+
+
+def sheet_rows(term, sections):
+    rows = [tuple(SHEET_HEADER)]
+    for section in sections:
+        rows.append((term, "Lab", "CSCI1101", section, "Computer Science 1", "Prof, Anne", "Fulton 1", "MWF", 40, 50))
+    return rows
+
+
+class CheckHeaderTests(TestCase):
+    def test_accepts_expected_header_and_aliases(self):
+        self.assertIsNone(check_header(tuple(SHEET_HEADER)))
+        self.assertIsNone(check_header(("Term", "Class Type") + tuple(SHEET_HEADER[2:])))
+
+    def test_rejects_truncated_header(self):
+        self.assertIsNotNone(check_header(tuple(SHEET_HEADER[:6])))
+
+    def test_rejects_reordered_header(self):
+        self.assertIsNotNone(check_header(tuple(reversed(SHEET_HEADER))))
+
+
+class CourseCodeTests(TestCase):
+    def test_parse_course_code(self):
+        cases = {
+            "CSCI1101": ("CSCI", 1101, 1),
+            "csci 2201": ("CSCI", 2201, 2),
+            "  MATH3310.01": ("MATH", 3310, 3),
+            "BIOL 5501L": ("BIOL", 5501, 5),
+            "Comp Sci 4400": ("COMP SCI", 4400, 4),
+            # Catalog numbers under four digits have no level
+            "ENGL110": ("ENGL", 110, None),
+            "1101": ("", 1101, 1),
+            "CSCI": ("", None, None),
+            "": ("", None, None),
+            None: ("", None, None),
+        }
+        for code, parsed in cases.items():
+            with self.subTest(code=code):
+                self.assertEqual(parse_course_code(code), parsed)
+
+    def test_level_filter(self):
+        courses = {code: create_course(course=code) for code in ("CSCI1101", "CSCI2201", "MATH2202", "ENGL110")}
+        def codes(course_level):
+            spec = CourseFilterSpec(course_level=course_level)
+            return sorted(spec.apply().values_list("course", flat=True))
+
+        self.assertEqual(codes("2"), ["CSCI2201", "MATH2202"])
+        self.assertEqual(codes("1"), ["CSCI1101"])
+        self.assertEqual(codes("3"), [])
+        self.assertEqual(len(codes("x")), 4)
+
+        # Renaming a course re-derives its level, also on partial saves
+        course = courses["ENGL110"]
+        course.course = "ENGL3301"
+        course.save(update_fields=["course"])
+        self.assertEqual(codes("3"), ["ENGL3301"])
+
+
+class FilterCacheKeyTests(TestCase):
+    PROFESSOR = '9b2f0c3e-3f1a-4c55-9d0e-1c2b3a4d5e6f'
+
+    def key(self, **params):
+        return CourseFilterSpec.from_params(params).cache_key
+
+    def test_equivalent_filters_share_a_key(self):
+        key = self.key(q='data structures', term='Fall 2025', status='active', course_level='2')
+        self.assertEqual(key, self.key(course_level='2', status='active', term='Fall 2025', q='data structures'))
+        self.assertEqual(key, self.key(q='  Data  Structures ', term='fall  2025', status='active', course_level='2'))
+        # Invalid values are dropped, like missing ones
+        self.assertEqual(self.key(), self.key(status='open', course_level='9', professor='42'))
+
+    def test_different_filters_get_different_keys(self):
+        keys = [
+            self.key(),
+            self.key(q='data'),
+            self.key(q='database'),
+            self.key(term='Fall 2025'),
+            self.key(term='Spring 2026'),
+            self.key(professor=self.PROFESSOR),
+            self.key(status='active'),
+            self.key(status='closed'),
+            self.key(class_type='Lab'),
+            self.key(class_type='Lecture'),
+            self.key(course_level='1'),
+            self.key(course_level='2'),
+            self.key(q='data', term='Fall 2025'),
+        ]
+        self.assertEqual(len(set(keys)), len(keys))
+
+
+class UpsertTests(TestCase):
+    def test_term_spelling_does_not_duplicate_courses(self):
+        CourseImporter(mode=UPSERT).run(sheet_rows("Fall 2025", ["01", "02"]))
+        summary = CourseImporter(mode=UPSERT).run(sheet_rows("fall  2025", ["01", "02", "03"]))
+        self.assertEqual(summary["created_courses"], 1)
+        self.assertEqual(Course.objects.count(), 3)
+        self.assertEqual(Course.objects.values('academic_term').distinct().count(), 1)
+
+    def test_query_count_does_not_grow_with_rows(self):
+        def count_queries(term, n):
+            sections = [f"{i:02}" for i in range(n)]
+            with CaptureQueriesContext(connection) as queries:
+                CourseImporter(mode=UPSERT).run(sheet_rows(term, sections))
+            return len(queries)
+
+        # Creates the professor, so both measured imports find them
+        CourseImporter(mode=UPSERT).run(sheet_rows("Winter 2025", ["01"]))
+        # New courses
+        self.assertEqual(count_queries("Fall 2025", 10), count_queries("Spring 2026", 20))
+        # The same rows again, as updates
+        Course.objects.update(room_name="Fulton 2")
+        self.assertEqual(count_queries("Fall 2025", 10), count_queries("Spring 2026", 20))
+
+    def test_dry_run_reports_changes_without_writing(self):
+        CourseImporter(mode=UPSERT).run(sheet_rows("Fall 2025", ["01"]))
+        counts = (Course.objects.count(), Term.objects.count(), CustomUser.objects.count())
+        rows = [
+            tuple(SHEET_HEADER),
+            ("Fall 2025", "Lab", "CSCI1101", "01", "Computer Science 1", "Prof, Anne", "Fulton 2", "MWF", 40, 50),
+            ("Spring 2026", "Lab", "CSCI2201", "01", "Data Structures", "Smith, Jane", "Fulton 1", "TTh", 30, 40),
+            ("Spring 2026", "Lab", "CSCI2202", "01", "Algorithms", "Smith, Jane", "Fulton 1", "TTh", "many", 40),
+        ]
+        importer = CourseImporter(mode=UPSERT, dry_run=True)
+        summary = importer.run(rows)
+
+        self.assertEqual(summary["updated_courses"], 1)
+        self.assertEqual(summary["created_courses"], 1)
+        self.assertEqual(summary["created_professors"], 1)
+        self.assertEqual(summary["failed_rows"], 1)
+        self.assertEqual([row_number for row_number, _ in importer.errors], [4])
+        self.assertEqual(len(importer.preview["created_courses"]), 1)
+        self.assertEqual((Course.objects.count(), Term.objects.count(), CustomUser.objects.count()), counts)
+        self.assertEqual(Course.objects.get().room_name, "Fulton 1")
+
+    def test_import_keeps_the_course_description(self):
+        CourseImporter(mode=UPSERT).run(sheet_rows("Fall 2025", ["01"]))
+        self.assertIsNone(Course.objects.get().description)
+        Course.objects.update(description="Intro to programming")
+        CourseImporter(mode=UPSERT).run(sheet_rows("Fall 2025", ["01"]))
+        self.assertEqual(Course.objects.get().description, "Intro to programming")
+
+
+class TermTests(TestCase):
+
+    def test_partial_course_save_skips_term_lookup(self):
+        course = Course.objects.get(pk=create_course().pk)
+        course.status = False
+        with CaptureQueriesContext(connection) as queries:
+            course.save(update_fields=['status'])
+        self.assertFalse([q for q in queries if 'courses_term' in q['sql']])
+
+        course.term = "Spring 2026"
+        course.save(update_fields=['term'])
+        course.refresh_from_db()
+        self.assertEqual(course.academic_term.name, "Spring 2026")
+
+    def test_rename_recomputes_sort_key(self):
+        term = Term.objects.create(name="Fall 2025")
+        self.assertEqual(term.sort_key, 20254)
+        term.name = "Spring 2026"
+        term.save(update_fields=['name'])
+        term.refresh_from_db()
+        self.assertEqual((term.key, term.sort_key), ("spring 2026", 20262))
+
+
+class CourseSearchIndexTests(TestCase):
+    def test_only_saves_of_indexed_columns_reindex(self):
+        course = create_course()
+        course.status = False
+        with CaptureQueriesContext(connection) as queries:
+            course.save(update_fields=['status'])
+        self.assertFalse([q for q in queries if 'courses_course_fts' in q['sql']])
+
+        course.course_title = "Data Structures"
+        course.save(update_fields=['course_title'])
+        self.assertEqual(list(get_search_backend().search(Course.objects.all(), "struct")), [course])
+
+
+class StaffingCounterTests(TestCase):
+    def setUp(self):
+        self.courses = [create_course() for _ in range(2)]
+        self.users = [
+            CustomUser.objects.create_user(email=f'student{i}@bc.edu', password='x') for i in range(3)]
+
+    def counters(self, course):
+        course.refresh_from_db(fields=['filled_ta_slots', 'pending_offers'])
+        return course.filled_ta_slots, course.pending_offers
+
+    def test_ta_changes_in_either_direction(self):
+        first, second = self.courses
+        first.current_tas.add(*self.users)
+        first.current_tas.add(self.users[0])  # already a TA
+        self.users[0].course_working_for.add(second)
+        self.assertEqual(self.counters(first), (3, 0))
+        self.assertEqual(self.counters(second), (1, 0))
+
+        first.current_tas.remove(self.users[1], self.users[1])
+        self.users[0].course_working_for.set([second])
+        self.assertEqual(self.counters(first), (1, 0))
+        first.current_tas.clear()
+        self.users[2].delete()
+        self.assertEqual(self.counters(first), (0, 0))
+        self.assertEqual(self.counters(second), (1, 0))
+        self.assertEqual(reconcile_staffing(), 0)
+
+    def test_pending_offers_and_reconcile(self):
+        course = self.courses[0]
+        professor = CustomUser.objects.create_user(email='prof@bc.edu', password='x', professor=True)
+        offers = [
+            Offer.objects.create(
+                application=Application.objects.create(student=student, course=course),
+                course=course, recipient=student, sender=professor)
+            for student in self.users
+        ]
+        self.assertEqual(self.counters(course), (0, 3))
+        offers[0].status = OfferStatus.REJECTED.value
+        offers[0].save()
+        offers[1].delete()
+        self.assertEqual(self.counters(course), (0, 1))
+
+        # A full save writes back the stored counters, not its stale copy
+        stale = Course.objects.get(pk=course.pk)
+        course.current_tas.add(self.users[0])
+        stale.save()
+        self.assertEqual(self.counters(course), (1, 1))
+
+        Course.objects.filter(pk=course.pk).update(filled_ta_slots=5, pending_offers=0)
+        self.assertEqual(reconcile_staffing(dry_run=True), 1)
+        self.assertEqual(reconcile_staffing(), 1)
+        self.assertEqual(self.counters(course), (1, 1))
+
+    def test_full_save_of_a_deleted_course_inserts_it(self):
+        course = self.courses[0]
+        Course.objects.filter(pk=course.pk).delete()
+        course.save()
+        self.assertTrue(Course.objects.filter(pk=course.pk).exists())
+
+
+def sheet_upload(rows):
+    workbook = Workbook()
+    for row in rows:
+        workbook.active.append(row)
+    data = BytesIO()
+    workbook.save(data)
+    return SimpleUploadedFile('Fall schedule.xlsx', data.getvalue())
+
+
+class UploadJobTests(TestCase):
+    def test_sheet_storage_is_outside_media_root(self):
+        location = os.path.abspath(upload_job_storage().location)
+        self.assertEqual(location, os.path.abspath(settings.UPLOAD_JOB_DIR))
+        self.assertFalse(location.startswith(os.path.abspath(settings.MEDIA_ROOT) + os.sep))
+
+    def setUp(self):
+        # Keep test sheets out of the real UPLOAD_JOB_DIR
+        field = CourseUploadJob._meta.get_field('excel_file')
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.addCleanup(setattr, field, 'storage', field.storage)
+        field.storage = FileSystemStorage(location=directory)
+
+    def test_sheet_is_deleted_when_done(self):
+        job = CourseUploadJob.objects.create(excel_file=sheet_upload(sheet_rows("Fall 2025", ["01", "02"])))
+        path = job.excel_file.path
+        self.assertEqual(os.path.basename(path), f'{job.id}.xlsx')
+
+        job = run_job(claim_next_job())
+        self.assertEqual(job.status, UploadJobStatus.SUCCEEDED.value)
+        self.assertEqual(Course.objects.count(), 2)
+        self.assertFalse(os.path.exists(path))
+        job.refresh_from_db()
+        self.assertFalse(job.excel_file)
+
+    def test_stale_running_jobs_are_reclaimed(self):
+        stale = timezone.now() - timedelta(seconds=STALE_JOB_SECONDS + 1)
+        upsert = CourseUploadJob.objects.create(
+            excel_file=sheet_upload(sheet_rows("Fall 2025", ["01"])), mode=UPSERT,
+            status=UploadJobStatus.RUNNING.value, heartbeat_at=stale)
+        append = CourseUploadJob.objects.create(
+            excel_file=sheet_upload(sheet_rows("Fall 2025", ["02"])), mode=APPEND,
+            status=UploadJobStatus.RUNNING.value, heartbeat_at=stale)
+        live = CourseUploadJob.objects.create(
+            excel_file=sheet_upload(sheet_rows("Fall 2025", ["03"])), mode=UPSERT,
+            status=UploadJobStatus.RUNNING.value, heartbeat_at=timezone.now())
 
-# Create your tests here.
+        claimed = claim_next_job()
+        self.assertEqual(claimed.pk, upsert.pk)
+        self.assertEqual(claimed.status, UploadJobStatus.RUNNING.value)
+        self.assertIsNone(claim_next_job())
+        append.refresh_from_db()
+        self.assertEqual(append.status, UploadJobStatus.FAILED.value)
+        self.assertFalse(append.excel_file)
+        self.assertEqual(len(os.listdir(os.path.dirname(claimed.excel_file.path))), 2)
+        live.refresh_from_db()
+        self.assertEqual(live.status, UploadJobStatus.RUNNING.value)
@@ -2,14 +2,10 @@ from django.views import View
 from django.shortcuts import render, redirect
 from .models import Course
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
-from openpyxl import load_workbook
 from users.models import CustomUser as User
-from random import randint
 from django.views.generic import ListView, DetailView
 from django.contrib import messages
-from users.instructor_data import instructors
-
-from random import randint
+from .importer import APPEND, CourseImporter, iter_sheet_rows
 
 
 class UploadView(LoginRequiredMixin, UserPassesTestMixin, View):
@@ -23,86 +19,9 @@ class UploadView(LoginRequiredMixin, UserPassesTestMixin, View):
         messages.success(self.request, "Successfully Uploaded Excel File")
         return render(request, "upload.html")
 
-    def process_excel_file(self, excel_file):
-        workbook = load_workbook(excel_file)
-        sheet = workbook.active
-
-        for row in sheet.iter_rows(values_only=True):
-            if not row[0] or row[0] == "Term":
-                continue
-            instructor = self.get_or_create_instructor(row)
-            self.create_course(row, instructor)
-
-    def get_email(self, first_name, last_name):
-        return (
-            f"{first_name}.{last_name}@bc.edu"
-            if f"{last_name}, {first_name}" not in instructors
-            else instructors[f"{last_name}, {first_name}"]["Short Email"]
-        )
-
-    def get_or_create_instructor(self, row):
-        try:
-            instructor_first_name = row[5].split(",")[1].strip()
-            instructor_last_name = row[5].split(",")[0].strip()
-        except:
-            instructor_first_name = row[5]
-            instructor_last_name = ""
-
-        email = self.get_email(instructor_first_name, instructor_last_name)
-
-        instructor, created = User.objects.get_or_create(
-            email=email,
-            defaults={
-                "professor": True,
-                "eagleid": self.generate_eagleid(),
-                "first_name": instructor_first_name,
-                "last_name": instructor_last_name,
-            },
-        )
-
-        if created:
-            instructor.set_password("password")
-            instructor.save()
-
-        return instructor
-
-    def create_course(self, row, instructor):
-        excluded_lectures = [
-            "Computer Science I",
-            "Computer Science II",
-            "Computer Organization and Lab",
-        ]
-
-        if row[4] in excluded_lectures and row[1] == "Lecture":
-            return
-
-        num_tas = 1 if row[1] == "Discussion" or row[1] == "Lab" else int(row[8]) // 20
-
-        num_tas = 1 if num_tas == 0 else num_tas
-
-        new_class = Course.objects.create(
-            term=row[0],
-            class_type=row[1],
-            course=row[2],
-            section=row[3],
-            course_title=row[4],
-            instructor_first_name=instructor.first_name,
-            instructor_last_name=instructor.last_name,
-            room_name=row[6],
-            timeslot=row[7],
-            max_enroll=row[8],
-            room_size=row[9],
-            num_tas=num_tas,
-            description=row[4],  # TODO: Add description
-            professor=instructor,
-        )
-        instructor.courses.add(new_class)
-
-    def generate_eagleid(self):
-        eagleid = randint(10000000, 99999999)
-        while User.objects.filter(eagleid=eagleid).exists():
-            eagleid = randint(10000000, 99999999)
-        return eagleid
+    def process_excel_file(self, excel_file, mode=APPEND, delete_missing=False):
+        importer = CourseImporter(mode=mode, delete_missing=delete_missing)
+        return importer.run(iter_sheet_rows(excel_file))
 
     def test_func(self):
         return self.request.user.is_authenticated and self.request.user.is_superuser
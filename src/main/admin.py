@@ -1,3 +1,9 @@
 from django.contrib import admin
+from .models import OutgoingEmail
 
-# Register your models here.
+
+@admin.register(OutgoingEmail)
+class OutgoingEmailAdmin(admin.ModelAdmin):
+    list_display = ('subject', 'status', 'attempts', 'created_at', 'sent_at')
+    list_filter = ('status',)
+    search_fields = ('subject',)
@@ -0,0 +1,126 @@
+"""
+Reference counts for BlobStorage (main.storage).
+
+StoredBlob.ref_count is how many of the BLOB_FIELDS currently hold a blob. The
+receivers in main.signals keep it current from model saves and deletes: each
+instance remembers the digests it was loaded with, and a save that changes a
+field retains the new blob and releases the old one. queryset.update() and raw
+SQL bypass them; reconcile_blob_refs() recounts from the rows.
+
+collect_blobs() deletes the files no row references. Only files untouched for
+COLLECT_GRACE go: an upload is stored before the row that references it is
+saved, and re-uploading an existing blob refreshes its mtime.
+"""
+import os
+import time
+from collections import Counter
+from datetime import timedelta
+
+from django.db.models import F
+
+from applications.models import Application
+from users.models import StudentProfile
+from .models import StoredBlob
+from .storage import BLOB_DIR, blob_digest, blob_path, blob_storage
+
+BLOB_FIELDS = {
+    StudentProfile: ['resume', 'cv', 'profile_photo'],
+    Application: ['resume'],
+}
+
+COLLECT_GRACE = timedelta(hours=6)
+
+
+def loaded_digests(instance):
+    """{field: digest} for the blob fields loaded on `instance` (raw values, so no FieldFiles are built)."""
+    digests = {}
+    for field in BLOB_FIELDS[type(instance)]:
+        if field in instance.__dict__:
+            value = instance.__dict__[field]
+            digests[field] = blob_digest(getattr(value, 'name', value))
+    return digests
+
+
+def retain(digests):
+    counts = Counter(digest for digest in digests if digest)
+    if not counts:
+        return
+    known = set(StoredBlob.objects.filter(pk__in=counts).values_list('pk', flat=True))
+    StoredBlob.objects.bulk_create(
+        [StoredBlob(digest=digest, size=_blob_size(digest)) for digest in counts if digest not in known],
+        ignore_conflicts=True,
+    )
+    for digest, n in counts.items():
+        StoredBlob.objects.filter(pk=digest).update(ref_count=F('ref_count') + n)
+
+
+def release(digests):
+    counts = Counter(digest for digest in digests if digest)
+    for digest, n in counts.items():
+        StoredBlob.objects.filter(pk=digest).update(ref_count=F('ref_count') - n)
+
+
+def _blob_size(digest):
+    try:
+        return blob_storage.size(blob_path(digest))
+    except OSError:
+        return 0
+
+
+def count_references():
+    """Counter of digest -> references, counted from the rows."""
+    counts = Counter()
+    for model, fields in BLOB_FIELDS.items():
+        for names in model.objects.values_list(*fields).iterator():
+            counts.update(digest for digest in map(blob_digest, names) if digest)
+    return counts
+
+
+def reconcile_blob_refs(dry_run=False):
+    """Recount ref_count where it disagrees with the rows; returns how many blobs had drifted."""
+    actual = count_references()
+    recorded = dict(StoredBlob.objects.values_list('digest', 'ref_count'))
+    drifted = {
+        digest: actual.get(digest, 0)
+        for digest in set(actual) | set(recorded)
+        if actual.get(digest, 0) != recorded.get(digest)
+    }
+    if not dry_run:
+        StoredBlob.objects.bulk_create(
+            [StoredBlob(digest=digest, size=_blob_size(digest)) for digest in drifted if digest not in recorded],
+            ignore_conflicts=True,
+        )
+        for digest, count in drifted.items():
+            StoredBlob.objects.filter(pk=digest).update(ref_count=count)
+    return len(drifted)
+
+
+def collect_blobs(dry_run=False, grace=COLLECT_GRACE):
+    """Delete unreferenced blob files older than `grace`; returns (files removed, bytes freed)."""
+    referenced = set(StoredBlob.objects.filter(ref_count__gt=0).values_list('digest', flat=True))
+    cutoff = time.time() - grace.total_seconds()
+    removed = freed = 0
+    root = blob_storage.path(BLOB_DIR)
+    for directory, _, filenames in os.walk(root):
+        for filename in filenames:
+            # Unfinished uploads are <digest>.<token>.part
+            digest = filename.split('.', 1)[0]
+            path = os.path.join(directory, filename)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            if (digest in referenced and '.' not in filename) or stat.st_mtime > cutoff:
+                continue
+            if not dry_run:
+                if '.' in filename:
+                    os.remove(path)
+                else:
+                    # Conditional, in case a save referenced the blob since `referenced` was read
+                    StoredBlob.objects.filter(pk=digest, ref_count__lte=0).delete()
+                    if StoredBlob.objects.filter(pk=digest).exists():
+                        continue
+                    blob_storage.delete_blob(digest)
+            removed += 1
+            freed += stat.st_size
+    return removed, freed
@@ -0,0 +1,220 @@
+import csv
+import hashlib
+import json
+import os
+import shutil
+import uuid
+from tempfile import NamedTemporaryFile, TemporaryFile
+
+from django.conf import settings
+from django.db import transaction
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font
+from openpyxl.utils import get_column_letter
+
+from courses.models import Term
+
+SCHEDULE_HEADERS = [
+    'Term', 'Type', 'Course', 'Section', 'Course Title', 'Instructors', 'RoomName', 'TimeSlot',
+    'Max Enroll', 'RoomSize',
+    'Instructor Email', 'TAs Assigned', 'TAs Total', 'TA Names',
+]
+
+XLSX_CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+# Column widths in characters, in SCHEDULE_HEADERS order
+SCHEDULE_COLUMN_WIDTHS = [12, 10, 12, 9, 40, 28, 16, 18, 12, 10, 30, 14, 11, 50]
+
+# Courses fetched per round trip while exporting
+EXPORT_CHUNK_SIZE = 500
+
+
+def schedule_row(course):
+    """One export row for a course (expects professor selected and current_tas prefetched)."""
+    instructors_str = f"{course.instructor_last_name}, {course.instructor_first_name}" if (course.instructor_last_name or course.instructor_first_name) else (course.professor.get_full_name() if course.professor else '')
+    if not instructors_str and course.professor:
+        instructors_str = course.professor.get_full_name() or course.professor.email or ''
+    tas = course.current_tas.all()
+    ta_names = ', '.join(
+        (ta.get_full_name() or ta.email or str(ta))
+        for ta in tas
+    )
+    instructor_email = (course.professor.email or '') if course.professor else ''
+    return (
+        course.term,
+        course.class_type,
+        course.course,
+        course.section,
+        course.course_title,
+        instructors_str,
+        course.room_name,
+        course.timeslot,
+        course.max_enroll,
+        course.room_size,
+        instructor_email,
+        len(tas),
+        course.num_tas,
+        ta_names,
+    )
+
+
+def write_schedule_xlsx(courses):
+    """
+    Write the schedule sheet for `courses` and return it as an open temporary file.
+
+    The workbook is write-only, so openpyxl streams rows to disk instead of
+    building a cell object per value, and rows go to the sheet as they are
+    read from the queryset. Write-only sheets emit column widths before the
+    first row, so the widths are fixed per column (SCHEDULE_COLUMN_WIDTHS).
+    """
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet('Schedule')
+    for idx, width in enumerate(SCHEDULE_COLUMN_WIDTHS, 1):
+        ws.column_dimensions[get_column_letter(idx)].width = width
+    header = []
+    for title in SCHEDULE_HEADERS:
+        cell = WriteOnlyCell(ws, value=title)
+        cell.font = Font(bold=True)
+        header.append(cell)
+    ws.append(header)
+    for course in courses.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        ws.append(schedule_row(course))
+
+    output = TemporaryFile()
+    wb.save(output)
+    output.seek(0)
+    return output
+
+
+GENERATION_FILE = '.generation'
+
+
+def _term_dir(term):
+    # Keyed like the course filter, so every spelling of a term shares one directory
+    term_key = hashlib.sha1(Term.key_for(term).encode()).hexdigest()
+    return os.path.join(settings.EXPORT_CACHE_DIR, 'schedule', term_key)
+
+
+def cached_schedule_xlsx(term, filter_key, build_queryset):
+    """
+    Return an open file with the schedule export for `term` and a filter set.
+
+    `filter_key` is the CourseFilterSpec cache key of the export's filters.
+    Exports are stored under EXPORT_CACHE_DIR/schedule/<term>/<filter key>.xlsx
+    and served straight from disk until invalidate_schedule_exports() drops the
+    term's directory. `build_queryset` is only called on a miss. Each term
+    directory carries a generation token; a build that raced an invalidation
+    is served once but not published.
+    """
+    term_dir = _term_dir(term)
+    path = os.path.join(term_dir, f"{hashlib.sha1(filter_key.encode()).hexdigest()}.xlsx")
+    try:
+        return open(path, 'rb')
+    except FileNotFoundError:
+        pass
+
+    os.makedirs(term_dir, exist_ok=True)
+    generation = _read_generation(term_dir)
+    if generation is None:
+        generation = uuid.uuid4().hex
+        with open(os.path.join(term_dir, GENERATION_FILE), 'w') as f:
+            f.write(generation)
+
+    output = write_schedule_xlsx(build_queryset())
+    with NamedTemporaryFile(dir=term_dir, suffix='.tmp', delete=False) as tmp:
+        shutil.copyfileobj(output, tmp)
+    if _read_generation(term_dir) == generation:
+        os.replace(tmp.name, path)
+    else:
+        os.remove(tmp.name)
+    output.seek(0)
+    return output
+
+
+def _read_generation(term_dir):
+    try:
+        with open(os.path.join(term_dir, GENERATION_FILE)) as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+def invalidate_schedule_exports(terms=None):
+    """Drop cached schedule exports for `terms` (an iterable of term names), or for every term."""
+    if terms is None:
+        shutil.rmtree(os.path.join(settings.EXPORT_CACHE_DIR, 'schedule'), ignore_errors=True)
+        return
+    for term in set(terms):
+        shutil.rmtree(_term_dir(term), ignore_errors=True)
+
+
+def invalidate_schedule_exports_on_commit(terms=None):
+    """
+    invalidate_schedule_exports() once the current transaction commits, so an
+    export requested in between cannot re-cache the pre-write rows.
+    """
+    # Read the terms now: a queryset evaluated after commit would see the new rows
+    terms = set(terms) if terms is not None else None
+    transaction.on_commit(lambda: invalidate_schedule_exports(terms))
+
+
+class _Echo:
+    """File-like object whose write() hands the value back, so csv.writer can feed a generator."""
+
+    def write(self, value):
+        return value
+
+
+def stream_csv(header, rows):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(header)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def stream_ndjson(header, rows):
+    for row in rows:
+        yield json.dumps(dict(zip(header, row)), default=str) + '\n'
+
+
+# format -> (content type, generator of encoded lines)
+STREAM_FORMATS = {
+    'csv': ('text/csv', stream_csv),
+    'ndjson': ('application/x-ndjson', stream_ndjson),
+}
+
+COURSE_EXPORT_FIELDS = [
+    'id', 'term', 'class_type', 'course', 'section', 'course_title',
+    'instructor_first_name', 'instructor_last_name', 'professor__email',
+    'room_name', 'timeslot', 'max_enroll', 'room_size', 'num_tas', 'tas_count',
+    'status', 'is_active',
+]
+
+APPLICATION_EXPORT_FIELDS = [
+    'id', 'status', 'student__email', 'student__first_name', 'student__last_name',
+    'course__term', 'course__course', 'course__section', 'course__class_type', 'course__course_title',
+    'why_this_course', 'relevant_experience', 'other_notes', 'withdrawal_reason',
+]
+
+OFFER_EXPORT_FIELDS = [
+    'id', 'status', 'created_at', 'recipient__email', 'recipient__first_name', 'recipient__last_name',
+    'sender__email', 'course__term', 'course__course', 'course__section', 'course__class_type',
+    'course__course_title', 'application_id',
+]
+
+
+def export_rows(queryset, fields, status_enum=None):
+    """
+    Yield `fields` value tuples from `queryset` without building model instances.
+
+    Rows are read with a server-side cursor in EXPORT_CHUNK_SIZE batches, so
+    memory stays flat however many rows are exported. Integer status columns
+    are written as their enum names when `status_enum` is given.
+    """
+    status_index = fields.index('status') if status_enum else None
+    for row in queryset.values_list(*fields).iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        if status_index is not None:
+            row = list(row)
+            row[status_index] = status_enum(row[status_index]).name
+        yield row
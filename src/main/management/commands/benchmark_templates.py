@@ -0,0 +1,73 @@
+import os
+import time
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand
+from django.template import Context, Engine, engines
+from django.test import RequestFactory
+
+SAMPLE_MESSAGE_LINES = [
+    "Dear Professor Example,",
+    "A Student has accepted your TA offer for CSCI1101 — Computer Science 1.",
+    "They are now assigned as a TA for this course.",
+]
+
+
+def page_template_names(directory):
+    """Every template under the project templates directory, as get_template() names."""
+    names = []
+    for root, _, files in os.walk(directory):
+        for filename in files:
+            if filename.endswith(".html"):
+                names.append(os.path.relpath(os.path.join(root, filename), directory))
+    return sorted(names)
+
+
+class Command(BaseCommand):
+    help = (
+        "Time template compiling and rendering in the dev configuration (template debug on) "
+        "and the prod one (debug off). Both use the project's loaders, which Django caches."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=200)
+
+    def handle(self, *args, **options):
+        iterations = options["iterations"]
+        project = engines["django"].engine
+        names = page_template_names(project.dirs[0])
+        request = RequestFactory().get("/")
+        request.user = AnonymousUser()
+        page_context = {"request": request, "user": request.user, "messages": []}
+        email_context = {"message_lines": SAMPLE_MESSAGE_LINES}
+
+        self.stdout.write(f"{len(names)} templates, {iterations} iterations")
+        for config, debug in (("dev", True), ("prod", False)):
+            def new_engine():
+                # The project engine's settings; only template debug differs
+                return Engine(
+                    dirs=project.dirs, app_dirs=project.app_dirs, libraries=project.libraries,
+                    builtins=project.builtins, debug=debug,
+                )
+
+            # A fresh engine per pass, like the first requests after a restart
+            compile_all = self.measure(
+                iterations, lambda: [new_engine().get_template(name) for name in names], warm_up=False)
+            engine = new_engine()
+            page = self.measure(iterations, lambda: engine.get_template("base.html").render(Context(page_context)))
+            email = self.measure(
+                iterations, lambda: engine.get_template("notification_email.html").render(Context(email_context)))
+            self.stdout.write(
+                f"{config:>4} (debug {'on' if debug else 'off'}): compile all templates {compile_all * 1000:.2f} ms, "
+                f"render base.html {page * 1000:.3f} ms, "
+                f"render notification email {email * 1000:.3f} ms"
+            )
+        self.stdout.write(f"Template debug is {'on' if project.debug else 'off'} in these settings")
+
+    def measure(self, iterations, func, warm_up=True):
+        if warm_up:
+            func()  # fills the cached loader
+        started = time.perf_counter()
+        for _ in range(iterations):
+            func()
+        return (time.perf_counter() - started) / iterations
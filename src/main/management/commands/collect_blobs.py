@@ -0,0 +1,34 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.template.defaultfilters import filesizeformat
+
+from main.blobs import COLLECT_GRACE, collect_blobs, reconcile_blob_refs
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete stored resume/CV/photo blobs that no profile or application references any more. "
+        "Run it off-peak (e.g. nightly from cron)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help="Report what would be removed without removing it.")
+        parser.add_argument(
+            '--reconcile', action='store_true',
+            help="Recount blob references from the rows first (after raw SQL, restores or queryset.update()).",
+        )
+        parser.add_argument(
+            '--grace-hours', type=float, default=COLLECT_GRACE.total_seconds() / 3600,
+            help="Keep unreferenced blobs written or reused within this many hours.",
+        )
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+        if options['reconcile']:
+            drifted = reconcile_blob_refs(dry_run=dry_run)
+            self.stdout.write(f"{drifted} blobs {'have' if dry_run else 'had'} drifted reference counts.")
+        removed, freed = collect_blobs(dry_run=dry_run, grace=timedelta(hours=options['grace_hours']))
+        self.stdout.write(
+            f"{'Would remove' if dry_run else 'Removed'} {removed} unreferenced blobs ({filesizeformat(freed)})."
+        )
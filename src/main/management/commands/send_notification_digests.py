@@ -0,0 +1,44 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from main.outbox import DEFAULT_BATCH_SIZE, build_digests, claim_due_emails, deliver_batch
+
+
+class Command(BaseCommand):
+    help = (
+        "Fold pending notifications into one summary email per user on an hourly or daily digest "
+        "and send them. Schedule it (e.g. every 15 minutes from cron), or keep it running with "
+        "--interval; users only get a digest once their interval has passed."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--queue-only", action="store_true",
+            help="Leave the digests in the outbox for send_queued_emails instead of sending them now.")
+        parser.add_argument(
+            "--batch-size", type=int, default=DEFAULT_BATCH_SIZE,
+            help="Emails sent over one SMTP connection.")
+        parser.add_argument("--throttle", type=float, default=0.0, help="Seconds to wait between messages.")
+        parser.add_argument(
+            "--interval", type=float, default=0.0,
+            help="Keep running, building digests every this many seconds (default: once and exit).")
+
+    def handle(self, *args, **options):
+        while True:
+            self.send_digests(options)
+            if not options["interval"]:
+                return
+            time.sleep(options["interval"])
+
+    def send_digests(self, options):
+        emails = build_digests()
+        self.stdout.write(f"Queued {len(emails)} digest emails.")
+        if options["queue_only"] or not emails:
+            return
+        ids = [email.pk for email in emails]
+        sent = 0
+        for start in range(0, len(ids), options["batch_size"]):
+            batch = claim_due_emails(limit=options["batch_size"], ids=ids[start:start + options["batch_size"]])
+            sent += sum(1 for _, ok in deliver_batch(batch, throttle=options["throttle"]) if ok)
+        self.stdout.write(f"Sent {sent} of {len(emails)} digest emails.")
@@ -0,0 +1,33 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from main.outbox import DEFAULT_BATCH_SIZE, claim_due_emails, deliver_batch
+
+
+class Command(BaseCommand):
+    help = "Worker that delivers queued notification emails from the outbox, retrying failures with backoff."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true", help="Send the emails that are due once and exit.")
+        parser.add_argument("--interval", type=float, default=5.0, help="Seconds to sleep when nothing is due.")
+        parser.add_argument(
+            "--batch-size", type=int, default=DEFAULT_BATCH_SIZE,
+            help="Emails claimed and sent over one SMTP connection.")
+        parser.add_argument("--throttle", type=float, default=0.0, help="Seconds to wait between messages.")
+
+    def handle(self, *args, **options):
+        while True:
+            emails = claim_due_emails(limit=options["batch_size"])
+            if not emails:
+                if options["once"]:
+                    return
+                time.sleep(options["interval"])
+                continue
+            results = deliver_batch(emails, throttle=options["throttle"])
+            if options["verbosity"] > 1:
+                for email, sent in results:
+                    outcome = "sent" if sent else f"{email.get_status().lower()}: {email.last_error}"
+                    self.stdout.write(f"  {email.pk} to {', '.join(email.recipients)}: {outcome}")
+            sent = sum(1 for _, ok in results if ok)
+            self.stdout.write(f"Sent {sent} of {len(results)} emails in this batch.")
@@ -1,3 +1,82 @@
 from django.db import models
+from django.db.models import Q
+from django.utils import timezone
+from enum import Enum
+import uuid
 
-# Create your models here.
+
+class EmailStatus(Enum):
+    '''
+    Enum for the status of an outbox email
+    QUEUED - Waiting for the outbox worker (manage.py send_queued_emails) until next_attempt_at
+    SENDING - Claimed by a worker; claimable again once next_attempt_at passes (worker died)
+    SENT - Accepted by the mail server
+    FAILED - Gave up after MAX_SEND_ATTEMPTS; last_error says why
+    '''
+    QUEUED = 1
+    SENDING = 2
+    SENT = 3
+    FAILED = 4
+
+
+class OutgoingEmail(models.Model):
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    subject = models.CharField(max_length=255)
+    from_email = models.CharField(max_length=254)
+    recipients = models.JSONField(default=list)
+    text_body = models.TextField()
+    html_body = models.TextField(blank=True)
+
+    status = models.IntegerField(choices=[(
+        tag.value, tag.name) for tag in EmailStatus], default=EmailStatus.QUEUED.value)
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    claim_token = models.UUIDField(null=True, blank=True, editable=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='outbox_due_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} to {', '.join(self.recipients)} ({self.get_status()})"
+
+    def get_status(self):
+        return EmailStatus(self.status).name
+
+
+class NotificationEvent(models.Model):
+    """A notification held for a user's next digest email (see DigestFrequency)."""
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    recipient = models.ForeignKey(
+        'users.CustomUser', on_delete=models.CASCADE, related_name='notification_events')
+    subject = models.CharField(max_length=255)
+    message_lines = models.JSONField(default=list)
+    created_at = models.DateTimeField(auto_now_add=True)
+    # The digest that carried this event; null while pending
+    email = models.ForeignKey(
+        OutgoingEmail, on_delete=models.CASCADE, related_name='events', null=True, blank=True)
+
+    class Meta:
+        ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['created_at'], condition=Q(email__isnull=True), name='pending_notification_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} for {self.recipient}"
+
+
+class StoredBlob(models.Model):
+    """A file in BlobStorage and how many FileFields reference it (see main.blobs)."""
+    digest = models.CharField(primary_key=True, max_length=64)
+    size = models.BigIntegerField(default=0)
+    ref_count = models.IntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.digest[:12]} ({self.ref_count} references)"
@@ -0,0 +1,244 @@
+"""
+Transactional email outbox.
+
+Views used to send notification emails over SMTP while the user waited, so a
+slow mail server slowed every click. queue_notification_email() now only
+writes an OutgoingEmail row. Called inside the view's transaction, the email
+is queued if and only if the change it announces is committed. The worker
+(manage.py send_queued_emails) claims due rows and delivers them. Failed
+sends are retried with exponential backoff until MAX_SEND_ATTEMPTS.
+
+The worker delivers claimed emails in batches over one SMTP connection (see
+deliver_batch()), so a bulk action costs one TLS handshake per batch rather
+than one per email.
+
+notify() honours the recipient's DigestFrequency: users on a digest get a
+NotificationEvent instead of an email, and build_digests() (run by manage.py
+send_notification_digests) folds each user's pending events into one summary.
+"""
+import logging
+import random
+import time
+import uuid
+from datetime import timedelta
+from itertools import groupby
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import transaction
+from django.db.models import Q
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from users.models import DigestFrequency
+from .models import EmailStatus, NotificationEvent, OutgoingEmail
+
+logger = logging.getLogger(__name__)
+
+MAX_SEND_ATTEMPTS = 8
+
+# Retry n waits RETRY_BASE_SECONDS * 2**(n-1), capped, plus up to 10% jitter
+RETRY_BASE_SECONDS = 60
+RETRY_MAX_SECONDS = 6 * 60 * 60
+
+# A claimed email is handed to another worker if not finished within this time
+CLAIM_TIMEOUT_SECONDS = 10 * 60
+
+# Emails claimed and sent over one connection
+DEFAULT_BATCH_SIZE = 100
+
+# A digest goes out once a user's oldest pending event is this old
+DIGEST_INTERVALS = {
+    DigestFrequency.HOURLY.value: timedelta(hours=1),
+    DigestFrequency.DAILY.value: timedelta(days=1),
+}
+
+
+def queue_notification_email(subject, recipients, message_lines):
+    """
+    Queue an HTML notification email for the outbox worker.
+
+    Args:
+        subject: Email subject line.
+        recipients: A single email string or list of email strings.
+        message_lines: List of strings, each rendered as a paragraph.
+    """
+    if not recipients:
+        return None
+
+    if isinstance(recipients, str):
+        recipients = [recipients]
+
+    return OutgoingEmail.objects.create(
+        subject=subject,
+        from_email=settings.DEFAULT_FROM_EMAIL or settings.EMAIL_HOST_USER,
+        recipients=recipients,
+        text_body="\n\n".join(message_lines),
+        html_body=render_to_string("notification_email.html", {"message_lines": message_lines}),
+    )
+
+
+def notify(user, subject, message_lines):
+    """Email `user` now, or hold the notification for their digest if they chose one."""
+    if not user.email:
+        return
+    if user.notification_digest == DigestFrequency.IMMEDIATE.value:
+        queue_notification_email(subject, user.email, message_lines)
+    else:
+        NotificationEvent.objects.create(recipient=user, subject=subject, message_lines=message_lines)
+
+
+def build_digests():
+    """
+    Queue one summary email per user with a digest due; returns the queued emails.
+
+    A digest is due when the user's oldest pending event is a full interval
+    old, or straight away if they have since switched back to IMMEDIATE. Each
+    user's events are marked with a conditional UPDATE in the same transaction
+    that queues the summary, so two builders never send the same event twice.
+    """
+    now = timezone.now()
+    due = Q(recipient__notification_digest=DigestFrequency.IMMEDIATE.value)
+    for frequency, interval in DIGEST_INTERVALS.items():
+        due |= Q(recipient__notification_digest=frequency, created_at__lte=now - interval)
+    pending = NotificationEvent.objects.filter(email__isnull=True)
+    recipient_ids = set(pending.filter(due).values_list('recipient_id', flat=True))
+    events = (
+        pending.filter(recipient_id__in=recipient_ids)
+        .select_related('recipient')
+        .order_by('recipient_id', 'created_at')
+    )
+    emails = []
+    for recipient, group in groupby(events, key=lambda event: event.recipient):
+        group = list(group)
+        with transaction.atomic():
+            email = queue_digest_email(recipient, group)
+            claimed = NotificationEvent.objects.filter(
+                pk__in=[event.pk for event in group], email__isnull=True,
+            ).update(email=email)
+            if claimed != len(group):
+                # Another builder got some of these events first
+                transaction.set_rollback(True)
+                continue
+        emails.append(email)
+    return emails
+
+
+def queue_digest_email(recipient, events):
+    """Queue the summary of `events` (oldest first) for `recipient`."""
+    if len(events) == 1:
+        subject = events[0].subject
+    else:
+        subject = f"TA Buzz: {len(events)} updates"
+    return OutgoingEmail.objects.create(
+        subject=subject,
+        from_email=settings.DEFAULT_FROM_EMAIL or settings.EMAIL_HOST_USER,
+        recipients=[recipient.email],
+        text_body="\n\n".join("\n\n".join([event.subject] + event.message_lines) for event in events),
+        html_body=render_to_string("notification_digest_email.html", {"events": events}),
+    )
+
+
+def retry_delay(attempts):
+    """Seconds to wait before retrying an email that has failed `attempts` times."""
+    delay = min(RETRY_BASE_SECONDS * 2 ** (attempts - 1), RETRY_MAX_SECONDS)
+    return delay + random.uniform(0, delay / 10)
+
+
+def claim_due_emails(limit, ids=None):
+    """
+    Claim up to `limit` emails that are due, oldest first (only `ids` if given).
+
+    The claim is a conditional UPDATE that stamps a fresh token on rows that
+    are still due, so two workers polling at the same time never both get the
+    same email. Claimed rows are due again after CLAIM_TIMEOUT_SECONDS, which
+    hands the emails of a crashed worker to the next one.
+    """
+    now = timezone.now()
+    due = Q(status__in=[EmailStatus.QUEUED.value, EmailStatus.SENDING.value], next_attempt_at__lte=now)
+    if ids is not None:
+        due &= Q(pk__in=ids)
+    ids = list(
+        OutgoingEmail.objects.filter(due)
+        .order_by('next_attempt_at')
+        .values_list('pk', flat=True)[:limit]
+    )
+    if not ids:
+        return []
+    token = uuid.uuid4()
+    OutgoingEmail.objects.filter(due, pk__in=ids).update(
+        status=EmailStatus.SENDING.value,
+        claim_token=token,
+        next_attempt_at=now + timedelta(seconds=CLAIM_TIMEOUT_SECONDS),
+    )
+    return list(OutgoingEmail.objects.filter(claim_token=token).order_by('created_at'))
+
+
+def deliver_email(email, connection=None):
+    """
+    Send a claimed email and record the outcome; returns True when it was sent.
+
+    A failed send is queued again after retry_delay(), or marked FAILED once it
+    has been tried MAX_SEND_ATTEMPTS times.
+    """
+    message = EmailMultiAlternatives(
+        email.subject, email.text_body, email.from_email, email.recipients, connection=connection)
+    if email.html_body:
+        message.attach_alternative(email.html_body, "text/html")
+    try:
+        message.send()
+    except Exception as e:
+        return record_attempt(email, error=e)
+    return record_attempt(email)
+
+
+def record_attempt(email, error=None):
+    """Save the outcome of one delivery attempt; returns True when the email was sent."""
+    email.attempts += 1
+    email.claim_token = None
+    if error is None:
+        email.status = EmailStatus.SENT.value
+        email.sent_at = timezone.now()
+        email.last_error = ''
+        logger.info(f"Notification email sent to {email.recipients}: {email.subject}")
+    else:
+        email.last_error = str(error) or error.__class__.__name__
+        if email.attempts >= MAX_SEND_ATTEMPTS:
+            email.status = EmailStatus.FAILED.value
+            logger.error(f"Giving up on email {email.pk} to {email.recipients} after {email.attempts} attempts: {error}")
+        else:
+            email.status = EmailStatus.QUEUED.value
+            email.next_attempt_at = timezone.now() + timedelta(seconds=retry_delay(email.attempts))
+            logger.warning(f"Email {email.pk} to {email.recipients} failed (attempt {email.attempts}), will retry: {error}")
+    email.save(update_fields=['status', 'attempts', 'claim_token', 'next_attempt_at', 'sent_at', 'last_error'])
+    return email.status == EmailStatus.SENT.value
+
+
+def deliver_batch(emails, throttle=0):
+    """
+    Send claimed emails over one reused SMTP connection; returns [(email, sent)].
+
+    `throttle` is the pause in seconds between messages, for servers that rate
+    limit. After a failed send the connection is closed and reopened for the
+    next email, rather than reusing a session in an unknown state.
+    """
+    results = []
+    connection = get_connection()
+    try:
+        for index, email in enumerate(emails):
+            if index and throttle:
+                time.sleep(throttle)
+            try:
+                # No-op while the connection is up; the backend only keeps
+                # connections open across sends when the caller opened them
+                connection.open()
+            except Exception as e:
+                results.append((email, record_attempt(email, error=e)))
+                continue
+            sent = deliver_email(email, connection=connection)
+            if not sent:
+                connection.close()
+            results.append((email, sent))
+    finally:
+        connection.close()
+    return results
@@ -0,0 +1,159 @@
+import base64
+import binascii
+import json
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import F, Q
+
+# Lists count at most this many rows; beyond it the total is shown as "N+"
+APPROXIMATE_COUNT_LIMIT = 1000
+
+
+class KeysetPage:
+    def __init__(self, object_list, start, has_next, has_previous, next_cursor, previous_cursor):
+        self.object_list = object_list
+        self.has_next = has_next
+        self.has_previous = has_previous
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+        # 1-based positions of the first/last row, for "Showing x to y"
+        self.start_index = start + 1 if object_list else 0
+        self.end_index = start + len(object_list)
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_other_pages(self):
+        return self.has_next or self.has_previous
+
+
+class KeysetPaginator:
+    """
+    Cursor pagination over a fixed sort order.
+
+    Instead of Paginator's COUNT plus OFFSET scan, each page filters on the
+    sort key values of the row it continues from ("after the last row" or
+    "before the first row"), so a deep page costs the same as the first one
+    and stays stable while rows are added. `ordering` uses order_by() names
+    (a leading "-" for descending); "pk" is appended as the tie-breaker.
+    Nullable model fields sort NULLs first (ascending) so the order is the
+    same on SQLite and PostgreSQL.
+
+    The total is approximate: counting stops at `count_limit` rows
+    (`count_is_exact` is False past it). Pass `count` when the caller already
+    knows the exact total.
+    """
+
+    def __init__(self, queryset, ordering, per_page, count=None, count_limit=APPROXIMATE_COUNT_LIMIT):
+        self.queryset = queryset
+        self.per_page = per_page
+        self.count_limit = count_limit
+        self._count = count
+        self._count_is_exact = count is not None
+        ordering = list(ordering)
+        if ordering[-1].lstrip('-') not in ('pk', 'id'):
+            ordering.append('pk')
+        self.keys = []
+        for name in ordering:
+            descending = name.startswith('-')
+            name = name.lstrip('-')
+            self.keys.append((name, descending, self._is_nullable(name)))
+
+    def _is_nullable(self, name):
+        if name == 'pk':
+            return False
+        try:
+            return self.queryset.model._meta.get_field(name).null
+        except FieldDoesNotExist:
+            # Annotations (e.g. search_rank) are never NULL here
+            return False
+
+    @property
+    def count(self):
+        if self._count is None:
+            counted = self.queryset.order_by()[:self.count_limit + 1].count()
+            self._count = min(counted, self.count_limit)
+            self._count_is_exact = counted <= self.count_limit
+        return self._count
+
+    @property
+    def count_is_exact(self):
+        self.count  # counted on first use
+        return self._count_is_exact
+
+    def order_by(self, reverse=False):
+        order = []
+        for name, descending, nullable in self.keys:
+            # NULLs sort as the lowest value in both directions
+            if descending != reverse:
+                order.append(F(name).desc(nulls_last=True) if nullable else F(name).desc())
+            else:
+                order.append(F(name).asc(nulls_first=True) if nullable else F(name).asc())
+        return order
+
+    def seek(self, values, backwards=False):
+        """Q for the rows after `values` in list order (or before them when `backwards`)."""
+        condition = Q(pk__in=[])
+        equal = Q()
+        for (name, descending, nullable), value in zip(self.keys, values):
+            # Comparing in ascending terms: "after" means greater unless the key is descending
+            greater = descending == backwards
+            if value is None:
+                step = Q(**{f'{name}__isnull': False}) if greater else Q(pk__in=[])
+                same = Q(**{f'{name}__isnull': True})
+            else:
+                step = Q(**{f'{name}__gt' if greater else f'{name}__lt': value})
+                if nullable and not greater:
+                    step |= Q(**{f'{name}__isnull': True})
+                same = Q(**{name: value})
+            condition |= equal & step
+            equal &= same
+        return condition
+
+    def get_page(self, cursor):
+        values, backwards, position = self.decode(cursor)
+        qs = self.queryset
+        if values is not None:
+            try:
+                qs = qs.filter(self.seek(values, backwards))
+            except (ValueError, ValidationError):
+                values, backwards, position = None, False, 0
+        rows = list(qs.order_by(*self.order_by(reverse=backwards))[:self.per_page + 1])
+        more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if backwards:
+            rows.reverse()
+            start = max(position - len(rows), 0)
+            has_previous, has_next = more, True
+        else:
+            start = position
+            has_previous, has_next = values is not None, more
+        return KeysetPage(
+            rows,
+            start,
+            has_next=has_next,
+            has_previous=has_previous,
+            next_cursor=self.encode(rows[-1], False, start + len(rows)) if has_next and rows else '',
+            previous_cursor=self.encode(rows[0], True, start) if has_previous and rows else '',
+        )
+
+    def encode(self, obj, backwards, position):
+        values = [getattr(obj, name) for name, _, _ in self.keys]
+        payload = json.dumps({'v': values, 'b': backwards, 'i': position}, default=str)
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+    def decode(self, cursor):
+        """(values, backwards, position) from a cursor; a missing or tampered cursor starts at the top."""
+        if not cursor:
+            return None, False, 0
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+            values, backwards, position = payload['v'], bool(payload['b']), int(payload['i'])
+        except (ValueError, KeyError, TypeError, binascii.Error):
+            return None, False, 0
+        if not isinstance(values, list) or len(values) != len(self.keys):
+            return None, False, 0
+        return values, backwards, max(position, 0)
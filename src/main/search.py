@@ -0,0 +1,179 @@
+"""
+Full-text search backends shared by the apps' search modules.
+
+Searches used to run icontains/LIKE scans, which no index can serve. Each app
+describes what it searches with a SearchIndex subclass (courses.search,
+applications.search): the model, its FTS5 table and columns, and the queryset
+filter each backend applies. A backend filters a queryset down to the rows
+containing every search word as a word prefix:
+
+- SQLiteFTSBackend keeps the index's FTS5 table in step with the indexed rows,
+  keyed by fts_rowid() of each row's primary key.
+- PostgresSearchBackend matches a tsvector served by a GIN expression index
+  created in the app's migration. The index follows every write, so there is
+  nothing to sync.
+- IContainsBackend is the old unindexed scan, for other databases.
+
+get_backend() picks the backend for the default database unless the index's
+backend setting names one.
+"""
+import re
+
+from django.conf import settings
+from django.db import connection
+
+SEARCH_WORD_RE = re.compile(r'\w+')
+
+# Rows written per statement while indexing
+INDEX_BATCH_SIZE = 500
+
+
+def search_words(q):
+    return SEARCH_WORD_RE.findall((q or '').lower())
+
+
+def fts_rowid(pk):
+    # FTS rows are keyed by the low 63 bits of the row's UUID so an entry can be
+    # replaced or deleted by rowid instead of scanning the key column
+    return pk.int & ((1 << 63) - 1)
+
+
+class SearchIndex:
+    '''
+    What one app searches. Subclasses set the model and FTS5 table and
+    implement the hooks the backends call.
+    '''
+    model = None
+    # Setting that can name a backend instead of picking one by database vendor
+    backend_setting = ''
+    # The FTS5 table: an UNINDEXED key column holding the model pk, then the searched columns
+    table = ''
+    key_column = ''
+    columns = ()
+
+    def no_match(self, queryset):
+        """The result of a search without any word."""
+        return queryset
+
+    def filter_icontains(self, queryset, words):
+        raise NotImplementedError
+
+    def filter_fts(self, queryset, query):
+        """Filter by an FTS5 MATCH query against `table`."""
+        raise NotImplementedError
+
+    def filter_tsquery(self, queryset, query):
+        """Filter by a SearchQuery against the tsvector the GIN index is built on."""
+        raise NotImplementedError
+
+    def entry(self, obj):
+        """(pk, column values) for an object passed to index(); values None only drops the entry."""
+        raise NotImplementedError
+
+    def all_objects(self):
+        """A queryset of everything rebuild() indexes, as objects entry() accepts."""
+        raise NotImplementedError
+
+
+class IContainsBackend:
+    name = 'icontains'
+
+    def __init__(self, search_index):
+        self.search_index = search_index
+
+    def search(self, queryset, q):
+        words = search_words(q)
+        if not words:
+            return self.search_index.no_match(queryset)
+        return self.filter(queryset, words)
+
+    def filter(self, queryset, words):
+        return self.search_index.filter_icontains(queryset, words)
+
+    def index(self, objects):
+        pass
+
+    def unindex(self, pks):
+        pass
+
+    def rebuild(self):
+        return 0
+
+
+class SQLiteFTSBackend(IContainsBackend):
+    name = 'sqlite_fts'
+
+    def filter(self, queryset, words):
+        return self.search_index.filter_fts(queryset, ' '.join(f'"{word}"*' for word in words))
+
+    def index(self, objects):
+        """Insert or replace the entries for `objects` (e.g. after bulk_create/bulk_update)."""
+        search_index = self.search_index
+        pk_field = search_index.model._meta.pk
+        columns = ', '.join(('rowid', search_index.key_column) + tuple(search_index.columns))
+        placeholders = ', '.join(['%s'] * (len(search_index.columns) + 2))
+        objects = list(objects)
+        for start in range(0, len(objects), INDEX_BATCH_SIZE):
+            entries = [search_index.entry(obj) for obj in objects[start:start + INDEX_BATCH_SIZE]]
+            with connection.cursor() as cursor:
+                cursor.executemany(
+                    f'DELETE FROM {search_index.table} WHERE rowid = %s',
+                    [(fts_rowid(pk),) for pk, _ in entries],
+                )
+                cursor.executemany(
+                    f'INSERT INTO {search_index.table} ({columns}) VALUES ({placeholders})',
+                    [
+                        (fts_rowid(pk), pk_field.get_db_prep_value(pk, connection), *values)
+                        for pk, values in entries if values is not None
+                    ],
+                )
+
+    def unindex(self, pks):
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f'DELETE FROM {self.search_index.table} WHERE rowid = %s',
+                [(fts_rowid(pk),) for pk in pks],
+            )
+
+    def rebuild(self):
+        """Re-index every object of the index; returns how many were indexed."""
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.search_index.table}')
+        batch = []
+        count = 0
+        for obj in self.search_index.all_objects().iterator(chunk_size=INDEX_BATCH_SIZE):
+            batch.append(obj)
+            if len(batch) >= INDEX_BATCH_SIZE:
+                self.index(batch)
+                count += len(batch)
+                batch = []
+        self.index(batch)
+        return count + len(batch)
+
+
+class PostgresSearchBackend(IContainsBackend):
+    name = 'postgres'
+
+    def filter(self, queryset, words):
+        from django.contrib.postgres.search import SearchQuery
+
+        query = SearchQuery(' & '.join(f'{word}:*' for word in words), search_type='raw', config='simple')
+        return self.search_index.filter_tsquery(queryset, query)
+
+
+SEARCH_BACKENDS = {
+    backend.name: backend
+    for backend in (IContainsBackend, SQLiteFTSBackend, PostgresSearchBackend)
+}
+
+VENDOR_BACKENDS = {
+    'sqlite': SQLiteFTSBackend,
+    'postgresql': PostgresSearchBackend,
+}
+
+
+def get_backend(search_index):
+    name = getattr(settings, search_index.backend_setting, '')
+    if name:
+        return SEARCH_BACKENDS[name](search_index)
+    return VENDOR_BACKENDS.get(connection.vendor, IContainsBackend)(search_index)
@@ -0,0 +1,141 @@
+"""
+Sending protected files (resumes, CVs, profile photos) after a permission check.
+
+serve_file() answers conditional requests itself: every response carries an
+ETag (the blob digest, see main.storage) and Last-Modified, so a repeat view
+gets a 304 without the file being opened. What happens to the bytes depends
+on settings.SENDFILE_BACKEND:
+
+- "" (default) streams the file from Django, honouring a single HTTP Range
+  (206 Partial Content) so PDF viewers can fetch pages on demand.
+- "x-accel-redirect" hands the transfer to nginx, which serves the file (and
+  any Range) from an internal location mapped onto MEDIA_ROOT:
+
+      location /protected-media/ {
+          internal;
+          alias /app/src/media/;
+      }
+
+- "x-sendfile" does the same for Apache mod_xsendfile or lighttpd, which
+  read the absolute path from the X-Sendfile header.
+
+Either offload mode frees the worker as soon as the headers are written.
+"""
+import os
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, parse_http_date_safe, quote_etag
+
+from .storage import blob_digest
+
+CONTENT_TYPES = {
+    '.pdf': 'application/pdf',
+    '.doc': 'application/msword',
+    '.docx': 'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
+    '.png': 'image/png',
+    '.gif': 'image/gif',
+    '.webp': 'image/webp',
+    '.jpg': 'image/jpeg',
+    '.jpeg': 'image/jpeg',
+}
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+STREAM_CHUNK_SIZE = 64 * 1024
+
+
+def content_type_for(name, default='application/octet-stream'):
+    return CONTENT_TYPES.get(os.path.splitext(name or '')[1].lower(), default)
+
+
+def parse_range(header, size):
+    """(start, end) inclusive for a single-range `header`, None to send everything, or False if unsatisfiable."""
+    match = RANGE_RE.match((header or '').strip())
+    if not match or not any(match.groups()):
+        # Missing, malformed or multi-range: a full 200 response is always allowed
+        return None
+    first, last = match.groups()
+    if not first:
+        # Suffix range: the last N bytes
+        length = int(last)
+        return (max(size - length, 0), size - 1) if length and size else False
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or end < start:
+        return False
+    return start, end
+
+
+def _read_range(handle, start, length):
+    try:
+        handle.seek(start)
+        while length > 0:
+            chunk = handle.read(min(STREAM_CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+    finally:
+        handle.close()
+
+
+def serve_file(request, field_file, content_type=None, filename=None):
+    """
+    Response sending `field_file` inline. Raises OSError (or ValueError for an
+    empty field) when the file is missing, like FieldFile.open().
+    """
+    if not field_file:
+        raise ValueError('The file field has no file associated with it.')
+    path = field_file.path
+    stat = os.stat(path)
+    digest = blob_digest(field_file.name)
+    etag = quote_etag(digest or f'{int(stat.st_mtime)}-{stat.st_size}')
+    last_modified = int(stat.st_mtime)
+    filename = filename or os.path.basename(field_file.name)
+    content_type = content_type or content_type_for(filename)
+
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        backend = settings.SENDFILE_BACKEND
+        if backend == 'x-accel-redirect':
+            response = HttpResponse(content_type=content_type)
+            relative = os.path.relpath(path, settings.MEDIA_ROOT).replace(os.sep, '/')
+            response['X-Accel-Redirect'] = quote(settings.SENDFILE_URL + relative)
+        elif backend == 'x-sendfile':
+            response = HttpResponse(content_type=content_type)
+            response['X-Sendfile'] = path
+        else:
+            response = _stream(request, path, stat.st_size, content_type, etag, last_modified)
+        response['Content-Disposition'] = f'inline; filename="{filename}"'
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    # Private to the user; the browser revalidates (and gets a 304) on every view
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+def _stream(request, path, size, content_type, etag, last_modified):
+    byte_range = parse_range(request.headers.get('Range'), size)
+    if_range = request.headers.get('If-Range')
+    if byte_range is not None and if_range and if_range != etag and parse_http_date_safe(if_range) != last_modified:
+        # The client's partial copy is stale: send the whole file
+        byte_range = None
+    if byte_range is False:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{size}'
+        return response
+    handle = open(path, 'rb')
+    if byte_range is None:
+        response = FileResponse(handle, content_type=content_type)
+    else:
+        start, end = byte_range
+        response = StreamingHttpResponse(
+            _read_range(handle, start, end - start + 1), status=206, content_type=content_type)
+        response['Content-Length'] = end - start + 1
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    response['Accept-Ranges'] = 'bytes'
+    return response
@@ -0,0 +1,73 @@
+from django.db.models.signals import m2m_changed, post_delete, post_init, post_save, pre_save
+from django.dispatch import receiver
+
+from courses.models import Course
+from courses.signals import courses_changed
+from main.blobs import BLOB_FIELDS, loaded_digests, release, retain
+from main.exports import invalidate_schedule_exports_on_commit
+
+
+@receiver(pre_save, sender=Course)
+def remember_previous_term(sender, instance, update_fields=None, **kwargs):
+    # A course moved to another term must also drop the old term's exports;
+    # only saves that write the term can move it
+    moves_term = update_fields is None or 'term' in update_fields
+    instance._previous_term = (
+        Course.objects.filter(pk=instance.pk).values_list('term', flat=True).first()
+        if moves_term and not instance._state.adding else None
+    )
+
+
+@receiver(post_save, sender=Course)
+@receiver(post_delete, sender=Course)
+def invalidate_course_exports(sender, instance, **kwargs):
+    invalidate_schedule_exports_on_commit({instance.term, getattr(instance, '_previous_term', None) or instance.term})
+
+
+@receiver(m2m_changed, sender=Course.current_tas.through)
+def invalidate_ta_exports(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+    if not reverse:
+        invalidate_schedule_exports_on_commit({instance.term})
+    elif action == 'pre_clear':
+        invalidate_schedule_exports_on_commit(instance.course_working_for.values_list('term', flat=True))
+    elif pk_set:
+        invalidate_schedule_exports_on_commit(Course.objects.filter(pk__in=pk_set).values_list('term', flat=True))
+
+
+@receiver(courses_changed)
+def invalidate_bulk_course_exports(sender, terms=None, **kwargs):
+    invalidate_schedule_exports_on_commit(terms)
+
+
+def remember_blobs(sender, instance, **kwargs):
+    instance._loaded_blobs = loaded_digests(instance)
+
+
+def count_blob_changes(sender, instance, **kwargs):
+    # A new row references nothing yet, even when it was built with a stored name
+    previous = {} if kwargs.get('created') else getattr(instance, '_loaded_blobs', {})
+    current = loaded_digests(instance)
+    added, removed = [], []
+    for field, digest in current.items():
+        # A field deferred when the row was loaded has no known previous value;
+        # reconcile_blob_refs() covers that case
+        if field not in previous and not kwargs.get('created'):
+            continue
+        if digest != previous.get(field):
+            added.append(digest)
+            removed.append(previous.get(field))
+    retain(added)
+    release(removed)
+    instance._loaded_blobs = current
+
+
+def release_blobs(sender, instance, **kwargs):
+    release(getattr(instance, '_loaded_blobs', {}).values())
+
+
+for blob_model in BLOB_FIELDS:
+    post_init.connect(remember_blobs, sender=blob_model)
+    post_save.connect(count_blob_changes, sender=blob_model)
+    post_delete.connect(release_blobs, sender=blob_model)
@@ -0,0 +1,83 @@
+"""
+Content-addressed storage for student documents (resumes, CVs, profile
+photos and the resume snapshots taken when a student applies).
+
+A file saved through BlobStorage is stored once per SHA-256 digest at
+blobs/<aa>/<digest> under MEDIA_ROOT, however many times it is uploaded. The
+name kept on the FileField is blobs/<aa>/<digest>/<filename>: every path
+operation drops the last component, so the original filename survives for
+downloads while all references share the same bytes. Handing a stored file to
+another FileField is just copying its name (see apply_to_course_v2).
+
+Because a blob can be shared, delete() never removes anything. main.blobs
+counts references per digest and the collect_blobs command removes blobs
+nobody references any more.
+"""
+import hashlib
+import os
+import uuid
+
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+BLOB_DIR = 'blobs'
+
+
+def blob_digest(name):
+    """The digest in a blob name, or None for files stored before blob storage."""
+    parts = (name or '').split('/')
+    if len(parts) == 4 and parts[0] == BLOB_DIR:
+        return parts[2]
+    return None
+
+
+def blob_path(digest):
+    """Storage-relative path of the bytes for `digest`."""
+    return f'{BLOB_DIR}/{digest[:2]}/{digest}'
+
+
+@deconstructible
+class BlobStorage(FileSystemStorage):
+    def path(self, name):
+        digest = blob_digest(name)
+        return super().path(blob_path(digest) if digest else name)
+
+    def url(self, name):
+        digest = blob_digest(name)
+        return super().url(blob_path(digest) if digest else name)
+
+    def get_available_name(self, name, max_length=None):
+        # The final name comes from the content in _save()
+        return name
+
+    def _save(self, name, content):
+        sha = hashlib.sha256()
+        content.seek(0)
+        for chunk in content.chunks():
+            sha.update(chunk)
+        digest = sha.hexdigest()
+        stored = blob_path(digest)
+        full_path = super().path(stored)
+        if os.path.exists(full_path):
+            # Mark the blob as just used so collect_blobs leaves it alone
+            os.utime(full_path)
+        else:
+            # Write under a unique name and rename into place, so concurrent
+            # uploads of the same bytes cannot clash
+            content.seek(0)
+            partial = super()._save(f'{stored}.{uuid.uuid4().hex}.part', content)
+            os.replace(super().path(partial), full_path)
+        base, ext = os.path.splitext(os.path.basename(name))
+        # FileFields holding blobs have max_length 255
+        base = base.replace(' ', '_')[:255 - len(stored) - len(ext) - 1] or 'file'
+        return f'{stored}/{base}{ext}'
+
+    def delete(self, name):
+        # Other references may share the blob; collect_blobs removes unused ones
+        pass
+
+    def delete_blob(self, digest):
+        super().delete(blob_path(digest))
+
+
+blob_storage = BlobStorage()
@@ -0,0 +1,29 @@
+"""
+Factories shared by the apps' test modules.
+"""
+from courses.models import Course
+from users.models import CustomUser
+
+
+def create_course(section='01', term='Fall 2025', course='CSCI1101', num_tas=1, **fields):
+    fields.setdefault('course_title', 'Computer Science 1')
+    return Course.objects.create(
+        term=term, class_type='Lab', course=course, section=section, instructor_first_name='Anne',
+        instructor_last_name='Prof', room_name='Fulton 1', timeslot='MWF', max_enroll=40, room_size=50,
+        num_tas=num_tas, **fields)
+
+
+def create_courses(count, professor=None, term='Fall 2025', num_tas=2):
+    return [
+        create_course(
+            term=term, course=f'CSCI{1100 + i}', course_title=f'Course {i}', num_tas=num_tas, professor=professor)
+        for i in range(count)
+    ]
+
+
+def create_users(count, prefix='student', **fields):
+    return [
+        CustomUser.objects.create_user(
+            email=f'{prefix}{i}@bc.edu', password='x', first_name=prefix.title(), last_name=str(i), **fields)
+        for i in range(count)
+    ]
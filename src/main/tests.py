@@ -1,3 +1,437 @@
-from django.test import TestCase
+import base64
+import hashlib
+import json
+import os
+import shutil
+import tempfile
 
-# Create your tests here.
+from datetime import timedelta
+from unittest import mock
+
+from django.core import mail
+from django.core.files.base import ContentFile
+from django.db import connection
+from django.test import RequestFactory, TestCase, override_settings
+from django.template.loader import render_to_string
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from openpyxl import load_workbook
+
+from applications.models import Application, ResumeText, ResumeTextStatus
+from courses.models import Course
+from offers.models import Offer
+from users.models import DigestFrequency
+from .blobs import collect_blobs, reconcile_blob_refs
+from .models import EmailStatus, NotificationEvent, OutgoingEmail, StoredBlob
+from .sendfile import parse_range, serve_file
+from .storage import blob_digest, blob_storage
+from .testing import create_course, create_courses, create_users
+from . import outbox
+from .pagination import KeysetPaginator
+from .outbox import MAX_SEND_ATTEMPTS, build_digests, claim_due_emails, deliver_batch, notify, queue_notification_email
+from .exports import SCHEDULE_COLUMN_WIDTHS, SCHEDULE_HEADERS, _term_dir, cached_schedule_xlsx, write_schedule_xlsx
+
+
+class ScheduleExportTests(TestCase):
+    def test_rows_and_fixed_column_widths(self):
+        professor, = create_users(1, prefix='prof', professor=True)
+        courses = create_courses(3, professor=professor)
+        ta, = create_users(1)
+        courses[0].current_tas.add(ta)
+
+        output = write_schedule_xlsx(Course.objects.order_by('course').prefetch_related('current_tas'))
+        sheet = load_workbook(output).active
+        rows = list(sheet.iter_rows(values_only=True))
+        self.assertEqual(list(rows[0]), SCHEDULE_HEADERS)
+        self.assertEqual(len(rows), 4)
+        self.assertEqual(rows[1][2], 'CSCI1100')
+        self.assertEqual(rows[1][11:13], (1, 2))
+        self.assertEqual(sheet.column_dimensions['E'].width, SCHEDULE_COLUMN_WIDTHS[4])
+        self.assertEqual(len(SCHEDULE_COLUMN_WIDTHS), len(SCHEDULE_HEADERS))
+
+    def test_query_count_does_not_grow_with_courses(self):
+        professor, = create_users(1, prefix='prof', professor=True)
+        tas = create_users(2)
+
+        def count_queries(n):
+            term = f'Fall {2000 + n}'
+            for course in create_courses(n, professor=professor, term=term):
+                course.current_tas.add(*tas)
+            courses = Course.objects.filter(term=term).order_by('course').select_related('professor').prefetch_related('current_tas')
+            with CaptureQueriesContext(connection) as queries:
+                write_schedule_xlsx(courses)
+            return len(queries)
+
+        self.assertEqual(count_queries(5), count_queries(40))
+
+
+class CourseListQueryTests(TestCase):
+    def count_list_queries(self, user, n):
+        professor, = create_users(1, prefix=f'prof{n}-', professor=True)
+        for course in create_courses(n, professor=professor, term=f'Fall {2000 + n}'):
+            course.current_tas.add(user)
+        self.client.force_login(user)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('courses'), {'per_page': 50})
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_student_list_query_count_does_not_grow_with_rows(self):
+        student, = create_users(1)
+        self.assertEqual(self.count_list_queries(student, 5), self.count_list_queries(student, 40))
+
+    def test_admin_stats_query_count_does_not_grow_with_rows(self):
+        admin, = create_users(1, prefix='admin', is_superuser=True, is_staff=True)
+        self.assertEqual(self.count_list_queries(admin, 5), self.count_list_queries(admin, 40))
+
+    def test_admin_stats_count_staffing_buckets(self):
+        admin, = create_users(1, prefix='admin', is_superuser=True, is_staff=True)
+        tas = create_users(2)
+        empty, partial, full = create_courses(3)
+        partial.current_tas.add(tas[0])
+        full.current_tas.add(*tas)
+        self.client.force_login(admin)
+        stats = self.client.get(reverse('courses')).context['course_stats']
+        self.assertEqual(stats['total_courses'], 3)
+        self.assertEqual(stats['no_tas_yet'], 1)
+        self.assertEqual(stats['partially_filled'], 1)
+        self.assertEqual(stats['fully_staffed'], 1)
+        self.assertEqual((stats['filled_ta_slots'], stats['total_ta_slots']), (3, 6))
+
+
+class ProfessorDashboardTests(TestCase):
+    def test_pending_offers_are_the_professors_own(self):
+        professor, other = create_users(2, prefix='prof', professor=True)
+        course, = create_courses(1, professor=professor)
+        for sender, student in zip((professor, other, other), create_users(3)):
+            Offer.objects.create(
+                application=Application.objects.create(student=student, course=course),
+                course=course, recipient=student, sender=sender)
+        self.client.force_login(professor)
+        context = self.client.get(reverse('dashboard')).context
+        self.assertEqual(context['pending_offers_count'], 1)
+        self.assertEqual([c.pending_offers_count for c in context['staffing_overview']], [1])
+
+
+class KeysetPaginatorTests(TestCase):
+    def setUp(self):
+        # Three courses per num_tas value, and a NULL description among ties
+        for i in range(9):
+            create_course(section=f'{i:02}', num_tas=i // 3, description=None if i % 2 else f'Section {i}')
+
+    def walk(self, paginator):
+        pages, cursor = [], ''
+        while True:
+            page = paginator.get_page(cursor)
+            pages.append(page)
+            if not page.has_next:
+                return pages
+            cursor = page.next_cursor
+
+    def test_pages_cover_ties_in_both_directions(self):
+        for ordering in (['-num_tas'], ['description', '-num_tas']):
+            with self.subTest(ordering=ordering):
+                paginator = KeysetPaginator(Course.objects.all(), ordering, per_page=2)
+                expected = list(Course.objects.order_by(*paginator.order_by()))
+                pages = self.walk(paginator)
+                self.assertEqual([course for page in pages for course in page], expected)
+                self.assertEqual([(p.start_index, p.end_index) for p in pages][-1], (9, 9))
+
+                # Back from the last page, each previous cursor gives the page before
+                page = pages[-1]
+                for before in reversed(pages[:-1]):
+                    page = paginator.get_page(page.previous_cursor)
+                    self.assertEqual(page.object_list, before.object_list)
+                    self.assertEqual((page.start_index, page.end_index), (before.start_index, before.end_index))
+                self.assertFalse(page.has_previous)
+
+    def test_cursor_round_trip(self):
+        paginator = KeysetPaginator(Course.objects.all(), ['-num_tas', 'description'], per_page=2)
+        course = Course.objects.filter(description=None).first()
+        cursor = paginator.encode(course, True, 4)
+        self.assertNotIn('=', cursor)
+        self.assertEqual(paginator.decode(cursor), ([course.num_tas, None, str(course.pk)], True, 4))
+
+    def test_tampered_cursor_starts_at_the_top(self):
+        paginator = KeysetPaginator(Course.objects.all(), ['-num_tas'], per_page=2)
+        first = paginator.get_page('')
+
+        def cursor(payload):
+            return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+
+        for tampered in (
+            'not a cursor!',
+            cursor([1, 2]),
+            cursor({'v': [1], 'b': False, 'i': 2}),  # wrong number of keys
+            cursor({'v': ['many', 'x'], 'b': False, 'i': 2}),  # values the columns cannot hold
+        ):
+            with self.subTest(cursor=tampered):
+                page = paginator.get_page(tampered)
+                self.assertEqual(page.object_list, first.object_list)
+                self.assertFalse(page.has_previous)
+
+    def test_approximate_count_shows_a_plus(self):
+        for count_limit, shown in ((5, '5+'), (9, '9'), (20, '9')):
+            with self.subTest(count_limit=count_limit):
+                paginator = KeysetPaginator(Course.objects.all(), ['num_tas'], per_page=2, count_limit=count_limit)
+                html = render_to_string(
+                    'components/pagination.html', {'page': paginator.get_page(''), 'paginator': paginator})
+                self.assertIn(f'<span class="font-medium">{shown}</span> results', html)
+
+
+class ExportInvalidationTests(TestCase):
+    def setUp(self):
+        cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cache_dir)
+        settings_override = override_settings(EXPORT_CACHE_DIR=cache_dir)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.course, = create_courses(1)
+
+    def cache_export(self):
+        cached_schedule_xlsx('Fall 2025', '', lambda: Course.objects.filter(term='Fall 2025')).close()
+        return _term_dir('Fall 2025')
+
+    def test_course_save_invalidates_after_commit(self):
+        term_dir = self.cache_export()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.course.save()
+            self.assertTrue(os.path.isdir(term_dir))
+        self.assertFalse(os.path.isdir(term_dir))
+
+    def test_partial_save_skips_the_previous_term_lookup(self):
+        self.course.status = False
+        with CaptureQueriesContext(connection) as queries:
+            self.course.save(update_fields=['status'])
+        self.assertFalse([q for q in queries if q['sql'].startswith('SELECT')])
+
+    def test_term_spelling_shares_the_cached_export(self):
+        course, = create_courses(1, term='fall  2025')
+        term_dir = self.cache_export()
+        self.assertEqual(_term_dir(' FALL 2025 '), term_dir)
+        with self.captureOnCommitCallbacks(execute=True):
+            course.save()
+        self.assertFalse(os.path.isdir(term_dir))
+
+    def test_ta_change_invalidates_after_commit(self):
+        ta, = create_users(1)
+        term_dir = self.cache_export()
+        with self.captureOnCommitCallbacks(execute=True):
+            ta.course_working_for.add(self.course)
+            self.assertTrue(os.path.isdir(term_dir))
+        self.assertFalse(os.path.isdir(term_dir))
+
+
+class ApplicationExportTests(TestCase):
+    def setUp(self):
+        self.professor, = create_users(1, prefix='prof', professor=True)
+        self.courses = create_courses(2, professor=self.professor)
+        self.apps = [
+            Application.objects.create(student=student, course=course)
+            for course in self.courses
+            for student in create_users(2, prefix=f'{course.course}-')
+        ]
+        ResumeText.objects.create(application=self.apps[0], text=' java sql ', status=ResumeTextStatus.DONE.value)
+        self.client.force_login(self.professor)
+
+    def exported_ids(self, **params):
+        response = self.client.get(reverse('export_applications', args=['csv']), params)
+        lines = b''.join(response.streaming_content).decode().splitlines()[1:]
+        return {line.split(',')[0] for line in lines}
+
+    def test_export_honours_list_filters(self):
+        self.assertEqual(self.exported_ids(), {str(app.pk) for app in self.apps})
+        self.assertEqual(
+            self.exported_ids(course=self.courses[0].pk), {str(app.pk) for app in self.apps[:2]})
+        self.assertEqual(self.exported_ids(course=self.courses[0].pk, q='Java'), {str(self.apps[0].pk)})
+
+    def test_export_links_carry_filters(self):
+        response = self.client.get(reverse('applications'), {'course': self.courses[1].pk})
+        self.assertContains(response, f"{reverse('export_applications', args=['csv'])}?course={self.courses[1].pk}")
+
+
+class OutboxTests(TestCase):
+    def test_queued_email_is_sent_by_the_worker_once(self):
+        email = queue_notification_email("Offer accepted", "prof@bc.edu", ["Dear Professor,", "An offer was accepted."])
+        self.assertEqual(email.status, EmailStatus.QUEUED.value)
+        self.assertEqual(len(mail.outbox), 0)
+
+        claimed = claim_due_emails(limit=10)
+        self.assertEqual(claimed, [email])
+        self.assertEqual(claim_due_emails(limit=10), [])
+        self.assertEqual(deliver_batch(claimed), [(email, True)])
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ["prof@bc.edu"])
+        self.assertIn("An offer was accepted.", mail.outbox[0].alternatives[0][0])
+        email.refresh_from_db()
+        self.assertEqual(email.status, EmailStatus.SENT.value)
+
+    def test_failed_sends_back_off_then_give_up(self):
+        email = queue_notification_email("Offer accepted", "prof@bc.edu", ["Hello"])
+        failing_send = mock.patch('django.core.mail.EmailMultiAlternatives.send', side_effect=OSError("connection refused"))
+        with failing_send, self.assertLogs('main.outbox', level='WARNING'):
+            self.assertEqual(deliver_batch(claim_due_emails(limit=10)), [(email, False)])
+            email.refresh_from_db()
+            self.assertEqual((email.status, email.attempts), (EmailStatus.QUEUED.value, 1))
+            self.assertGreater(email.next_attempt_at, timezone.now())
+            self.assertEqual(claim_due_emails(limit=10), [])
+
+            for _ in range(MAX_SEND_ATTEMPTS - 1):
+                OutgoingEmail.objects.filter(pk=email.pk).update(next_attempt_at=timezone.now())
+                deliver_batch(claim_due_emails(limit=10))
+        email.refresh_from_db()
+        self.assertEqual((email.status, email.attempts), (EmailStatus.FAILED.value, MAX_SEND_ATTEMPTS))
+        self.assertEqual(email.last_error, "connection refused")
+
+    def test_batch_reuses_one_connection_and_recovers_from_failures(self):
+        emails = [queue_notification_email(f"Update {i}", f"user{i}@bc.edu", ["Hello"]) for i in range(4)]
+        send = mail.EmailMultiAlternatives.send
+        failures = {"Update 1"}
+
+        def flaky_send(message, *args, **kwargs):
+            if message.subject in failures:
+                raise OSError("server hung up")
+            return send(message, *args, **kwargs)
+
+        with mock.patch.object(outbox, 'get_connection', wraps=outbox.get_connection) as get_connection, \
+                mock.patch('django.core.mail.EmailMultiAlternatives.send', flaky_send), \
+                self.assertLogs('main.outbox', level='WARNING'):
+            results = deliver_batch(claim_due_emails(limit=10))
+        self.assertEqual(get_connection.call_count, 1)
+        self.assertEqual([sent for _, sent in results], [True, False, True, True])
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertEqual(OutgoingEmail.objects.filter(status=EmailStatus.SENT.value).count(), 3)
+        self.assertEqual(emails[1], results[1][0])
+
+    def test_claims_of_a_stopped_worker_expire(self):
+        email = queue_notification_email("Offer accepted", "prof@bc.edu", ["Hello"])
+        claim_due_emails(limit=10)
+        OutgoingEmail.objects.filter(pk=email.pk).update(next_attempt_at=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(claim_due_emails(limit=10), [email])
+
+
+class DigestTests(TestCase):
+    def setUp(self):
+        self.immediate, self.hourly, self.daily = create_users(3)
+        for user, frequency in ((self.hourly, DigestFrequency.HOURLY), (self.daily, DigestFrequency.DAILY)):
+            user.notification_digest = frequency.value
+            user.save()
+
+    def notify_all(self, subject):
+        for user in (self.immediate, self.hourly, self.daily):
+            notify(user, subject, [f"{subject} details"])
+
+    def test_digest_users_get_one_summary_per_interval(self):
+        self.notify_all("Offer received")
+        self.notify_all("Application rejected")
+        self.assertEqual(list(OutgoingEmail.objects.values_list('recipients', flat=True)), [[self.immediate.email]] * 2)
+        self.assertEqual(build_digests(), [])
+
+        NotificationEvent.objects.update(created_at=timezone.now() - timedelta(hours=2))
+        digest, = build_digests()
+        self.assertEqual(digest.recipients, [self.hourly.email])
+        self.assertEqual(digest.subject, "TA Buzz: 2 updates")
+        self.assertIn("Application rejected details", digest.text_body)
+        self.assertEqual(digest.events.count(), 2)
+        self.assertEqual(build_digests(), [])
+
+    def test_switching_back_to_immediate_flushes_pending_events(self):
+        notify(self.daily, "Offer received", ["details"])
+        self.daily.notification_digest = DigestFrequency.IMMEDIATE.value
+        self.daily.save()
+        digest, = build_digests()
+        self.assertEqual(digest.subject, "Offer received")
+
+
+class BlobStorageTests(TestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.course, = create_courses(1)
+
+    def test_identical_files_share_one_blob(self):
+        first = blob_storage.save('resumes/My CV.pdf', ContentFile(b'%PDF resume'))
+        second = blob_storage.save('other/cv.pdf', ContentFile(b'%PDF resume'))
+        self.assertEqual(blob_digest(first), hashlib.sha256(b'%PDF resume').hexdigest())
+        self.assertEqual(blob_digest(first), blob_digest(second))
+        self.assertEqual(first.rsplit('/', 1)[1], 'My_CV.pdf')
+        self.assertEqual(blob_storage.path(first), blob_storage.path(second))
+        with blob_storage.open(second) as f:
+            self.assertEqual(f.read(), b'%PDF resume')
+
+    def test_reference_counts_and_collection(self):
+        students = create_users(2)
+        first = Application.objects.create(
+            student=students[0], course=self.course, resume=ContentFile(b'%PDF resume', name='cv.pdf'))
+        # Applying with a stored resume copies only its name
+        second = Application.objects.create(student=students[1], course=self.course, resume=first.resume.name)
+        digest = blob_digest(first.resume.name)
+        path = blob_storage.path(first.resume.name)
+        self.assertEqual(StoredBlob.objects.get(pk=digest).ref_count, 2)
+
+        first.delete()
+        self.assertEqual(collect_blobs(grace=timedelta(0)), (0, 0))
+        second.delete()
+        self.assertEqual(StoredBlob.objects.get(pk=digest).ref_count, 0)
+        self.assertEqual(reconcile_blob_refs(), 0)
+        self.assertEqual(collect_blobs(grace=timedelta(0)), (1, len(b'%PDF resume')))
+        self.assertFalse(os.path.exists(path))
+        self.assertFalse(StoredBlob.objects.filter(pk=digest).exists())
+
+
+class ServeFileTests(TestCase):
+    content = bytes(range(256)) * 4
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        name = blob_storage.save('resumes/cv.pdf', ContentFile(self.content))
+        self.resume = Application(resume=name).resume
+
+    def get(self, **headers):
+        return serve_file(RequestFactory().get('/', headers=headers), self.resume)
+
+    def test_parse_range(self):
+        self.assertEqual(parse_range('bytes=0-99', 1024), (0, 99))
+        self.assertEqual(parse_range('bytes=1000-', 1024), (1000, 1023))
+        self.assertEqual(parse_range('bytes=-24', 1024), (1000, 1023))
+        self.assertEqual(parse_range('bytes=0-5000', 1024), (0, 1023))
+        self.assertIsNone(parse_range('bytes=0-1,5-9', 1024))
+        self.assertIsNone(parse_range(None, 1024))
+        self.assertFalse(parse_range('bytes=2000-', 1024))
+
+    def test_full_range_and_conditional_responses(self):
+        response = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), self.content)
+        self.assertEqual(response['ETag'], f'"{blob_digest(self.resume.name)}"')
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+
+        response = self.get(Range='bytes=10-19')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], f'bytes 10-19/{len(self.content)}')
+        self.assertEqual(b''.join(response.streaming_content), self.content[10:20])
+
+        self.assertEqual(self.get(Range='bytes=5000-').status_code, 416)
+        self.assertEqual(self.get(Range='bytes=10-19', **{'If-Range': '"stale"'}).status_code, 200)
+        self.assertEqual(self.get(**{'If-None-Match': response['ETag']}).status_code, 304)
+
+    @override_settings(SENDFILE_BACKEND='x-accel-redirect', SENDFILE_URL='/protected-media/')
+    def test_nginx_offload(self):
+        response = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, b'')
+        digest = blob_digest(self.resume.name)
+        self.assertEqual(response['X-Accel-Redirect'], f'/protected-media/blobs/{digest[:2]}/{digest}')
+        self.assertIn('private', response['Cache-Control'])
+
+    @override_settings(SENDFILE_BACKEND='x-sendfile')
+    def test_apache_offload(self):
+        self.assertEqual(self.get()['X-Sendfile'], blob_storage.path(self.resume.name))
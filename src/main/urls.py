@@ -6,14 +6,18 @@ urlpatterns = [
     path("dashboard/", views.admin_dashboard_v2, name="dashboard"),
     path("profile/", StudentProfileView.as_view(), name="student_profile"),
     path("applications/", views.applications_list_v2, name="applications"),
+    path("applications/export/<str:fmt>/", views.export_applications, name="export_applications"),
     path("offers/", views.offers_list_v2, name="offers"),
+    path("offers/export/<str:fmt>/", views.export_offers, name="export_offers"),
     path("courses/", views.courses_list_v2, name="courses"),
     path("courses/create/", views.create_course_v2, name="create_course"),
     path("courses/<uuid:course_id>/", views.course_overview_v2, name="course_overview"),
     path("courses/<uuid:course_id>/edit/", views.edit_course_v2, name="edit_course"),
     path("courses/<uuid:course_id>/remove-ta/<uuid:user_id>/", views.remove_ta_v2, name="remove_ta"),
     path("courses/upload/", views.upload_courses_v2, name="upload_courses"),
+    path("courses/upload/jobs/<uuid:job_id>/", views.upload_job_status, name="upload_job_status"),
     path("courses/export/", views.export_schedule, name="export_schedule"),
+    path("courses/export/<str:fmt>/", views.export_courses, name="export_courses"),
     path("courses/close/", views.close_semester_v2, name="close_semester"),
     path("apply/<uuid:course_id>/", views.apply_to_course_v2, name="apply_to_course"),
     path("make-offer/<uuid:application_id>/", views.make_offer_v2, name="make_offer"),
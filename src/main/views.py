@@ -2,19 +2,25 @@
 from django.shortcuts import render, redirect
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth import get_user_model
-from django.db.models import Count, F, Q, Sum
-from django.http import HttpResponse
-from django.core.paginator import Paginator
+from django.db.models import Count, Exists, F, OuterRef, Q, Sum
+from django.http import Http404, HttpResponse, StreamingHttpResponse
 from datetime import date
-from openpyxl import Workbook
-from openpyxl.styles import Font
-from openpyxl.utils import get_column_letter
-from courses.models import Course
+import os
+from courses.models import Course, Term
 from applications.models import Application, ApplicationStatus
+from applications.eligibility import get_eligibility
 from applications.forms import ApplicationForm
+from applications.resume_text import count_still_indexing, filter_by_resume_keywords
 from offers.models import Offer, OfferStatus
 from users.models import StudentProfile, PastCourse
-from main.utils import send_notification_email
+from main.outbox import notify
+from main.sendfile import serve_file
+from main.storage import blob_digest
+from main.pagination import KeysetPaginator
+from main.exports import (
+    APPLICATION_EXPORT_FIELDS, COURSE_EXPORT_FIELDS, OFFER_EXPORT_FIELDS, STREAM_FORMATS, XLSX_CONTENT_TYPE,
+    cached_schedule_xlsx, export_rows, invalidate_schedule_exports,
+)
 
 User = get_user_model()
 
@@ -45,9 +51,8 @@ def admin_dashboard_v2(request):
             professor=request.user, status=True
         ).count()
         understaffed_count = (
-            Course.objects.filter(professor=request.user, status=True)
-            .annotate(tas_count=Count('current_tas', distinct=True))
-            .filter(tas_count__lt=F('num_tas'))
+            with_open_ta_slots(Course.objects.filter(professor=request.user, status=True))
+            .filter(UNDERSTAFFED)
             .count()
         )
         pending_applications_count = Application.objects.filter(
@@ -60,12 +65,12 @@ def admin_dashboard_v2(request):
         staffing_overview = (
             Course.objects.filter(professor=request.user)
             .annotate(
-                tas_count=Count('current_tas', distinct=True),
                 pending_apps_count=Count(
                     'applications',
                     filter=Q(applications__status=ApplicationStatus.PENDING.value),
                     distinct=True,
                 ),
+                # Only this professor's offers, unlike the pending_offers counter
                 pending_offers_count=Count(
                     'offer_course',
                     filter=Q(
@@ -75,7 +80,7 @@ def admin_dashboard_v2(request):
                     distinct=True,
                 ),
             )
-            .order_by('-term', 'course')
+            .order_by('-academic_term__sort_key', 'course')
         )
         context = {
             'my_active_courses_count': my_active_courses_count,
@@ -89,105 +94,188 @@ def admin_dashboard_v2(request):
     # Student Dashboard: stats for minimal, action-oriented UI
     my_apps = Application.objects.filter(student=request.user).select_related('course').order_by('-id')
     my_offers = Offer.objects.filter(recipient=request.user).select_related('course', 'sender').order_by('-created_at')
-    assigned_course = request.user.course_working_for.first()
-    current_term = (assigned_course.term or "").strip() if assigned_course else ""
-    if not current_term:
-        t = Course.objects.order_by('-term').values_list('term', flat=True).first()
-        current_term = (t or "").strip()
-    counted_statuses = [
-        ApplicationStatus.PENDING.value,
-        ApplicationStatus.ACCEPTED.value,
-        ApplicationStatus.CONFIRMED.value,
-    ]
-    applications_active_this_term = (
-        Application.objects.filter(
-            student=request.user,
-            course__term__iexact=current_term,
-            status__in=counted_statuses,
-        ).count()
-        if current_term
-        else 0
-    )
+    eligibility = get_eligibility(request.user)
     offers_awaiting_response = Offer.objects.filter(
         recipient=request.user, status=OfferStatus.PENDING.value
     ).count()
-    has_accepted_offer_this_term = Offer.objects.filter(
-        recipient=request.user, status=OfferStatus.ACCEPTED.value
-    ).exists()
+    assigned_course = request.user.course_working_for.first() if eligibility.is_ta else None
     assigned_course_name = assigned_course.course if assigned_course else None
     context = {
         'my_apps': my_apps,
         'my_offers': my_offers,
-        'applications_active_this_term': applications_active_this_term,
+        'applications_active_this_term': eligibility.active_applications,
         'offers_awaiting_response': offers_awaiting_response,
-        'has_accepted_offer_this_term': has_accepted_offer_this_term,
+        'has_accepted_offer_this_term': eligibility.has_accepted_offer,
         'assigned_course_name': assigned_course_name,
     }
     return render(request, 'student_dashboard.html', context)
 
+# Stable keyset orderings for the paginated lists (must end in a unique key)
+APPLICATION_ORDERING = ('-id',)
+OFFER_ORDERING = ('-created_at', '-id')
+
+
+def _visible_applications(user):
+    """Applications a user may list or export: all (admin), their courses' (professor) or their own."""
+    if user.is_superuser:
+        return Application.objects.order_by(*APPLICATION_ORDERING)
+    if user.is_professor:
+        return Application.objects.filter(course__professor=user).order_by(*APPLICATION_ORDERING)
+    return Application.objects.filter(student=user).order_by(*APPLICATION_ORDERING)
+
+
+def _visible_offers(user):
+    # Professors see only offers they sent (even if also superuser)
+    if user.is_professor:
+        return Offer.objects.filter(sender=user).order_by(*OFFER_ORDERING)
+    if user.is_superuser:
+        return Offer.objects.order_by(*OFFER_ORDERING)
+    return Offer.objects.filter(recipient=user).order_by(*OFFER_ORDERING)
+
+
+def _per_page(request, default):
+    """Page size from ?per_page (one of PER_PAGE_CHOICES; the old "all" means the largest)."""
+    value = request.GET.get('per_page', str(default))
+    if value == 'all':
+        return PER_PAGE_CHOICES[-1]
+    try:
+        n = int(value)
+    except (ValueError, TypeError):
+        return default
+    return n if n in PER_PAGE_CHOICES else default
+
+
+def _list_query_string(request):
+    """Current GET params without the page cursor, for building page links."""
+    params = request.GET.copy()
+    params.pop('cursor', None)
+    params.pop('page', None)
+    return params.urlencode()
+
+
+def _filtered_applications(request, search=True):
+    """
+    The applications page's rows: the visible applications, narrowed for professors
+    and admins by ?course and ?q (resume keywords, skipped when `search` is False).
+    The exports use it too, so they download what the list shows.
+    """
+    apps = _visible_applications(request.user)
+    if request.user.is_professor or request.user.is_superuser:
+        course_id = request.GET.get('course', '')
+        keywords = request.GET.get('q', '').strip()
+        if is_uuid(course_id):
+            apps = apps.filter(course_id=course_id)
+        if search and keywords:
+            apps = filter_by_resume_keywords(apps, keywords)
+    return apps
+
+
 @login_required
 def applications_list_v2(request):
-    if request.user.is_superuser:
-        apps = Application.objects.select_related('student', 'course').order_by('-id')
-    elif request.user.is_professor:
-        apps = Application.objects.filter(course__professor=request.user).select_related('student', 'course').order_by('-id')
-    else:
-        apps = Application.objects.filter(student=request.user).select_related('student', 'course').order_by('-id')
-    return render(request, 'applications.html', {'apps': apps})
+    apps = _filtered_applications(request).select_related('student', 'course')
+    # Professors and admins can narrow the list to a course and search the submitted resumes
+    can_search = request.user.is_professor or request.user.is_superuser
+    course_id = request.GET.get('course', '')
+    keywords = request.GET.get('q', '').strip()
+    still_indexing = 0
+    if can_search and keywords:
+        # Resumes not extracted yet cannot match; say how many there are
+        still_indexing = count_still_indexing(_filtered_applications(request, search=False))
+    paginator = KeysetPaginator(apps, APPLICATION_ORDERING, _per_page(request, 20))
+    page = paginator.get_page(request.GET.get('cursor'))
+    return render(request, 'applications.html', {
+        'apps': page.object_list,
+        'page': page,
+        'paginator': paginator,
+        'query_string': _list_query_string(request),
+        'can_search': can_search,
+        'search_courses': (
+            Course.objects.filter(professor=request.user).order_by('course', 'section').only('id', 'course', 'section')
+            if request.user.is_professor else []
+        ),
+        'selected_course': course_id,
+        'keywords': keywords,
+        'still_indexing': still_indexing,
+    })
 
 @login_required
 def offers_list_v2(request):
-    # Professors see only offers they sent (even if also superuser)
-    if request.user.is_professor:
-        offers = Offer.objects.filter(sender=request.user).select_related('recipient', 'course').order_by('-created_at')
-    elif request.user.is_superuser:
-        offers = Offer.objects.select_related('recipient', 'course', 'sender').order_by('-created_at')
-    else:
-        offers = Offer.objects.filter(recipient=request.user).select_related('recipient', 'course').order_by('-created_at')
-    return render(request, 'offers.html', {'offers': offers})
+    offers = _visible_offers(request.user).select_related('recipient', 'course', 'sender')
+    paginator = KeysetPaginator(offers, OFFER_ORDERING, _per_page(request, 20))
+    page = paginator.get_page(request.GET.get('cursor'))
+    return render(request, 'offers.html', {
+        'offers': page.object_list,
+        'page': page,
+        'paginator': paginator,
+        'query_string': _list_query_string(request),
+    })
+
+
+def _streaming_export(fmt, name, fields, rows):
+    content_type, stream = STREAM_FORMATS[fmt]
+    response = StreamingHttpResponse(stream(fields, rows), content_type=content_type)
+    export_date = date.today().strftime('%Y-%m-%d')
+    response['Content-Disposition'] = f'attachment; filename="{name}_{export_date}.{fmt}"'
+    return response
+
+
+@login_required
+def export_courses(request, fmt):
+    """Stream courses matching the course list filters as CSV or NDJSON."""
+    if fmt not in STREAM_FORMATS:
+        raise Http404("Unknown export format")
+    courses = _get_export_queryset(request).annotate(tas_count=F('filled_ta_slots'))
+    return _streaming_export(fmt, 'Courses', COURSE_EXPORT_FIELDS, export_rows(courses, COURSE_EXPORT_FIELDS))
+
+
+@login_required
+def export_applications(request, fmt):
+    """Stream the applications listed on the applications page (same filters) as CSV or NDJSON."""
+    if fmt not in STREAM_FORMATS:
+        raise Http404("Unknown export format")
+    apps = _filtered_applications(request)
+    return _streaming_export(
+        fmt, 'Applications', APPLICATION_EXPORT_FIELDS,
+        export_rows(apps, APPLICATION_EXPORT_FIELDS, ApplicationStatus),
+    )
+
+
+@login_required
+def export_offers(request, fmt):
+    """Stream the offers the user can see on the offers page as CSV or NDJSON."""
+    if fmt not in STREAM_FORMATS:
+        raise Http404("Unknown export format")
+    offers = _visible_offers(request.user)
+    return _streaming_export(
+        fmt, 'Offers', OFFER_EXPORT_FIELDS,
+        export_rows(offers, OFFER_EXPORT_FIELDS, OfferStatus),
+    )
 
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
 from django.http import HttpResponse, FileResponse
-from django.core.paginator import Paginator
 from django.db import transaction
 from django.db.models import Q
 from applications.models import Application, ApplicationStatus
 from courses.forms import CourseForm
-from courses.views import UploadView
+from django.http import JsonResponse
+from django.urls import reverse
+from courses.models import CourseUploadJob
+from courses.filters import CourseFilterSpec, is_uuid
+from courses.staffing import FULLY_STAFFED, NO_TAS, UNDERSTAFFED, refresh_pending_offers, with_open_ta_slots
+from courses.importer import APPEND, IMPORT_MODES, CourseImporter, iter_sheet_rows
+from openpyxl.utils.exceptions import InvalidFileException
+from zipfile import BadZipFile
 
-PER_PAGE_CHOICES = [10, 20, 50]
+PER_PAGE_CHOICES = [10, 20, 50, 100]
 
 @login_required
 def courses_list_v2(request):
-    query = request.GET.get('q')
-    term_filter = (request.GET.get('term') or '').strip()
-    professor_id = request.GET.get('professor')
-    status_filter = request.GET.get('status', '')
-    class_type_filter = request.GET.get('class_type', '')
-    course_level = request.GET.get('course_level', '')
-    per_page_param = request.GET.get('per_page', '10')
-    courses = Course.objects.all().order_by('course')
-
-    if query:
-        courses = courses.filter(
-            Q(course__icontains=query) |
-            Q(course_title__icontains=query) |
-            Q(instructor_first_name__icontains=query) |
-            Q(instructor_last_name__icontains=query)
-        )
-    if term_filter:
-        courses = courses.filter(term__iexact=term_filter)
-    if professor_id:
-        courses = courses.filter(professor_id=professor_id)
-    if status_filter == 'active':
-        courses = courses.filter(status=True)
-    elif status_filter == 'closed':
-        courses = courses.filter(status=False)
-    if class_type_filter:
-        courses = courses.filter(class_type=class_type_filter)
-    if course_level and course_level in ('1', '2', '3', '4', '5'):
-        courses = courses.filter(course__iregex=r'^\D*' + course_level + r'\d{3}')
+    filters = CourseFilterSpec.from_params(request.GET)
+    # TA counts are the filled_ta_slots column (read via Course.ta_count), so no join or GROUP BY
+    courses = with_open_ta_slots(
+        filters.apply(Course.objects.select_related('professor'))
+    ).order_by(*filters.ordering)
 
     # Admin-only stats and drill-down (on filtered queryset, before pagination)
     course_stats = None
@@ -197,62 +285,66 @@ def courses_list_v2(request):
     staffing_filter = (request.GET.get('staffing') or '').strip()
 
     if request.user.is_superuser:
-        stats_qs = courses.annotate(tas_count=Count('current_tas', distinct=True))
-        agg = stats_qs.aggregate(
+        stats_qs = courses
+        understaffed_q = UNDERSTAFFED
+        no_tas_q = NO_TAS
+        fully_staffed_q = FULLY_STAFFED
+        # One pass over the filtered rows, counting each staffing bucket with a filtered aggregate
+        agg = stats_qs.order_by().aggregate(
+            total_courses=Count('id'),
             total_slots=Sum('num_tas'),
-            filled_slots=Sum('tas_count'),
+            filled_slots=Sum('filled_ta_slots'),
+            understaffed=Count('id', filter=understaffed_q),
+            no_tas_yet=Count('id', filter=no_tas_q),
+            fully_staffed=Count('id', filter=fully_staffed_q),
         )
-        total_slots = agg['total_slots'] or 0
-        filled_slots = agg['filled_slots'] or 0
-        understaffed = stats_qs.filter(tas_count__lt=F('num_tas')).count()
-        no_tas_yet = stats_qs.filter(tas_count=0, num_tas__gt=0).count()
-        fully_staffed = stats_qs.filter(tas_count__gte=F('num_tas'), num_tas__gt=0).count()
         course_stats = {
-            'total_courses': courses.count(),
-            'understaffed': understaffed,
-            'no_tas_yet': no_tas_yet,
-            'partially_filled': understaffed - no_tas_yet,
-            'fully_staffed': fully_staffed,
-            'total_ta_slots': total_slots,
-            'filled_ta_slots': filled_slots,
+            'total_courses': agg['total_courses'],
+            'understaffed': agg['understaffed'],
+            'no_tas_yet': agg['no_tas_yet'],
+            'partially_filled': agg['understaffed'] - agg['no_tas_yet'],
+            'fully_staffed': agg['fully_staffed'],
+            'total_ta_slots': agg['total_slots'] or 0,
+            'filled_ta_slots': agg['filled_slots'] or 0,
         }
         # Drill-down: courses needing TAs (for compact table)
-        needing = stats_qs.filter(tas_count__lt=F('num_tas')).select_related('professor').order_by('course')[:25]
+        needing = stats_qs.filter(understaffed_q)[:25]
         courses_needing_tas = [
             {
                 'id': c.id,
                 'course': c.course,
                 'section': c.section,
                 'course_title': c.course_title,
-                'professor_name': c.professor.get_full_name() or (c.professor.email if c.professor else '') or f'{c.instructor_last_name}, {c.instructor_first_name}'.strip(', ') or '—',
-                'ta_count': c.tas_count,
+                'professor_name': (c.professor.get_full_name() or c.professor.email if c.professor else '') or f'{c.instructor_last_name}, {c.instructor_first_name}'.strip(', ') or '—',
+                'ta_count': c.filled_ta_slots,
                 'num_tas': c.num_tas,
             }
             for c in needing
         ]
-        # Understaffed count by professor (for chart)
-        by_prof_ids = list(
-            stats_qs.filter(tas_count__lt=F('num_tas'))
-            .values('professor_id')
+        # Understaffed count by professor (for chart): group the understaffed course
+        # ids by professor, with names joined in the same query
+        by_professor = (
+            Course.objects.filter(pk__in=stats_qs.filter(understaffed_q).order_by().values('pk'))
+            .values('professor_id', 'professor__first_name', 'professor__last_name', 'professor__email')
             .annotate(count=Count('id'))
-            .order_by('-count')
+            .order_by('-count', 'professor__last_name', 'professor__first_name')
         )
-        if by_prof_ids:
-            ids = [x['professor_id'] for x in by_prof_ids if x['professor_id']]
-            users = {u.id: u.get_full_name() or u.email or '—' for u in User.objects.filter(id__in=ids)} if ids else {}
-            understaffed_by_professor = [
-                {'name': users.get(x['professor_id'], '—') if x['professor_id'] else '—', 'count': x['count']}
-                for x in by_prof_ids
-            ]
-        else:
-            understaffed_by_professor = []
+        understaffed_by_professor = [
+            {
+                'name': (
+                    f"{x['professor__first_name']} {x['professor__last_name']}".strip() or x['professor__email'] or '—'
+                ) if x['professor_id'] else '—',
+                'count': x['count'],
+            }
+            for x in by_professor
+        ]
         # Apply staffing filter to table (narrow what we paginate)
         if staffing_filter == 'no_tas':
-            courses = stats_qs.filter(tas_count=0, num_tas__gt=0).order_by('course')
+            courses = stats_qs.filter(no_tas_q)
         elif staffing_filter == 'understaffed':
-            courses = stats_qs.filter(tas_count__lt=F('num_tas')).order_by('course')
+            courses = stats_qs.filter(understaffed_q)
         elif staffing_filter == 'fully_staffed':
-            courses = stats_qs.filter(tas_count__gte=F('num_tas'), num_tas__gt=0).order_by('course')
+            courses = stats_qs.filter(fully_staffed_q)
         # URLs for chart segment clicks (preserve other GET params)
         _get = request.GET.copy()
         _get.pop('page', None)
@@ -270,61 +362,32 @@ def courses_list_v2(request):
             'clear': url_with_staffing(''),
         }
 
-    if per_page_param == 'all':
-        per_page_size = 9999
-        per_page = 'all'
-    else:
-        try:
-            n = int(per_page_param)
-            per_page_size = n if n in PER_PAGE_CHOICES else 10
-            per_page = str(per_page_size)
-        except (ValueError, TypeError):
-            per_page_size = 10
-            per_page = '10'
-
-    paginator = Paginator(courses, per_page_size)
-    page_number = request.GET.get('page', 1)
-    page = paginator.get_page(page_number)
+    # Admins already have exact totals from the stats aggregate; others get a capped count
+    total = None
+    if course_stats:
+        total = {
+            'no_tas': course_stats['no_tas_yet'],
+            'understaffed': course_stats['understaffed'],
+            'fully_staffed': course_stats['fully_staffed'],
+        }.get(staffing_filter, course_stats['total_courses'])
+    paginator = KeysetPaginator(courses, filters.ordering, _per_page(request, 10), count=total)
+    page = paginator.get_page(request.GET.get('cursor'))
     courses = page.object_list
 
     professors = User.objects.filter(professor=True).order_by('last_name', 'first_name')
-    terms = list(Course.objects.values_list('term', flat=True).distinct().order_by('-term'))
+    terms = list(
+        Term.objects.filter(Exists(Course.objects.filter(academic_term=OuterRef('pk'))))
+        .values_list('name', flat=True)
+    )
 
     if not request.user.is_professor:
         applied_course_ids = Application.objects.filter(student=request.user).values_list('course_id', flat=True)
-        # For disabling Apply entrypoints: limit 5 per term or already assigned this term
-        assigned_course = request.user.course_working_for.first()
-        current_term = (assigned_course.term or "").strip() if assigned_course else ""
-        if not current_term:
-            t = Course.objects.order_by('-term').values_list('term', flat=True).first()
-            current_term = (t or "").strip()
-        counted = [
-            ApplicationStatus.PENDING.value,
-            ApplicationStatus.ACCEPTED.value,
-            ApplicationStatus.CONFIRMED.value,
-        ]
-        apps_this_term = (
-            Application.objects.filter(
-                student=request.user,
-                course__term__iexact=current_term,
-                status__in=counted,
-            ).count()
-            if current_term
-            else 0
-        )
-        has_accepted = Offer.objects.filter(
-            recipient=request.user, status=OfferStatus.ACCEPTED.value
-        ).exists()
-        student_can_apply = not (apps_this_term >= 5 or has_accepted)
+        # For disabling Apply entrypoints: limit 5 per term or already accepted an offer
+        student_can_apply = get_eligibility(request.user).can_apply
     else:
         applied_course_ids = []
         student_can_apply = True  # professors don't use Apply
 
-    get_copy = request.GET.copy()
-    if 'page' in get_copy:
-        del get_copy['page']
-    query_string = get_copy.urlencode()
-
     return render(request, 'courses.html', {
         'courses': courses,
         'applied_course_ids': applied_course_ids,
@@ -332,8 +395,9 @@ def courses_list_v2(request):
         'terms': terms,
         'page': page,
         'paginator': paginator,
-        'query_string': query_string,
-        'per_page': per_page,
+        'query_string': _list_query_string(request),
+        'per_page': str(paginator.per_page),
+        'per_page_choices': PER_PAGE_CHOICES,
         'student_can_apply': student_can_apply,
         'course_stats': course_stats,
         'courses_needing_tas': courses_needing_tas,
@@ -369,36 +433,14 @@ def create_course_v2(request):
 
 @login_required
 def course_overview_v2(request, course_id):
-    course = get_object_or_404(Course, id=course_id)
+    course = get_object_or_404(Course.objects.prefetch_related('current_tas'), id=course_id)
     context = {'course': course}
     if not request.user.is_professor:
         applied_course_ids = list(
             Application.objects.filter(student=request.user).values_list('course_id', flat=True)
         )
         context['applied_course_ids'] = applied_course_ids
-        assigned_course = request.user.course_working_for.first()
-        current_term = (assigned_course.term or "").strip() if assigned_course else ""
-        if not current_term:
-            t = Course.objects.order_by('-term').values_list('term', flat=True).first()
-            current_term = (t or "").strip()
-        counted = [
-            ApplicationStatus.PENDING.value,
-            ApplicationStatus.ACCEPTED.value,
-            ApplicationStatus.CONFIRMED.value,
-        ]
-        apps_this_term = (
-            Application.objects.filter(
-                student=request.user,
-                course__term__iexact=current_term,
-                status__in=counted,
-            ).count()
-            if current_term
-            else 0
-        )
-        has_accepted = Offer.objects.filter(
-            recipient=request.user, status=OfferStatus.ACCEPTED.value
-        ).exists()
-        context['student_can_apply'] = not (apps_this_term >= 5 or has_accepted)
+        context['student_can_apply'] = get_eligibility(request.user).can_apply
     else:
         context['applied_course_ids'] = []
         context['student_can_apply'] = False
@@ -418,7 +460,7 @@ def edit_course_v2(request, course_id):
         if form.is_valid():
             form.save()
             # Courses only close when full (TA capacity) or admin closes semester; enforce full => closed on edit
-            if course.current_tas.count() >= course.num_tas:
+            if course.filled_ta_slots >= course.num_tas:
                 course.status = False
                 course.save(update_fields=['status'])
             messages.success(request, f"Course {course.course} - {course.course_title} updated successfully.")
@@ -436,16 +478,71 @@ def upload_courses_v2(request):
 
     if request.method == 'POST':
         excel_file = request.FILES.get("excel_file")
-        if excel_file:
-            upload_view = UploadView()
-            upload_view.request = request
-            upload_view.process_excel_file(excel_file)
-            messages.success(request, "Successfully uploaded courses from Excel file.")
-        else:
+        mode = request.POST.get('mode', APPEND)
+        if mode not in dict(IMPORT_MODES):
+            mode = APPEND
+        if not excel_file:
             messages.error(request, "Please select an Excel file to upload.")
-        return redirect('courses')
+            return redirect('upload_courses')
+        if request.POST.get('dry_run') == '1':
+            # Validation-only pass: one streaming scan, nothing is written
+            importer = CourseImporter(
+                mode=mode,
+                delete_missing=request.POST.get('delete_missing') == '1',
+                dry_run=True,
+            )
+            try:
+                summary = importer.run(iter_sheet_rows(excel_file))
+            except (InvalidFileException, BadZipFile, KeyError):
+                messages.error(request, "That file could not be read as an Excel (.xlsx) workbook.")
+                return redirect('upload_courses')
+            return render(request, 'upload_courses.html', {
+                'import_modes': IMPORT_MODES,
+                'selected_mode': mode,
+                'validation': {
+                    'file_name': excel_file.name,
+                    'rows_read': importer.rows_read,
+                    'failed': importer.failed,
+                    'errors': importer.errors,
+                    'summary': summary,
+                    'preview': importer.preview,
+                },
+            })
+        # Import runs in the background worker (manage.py run_upload_jobs); the page polls for progress
+        job = CourseUploadJob.objects.create(
+            excel_file=excel_file,
+            mode=mode,
+            delete_missing=request.POST.get('delete_missing') == '1',
+            created_by=request.user,
+        )
+        messages.info(request, "Upload received. The import is running in the background.")
+        return redirect(f"{reverse('upload_courses')}?job={job.id}")
+
+    job = None
+    job_id = request.GET.get('job')
+    if job_id:
+        job = CourseUploadJob.objects.filter(id=job_id).first() if is_uuid(job_id) else None
+    return render(request, 'upload_courses.html', {'import_modes': IMPORT_MODES, 'job': job})
 
-    return render(request, 'upload_courses.html')
+
+@login_required
+def upload_job_status(request, job_id):
+    """JSON progress for a background course upload (polled by the upload page)."""
+    if not request.user.is_superuser:
+        return JsonResponse({'error': 'forbidden'}, status=403)
+    job = get_object_or_404(CourseUploadJob, id=job_id)
+    return JsonResponse({
+        'id': str(job.id),
+        'status': job.get_status(),
+        'finished': job.is_finished,
+        'rows_total': job.rows_total,
+        'rows_processed': job.rows_processed,
+        'rows_failed': job.rows_failed,
+        'eta_seconds': job.eta_seconds,
+        'summary': job.summary,
+        'row_errors': job.row_errors[:20],
+        'error': job.error,
+    })
 
 @login_required
 def close_semester_v2(request):
@@ -456,6 +553,8 @@ def close_semester_v2(request):
     if request.method == 'POST':
         # Close all courses for the semester (the other way courses close; the other is full TA capacity)
         Course.objects.all().update(is_active=False, status=False)
+        # update() skips model signals, so drop cached exports explicitly
+        invalidate_schedule_exports()
         messages.success(request, "Successfully closed all courses for the semester.")
 
     return redirect('courses')
@@ -463,33 +562,8 @@ def close_semester_v2(request):
 
 def _get_export_queryset(request):
     """Apply same filters as courses list; used for export."""
-    query = request.GET.get('q')
-    term_filter = (request.GET.get('term') or '').strip()
-    professor_id = request.GET.get('professor')
-    status_filter = request.GET.get('status', '')
-    class_type_filter = request.GET.get('class_type', '')
-    course_level = request.GET.get('course_level', '')
-    courses = Course.objects.all().order_by('course')
-    if query:
-        courses = courses.filter(
-            Q(course__icontains=query) |
-            Q(course_title__icontains=query) |
-            Q(instructor_first_name__icontains=query) |
-            Q(instructor_last_name__icontains=query)
-        )
-    if term_filter:
-        courses = courses.filter(term__iexact=term_filter)
-    if professor_id:
-        courses = courses.filter(professor_id=professor_id)
-    if status_filter == 'active':
-        courses = courses.filter(status=True)
-    elif status_filter == 'closed':
-        courses = courses.filter(status=False)
-    if class_type_filter:
-        courses = courses.filter(class_type=class_type_filter)
-    if course_level and course_level in ('1', '2', '3', '4', '5'):
-        courses = courses.filter(course__iregex=r'^\D*' + course_level + r'\d{3}')
-    return courses
+    filters = CourseFilterSpec.from_params(request.GET)
+    return filters.apply().order_by(*filters.ordering)
 
 
 @login_required
@@ -497,73 +571,26 @@ def export_schedule(request):
     if not request.user.is_superuser:
         messages.error(request, "Only admins can export the schedule.")
         return redirect('courses')
-    term_filter = (request.GET.get('term') or '').strip()
+    filters = CourseFilterSpec.from_params(request.GET)
+    term_filter = filters.term
     if not term_filter:
         messages.warning(request, "Select a term (use Add filter → Term) to export the schedule.")
         return redirect('courses')
-    courses = _get_export_queryset(request).select_related('professor').prefetch_related('current_tas')
-    headers = [
-        'Term', 'Type', 'Course', 'Section', 'Course Title', 'Instructors', 'RoomName', 'TimeSlot',
-        'Max Enroll', 'RoomSize',
-        'Instructor Email', 'TAs Assigned', 'TAs Total', 'TA Names',
-    ]
-    wb = Workbook()
-    ws = wb.active
-    ws.title = 'Schedule'
-    for col_idx, header in enumerate(headers, 1):
-        cell = ws.cell(row=1, column=col_idx, value=header)
-        cell.font = Font(bold=True)
-    for row_idx, course in enumerate(courses, 2):
-        instructors_str = f"{course.instructor_last_name}, {course.instructor_first_name}" if (course.instructor_last_name or course.instructor_first_name) else (course.professor.get_full_name() if course.professor else '')
-        if not instructors_str and course.professor:
-            instructors_str = course.professor.get_full_name() or course.professor.email or ''
-        ta_count = course.current_tas.count()
-        ta_names = ', '.join(
-            (ta.get_full_name() or ta.email or str(ta))
-            for ta in course.current_tas.all()
-        )
-        instructor_email = (course.professor.email or '') if course.professor else ''
-        ws.cell(row=row_idx, column=1, value=course.term)
-        ws.cell(row=row_idx, column=2, value=course.class_type)
-        ws.cell(row=row_idx, column=3, value=course.course)
-        ws.cell(row=row_idx, column=4, value=course.section)
-        ws.cell(row=row_idx, column=5, value=course.course_title)
-        ws.cell(row=row_idx, column=6, value=instructors_str)
-        ws.cell(row=row_idx, column=7, value=course.room_name)
-        ws.cell(row=row_idx, column=8, value=course.timeslot)
-        ws.cell(row=row_idx, column=9, value=course.max_enroll)
-        ws.cell(row=row_idx, column=10, value=course.room_size)
-        ws.cell(row=row_idx, column=11, value=instructor_email)
-        ws.cell(row=row_idx, column=12, value=ta_count)
-        ws.cell(row=row_idx, column=13, value=course.num_tas)
-        ws.cell(row=row_idx, column=14, value=ta_names)
-    for col_idx in range(1, len(headers) + 1):
-        max_len = max(
-            len(str(ws.cell(row=r, column=col_idx).value or ''))
-            for r in range(1, ws.max_row + 1)
-        )
-        ws.column_dimensions[get_column_letter(col_idx)].width = min(max_len + 2, 50)
-    from io import BytesIO
-    buffer = BytesIO()
-    wb.save(buffer)
-    buffer.seek(0)
+
+    def build_queryset():
+        return filters.apply().order_by(*filters.ordering).select_related('professor').prefetch_related('current_tas')
+
     safe_term = "".join(c if c.isalnum() or c in ' -' else '_' for c in term_filter)
     export_date = date.today().strftime('%Y-%m-%d')
     filename = f'Schedule_Export_{safe_term}_{export_date}.xlsx'
-    response = HttpResponse(
-        buffer.getvalue(),
-        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    # Repeat downloads are served from the export cache without querying courses;
+    # FileResponse streams the file in blocks and closes it when done
+    return FileResponse(
+        cached_schedule_xlsx(term_filter, filters.cache_key, build_queryset),
+        as_attachment=True,
+        filename=filename,
+        content_type=XLSX_CONTENT_TYPE,
     )
-    response['Content-Disposition'] = f'attachment; filename="{filename}"'
-    return response
-
-# Statuses that count toward the 5-application-per-term limit (Rejected/Withdrawn do not count)
-APPLICATION_LIMIT_COUNTED_STATUSES = [
-    ApplicationStatus.PENDING.value,
-    ApplicationStatus.ACCEPTED.value,
-    ApplicationStatus.CONFIRMED.value,
-]
-
 
 @login_required
 def apply_to_course_v2(request, course_id):
@@ -579,7 +606,8 @@ def apply_to_course_v2(request, course_id):
         messages.error(request, "Professors cannot apply for TA positions.")
         return redirect('courses')
 
-    if hasattr(request.user, 'is_ta') and request.user.is_ta():
+    eligibility = get_eligibility(request.user, course.academic_term_id)
+    if eligibility.is_ta:
         messages.error(request, "You are already a TA for a course.")
         return redirect('courses')
 
@@ -594,19 +622,8 @@ def apply_to_course_v2(request, course_id):
         messages.error(request, "Please complete your profile before applying. Upload a resume in your Profile page.")
         return redirect('student_profile')
 
-    def count_applications_for_term(student, term):
-        if not term:
-            return 0
-        norm_term = term.strip()
-        return Application.objects.filter(
-            student=student,
-            course__term__iexact=norm_term,
-            status__in=APPLICATION_LIMIT_COUNTED_STATUSES,
-        ).count()
-
     # Enforce 5-application limit per term: block when they already have 5
-    current_term_count = count_applications_for_term(request.user, course.term)
-    if current_term_count >= 5:
+    if eligibility.at_limit:
         if request.method == 'POST':
             return HttpResponse(
                 "You have reached the 5-course application limit for this term.",
@@ -619,7 +636,7 @@ def apply_to_course_v2(request, course_id):
         form = ApplicationForm(request.POST)
         if form.is_valid():
             # Re-check limit right before save
-            if count_applications_for_term(request.user, course.term) >= 5:
+            if get_eligibility(request.user, course.academic_term_id, fresh=True).at_limit:
                 return HttpResponse(
                     "You have reached the 5-course application limit for this term.",
                     status=400,
@@ -634,11 +651,12 @@ def apply_to_course_v2(request, course_id):
                 {"course_name": pc.course_name, "grade": pc.grade}
                 for pc in request.user.past_courses.all()
             ]
+            # Snapshot the resume (so professor sees what was submitted). Blobs are
+            # shared by name; a resume uploaded before blob storage moves into it once.
+            if not blob_digest(profile.resume.name):
+                profile.resume.save(os.path.basename(profile.resume.name), profile.resume, save=True)
+            app.resume = profile.resume.name
             app.save()
-            # Copy resume file to application snapshot (so professor sees what was submitted)
-            if profile.resume:
-                import os
-                app.resume.save(os.path.basename(profile.resume.name), profile.resume, save=True)
 
             messages.success(request, f"Successfully applied to {course.course}.")
             return redirect('courses')
@@ -665,33 +683,34 @@ def make_offer_v2(request, application_id):
             
         app = get_object_or_404(Application, id=application_id)
         
-        # Create Offer
-        Offer.objects.create(
-            recipient=app.student,
-            course=app.course,
-            sender=request.user,
-            application=app,
-            status=OfferStatus.PENDING.value
-        )
-        
-        # Update Application status
-        app.status = ApplicationStatus.ACCEPTED.value
-        app.save()
-        
-        messages.success(request, f"Offer sent to {app.student.get_full_name()} for {app.course.course}.")
-
-        # Email notification to student
-        if app.student.email:
-            send_notification_email(
-                subject=f"TA Offer for {app.course.course}",
-                recipients=app.student.email,
-                message_lines=[
-                    f"Dear {app.student.get_full_name()},",
-                    f"Congratulations! You have received a TA offer for {app.course.course} — {app.course.course_title}.",
-                    "Please log in to TA Buzz to review and respond to this offer.",
-                ],
+        with transaction.atomic():
+            # Create Offer
+            Offer.objects.create(
+                recipient=app.student,
+                course=app.course,
+                sender=request.user,
+                application=app,
+                status=OfferStatus.PENDING.value
             )
 
+            # Update Application status
+            app.status = ApplicationStatus.ACCEPTED.value
+            app.save()
+
+            # Email notification to student
+            if app.student.email:
+                notify(
+                    app.student,
+                    subject=f"TA Offer for {app.course.course}",
+                    message_lines=[
+                        f"Dear {app.student.get_full_name()},",
+                        f"Congratulations! You have received a TA offer for {app.course.course} — {app.course.course_title}.",
+                        "Please log in to TA Buzz to review and respond to this offer.",
+                    ],
+                )
+
+        messages.success(request, f"Offer sent to {app.student.get_full_name()} for {app.course.course}.")
+
     return redirect('applications')
 
 @login_required
@@ -703,22 +722,23 @@ def reject_application_v2(request, application_id):
             
         app = get_object_or_404(Application, id=application_id)
         
-        # Use model method
-        app.reject()
-        
-        messages.success(request, f"Application for {app.student.get_full_name()} has been rejected.")
+        with transaction.atomic():
+            # Use model method
+            app.reject()
+
+            # Email notification to student
+            if app.student.email:
+                notify(
+                    app.student,
+                    subject=f"Application Update for {app.course.course}",
+                    message_lines=[
+                        f"Dear {app.student.get_full_name()},",
+                        f"We regret to inform you that your TA application for {app.course.course} — {app.course.course_title} has been rejected.",
+                        "You may browse and apply to other open courses on TA Buzz.",
+                    ],
+                )
 
-        # Email notification to student
-        if app.student.email:
-            send_notification_email(
-                subject=f"Application Update for {app.course.course}",
-                recipients=app.student.email,
-                message_lines=[
-                    f"Dear {app.student.get_full_name()},",
-                    f"We regret to inform you that your TA application for {app.course.course} — {app.course.course_title} has been rejected.",
-                    "You may browse and apply to other open courses on TA Buzz.",
-                ],
-            )
+        messages.success(request, f"Application for {app.student.get_full_name()} has been rejected.")
 
     return redirect('applications')
 
@@ -733,19 +753,20 @@ def withdraw_application_v2(request, application_id):
     if app.status not in (ApplicationStatus.PENDING.value, ApplicationStatus.ACCEPTED.value):
         messages.error(request, "Only pending or accepted applications can be withdrawn.")
         return redirect('applications')
-    app.withdraw("Withdrawn by student")
-    messages.success(request, "Your application has been withdrawn.")
+    with transaction.atomic():
+        app.withdraw("Withdrawn by student")
 
-    # Email notification to professor
-    if app.course.professor and app.course.professor.email:
-        send_notification_email(
-            subject=f"Application Withdrawn for {app.course.course}",
-            recipients=app.course.professor.email,
-            message_lines=[
-                f"Dear {app.course.professor.get_full_name()},",
-                f"{app.student.get_full_name()} has withdrawn their TA application for {app.course.course} — {app.course.course_title}.",
-            ],
-        )
+        # Email notification to professor
+        if app.course.professor and app.course.professor.email:
+            notify(
+                app.course.professor,
+                subject=f"Application Withdrawn for {app.course.course}",
+                message_lines=[
+                    f"Dear {app.course.professor.get_full_name()},",
+                    f"{app.student.get_full_name()} has withdrawn their TA application for {app.course.course} — {app.course.course_title}.",
+                ],
+            )
+    messages.success(request, "Your application has been withdrawn.")
 
     return redirect('applications')
 
@@ -787,23 +808,20 @@ def accept_offer_v2(request, offer_id):
             messages.error(request, "You are not authorized to accept this offer.")
             return redirect('offers')
         # Enforce 1 TA position per term: block if student already has an accepted offer for this term
-        term = (offer.course.term or "").strip()
-        if term:
-            has_other_accepted = Offer.objects.filter(
-                recipient=offer.recipient,
-                course__term__iexact=term,
-                status=OfferStatus.ACCEPTED.value,
-            ).exclude(id=offer.id).exists()
-            if has_other_accepted:
+        term_id = offer.course.academic_term_id
+        if term_id is not None and offer.status != OfferStatus.ACCEPTED.value:
+            if get_eligibility(offer.recipient, term_id, fresh=True).accepted_offer_in_term:
                 messages.error(request, "You can only accept 1 TA position per term.")
                 return redirect('offers')
         with transaction.atomic():
-            offer.accept()
-            if term:
+            if not offer.accept():
+                messages.error(request, "This offer can no longer be accepted; the course may already be fully staffed.")
+                return redirect('offers')
+            if term_id is not None:
                 # Withdraw other same-term applications (active: PENDING or ACCEPTED)
                 Application.objects.filter(
                     student=offer.recipient,
-                    course__term__iexact=term,
+                    course__academic_term_id=term_id,
                 ).exclude(id=offer.application_id).filter(
                     status__in=[ApplicationStatus.PENDING.value, ApplicationStatus.ACCEPTED.value],
                 ).update(
@@ -811,25 +829,28 @@ def accept_offer_v2(request, offer_id):
                     withdrawal_reason="Accepted another TA offer",
                 )
                 # Close other same-term pending offers (status only; applications already withdrawn)
-                Offer.objects.filter(
+                other_offers = Offer.objects.filter(
                     recipient=offer.recipient,
-                    course__term__iexact=term,
+                    course__academic_term_id=term_id,
                     status=OfferStatus.PENDING.value,
-                ).exclude(id=offer.id).update(status=OfferStatus.REJECTED.value)
+                ).exclude(id=offer.id)
+                closed_course_ids = list(other_offers.values_list('course_id', flat=True))
+                other_offers.update(status=OfferStatus.REJECTED.value)
+                refresh_pending_offers(closed_course_ids)
+
+            # Email notification to professor
+            if offer.course.professor and offer.course.professor.email:
+                notify(
+                    offer.course.professor,
+                    subject=f"TA Offer Accepted for {offer.course.course}",
+                    message_lines=[
+                        f"Dear {offer.course.professor.get_full_name()},",
+                        f"{offer.recipient.get_full_name()} has accepted your TA offer for {offer.course.course} — {offer.course.course_title}.",
+                        "They are now assigned as a TA for this course.",
+                    ],
+                )
         messages.success(request, f"Congratulations! You are now a TA for {offer.course.course}.")
 
-        # Email notification to professor
-        if offer.course.professor and offer.course.professor.email:
-            send_notification_email(
-                subject=f"TA Offer Accepted for {offer.course.course}",
-                recipients=offer.course.professor.email,
-                message_lines=[
-                    f"Dear {offer.course.professor.get_full_name()},",
-                    f"{offer.recipient.get_full_name()} has accepted your TA offer for {offer.course.course} — {offer.course.course_title}.",
-                    "They are now assigned as a TA for this course.",
-                ],
-            )
-
     return redirect('offers')
 
 @login_required
@@ -839,21 +860,22 @@ def decline_offer_v2(request, offer_id):
         if request.user != offer.recipient:
             messages.error(request, "You are not authorized to decline this offer.")
             return redirect('offers')
-        offer.reject()
+        with transaction.atomic():
+            offer.reject()
+
+            # Email notification to professor
+            if offer.course.professor and offer.course.professor.email:
+                notify(
+                    offer.course.professor,
+                    subject=f"TA Offer Declined for {offer.course.course}",
+                    message_lines=[
+                        f"Dear {offer.course.professor.get_full_name()},",
+                        f"{offer.recipient.get_full_name()} has declined your TA offer for {offer.course.course} — {offer.course.course_title}.",
+                        "You may consider making offers to other applicants.",
+                    ],
+                )
         messages.info(request, f"You have declined the offer for {offer.course.course}.")
 
-        # Email notification to professor
-        if offer.course.professor and offer.course.professor.email:
-            send_notification_email(
-                subject=f"TA Offer Declined for {offer.course.course}",
-                recipients=offer.course.professor.email,
-                message_lines=[
-                    f"Dear {offer.course.professor.get_full_name()},",
-                    f"{offer.recipient.get_full_name()} has declined your TA offer for {offer.course.course} — {offer.course.course_title}.",
-                    "You may consider making offers to other applicants.",
-                ],
-            )
-
     return redirect('offers')
 
 @login_required
@@ -880,7 +902,8 @@ def remove_ta_v2(request, course_id, user_id):
         # Remove from course
         course.current_tas.remove(ta)
         # Re-open the course since there's now an open slot
-        if course.current_tas.count() < course.num_tas:
+        course.refresh_from_db(fields=['filled_ta_slots'])
+        if course.filled_ta_slots < course.num_tas:
             course.status = True
             course.save(update_fields=['status'])
         # Revert the offer to rejected
@@ -894,19 +917,19 @@ def remove_ta_v2(request, course_id, user_id):
         # Clear the student's assigned course
         ta.course_working_for.remove(course)
 
-    messages.success(request, f"{ta.get_full_name()} has been removed as a TA for {course.course}.")
+        # Email notification to removed TA
+        if ta.email:
+            notify(
+                ta,
+                subject=f"TA Assignment Update for {course.course}",
+                message_lines=[
+                    f"Dear {ta.get_full_name()},",
+                    f"You have been removed as a TA for {course.course} — {course.course_title}.",
+                    "If you have questions, please contact your course instructor.",
+                ],
+            )
 
-    # Email notification to removed TA
-    if ta.email:
-        send_notification_email(
-            subject=f"TA Assignment Update for {course.course}",
-            recipients=ta.email,
-            message_lines=[
-                f"Dear {ta.get_full_name()},",
-                f"You have been removed as a TA for {course.course} — {course.course_title}.",
-                "If you have questions, please contact your course instructor.",
-            ],
-        )
+    messages.success(request, f"{ta.get_full_name()} has been removed as a TA for {course.course}.")
 
     return redirect('course_overview', course_id=course_id)
 
@@ -937,19 +960,7 @@ def serve_application_resume(request, application_id):
         messages.warning(request, "No resume was submitted with this application.")
         return redirect('application_detail', application_id=application_id)
     try:
-        file_handle = app.resume.open('rb')
-        filename = app.resume.name.split('/')[-1] if app.resume.name else 'resume'
-        if filename.lower().endswith('.pdf'):
-            content_type = 'application/pdf'
-        elif filename.lower().endswith('.doc'):
-            content_type = 'application/msword'
-        elif filename.lower().endswith('.docx'):
-            content_type = 'application/vnd.openxmlformats-officedocument.wordprocessingml.document'
-        else:
-            content_type = 'application/octet-stream'
-        response = FileResponse(file_handle, content_type=content_type)
-        response['Content-Disposition'] = f'inline; filename="{filename}"'
-        return response
+        return serve_file(request, app.resume)
     except (ValueError, OSError):
         messages.error(request, "Resume file could not be found.")
         return redirect('application_detail', application_id=application_id)
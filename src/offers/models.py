@@ -1,7 +1,11 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Case, F, Value, When
 from enum import Enum
 import uuid
 
+from applications.models import Application, ApplicationStatus
+from courses.models import Course
+
 
 class OfferStatus(Enum):
     PENDING = 1
@@ -32,16 +36,48 @@ class Offer(models.Model):
         return OfferStatus(self.status).name
 
     def accept(self):
+        """
+        Accept the offer and make the recipient a TA of the course.
+
+        Returns False, changing nothing, when the offer is no longer pending or
+        the course has no open TA slot. The slot check is a conditional UPDATE
+        on the course row, and the row lock it takes is held until the TA link
+        (and with it filled_ta_slots) is written, so concurrent accepts for one
+        course run one at a time: the course can neither overfill nor stay open
+        once its last slot is taken. A recipient who already TAs the course
+        keeps their slot, so the course needs no open one.
+        """
+        with transaction.atomic():
+            accepted = Offer.objects.filter(pk=self.pk, status=OfferStatus.PENDING.value).update(
+                status=OfferStatus.ACCEPTED.value)
+            already_ta = accepted and Course.current_tas.through.objects.filter(
+                course_id=self.course_id, customuser_id=self.recipient_id).exists()
+            if already_ta:
+                # The TA link exists, so set() below adds no row and no m2m signal
+                # counts a slot: the recipient keeps the slot they already fill
+                reserved = Course.objects.filter(pk=self.course_id).update(
+                    pending_offers=F('pending_offers') - 1)
+            else:
+                reserved = accepted and Course.objects.filter(
+                    pk=self.course_id, filled_ta_slots__lt=F('num_tas'),
+                ).update(
+                    # Taking the last slot closes the course (one of two ways courses close)
+                    status=Case(When(filled_ta_slots__gte=F('num_tas') - 1, then=Value(False)), default=F('status')),
+                    pending_offers=F('pending_offers') - 1,
+                )
+            if not reserved:
+                transaction.set_rollback(True)
+                return False
+            Application.objects.filter(pk=self.application_id).update(status=ApplicationStatus.CONFIRMED.value)
+            # A student TAs one course: this replaces any other assignment, and the
+            # m2m signals update filled_ta_slots and exports
+            self.recipient.course_working_for.set([self.course_id])
         self.status = OfferStatus.ACCEPTED.value
-        self.application.confirm()
-        self.course.current_tas.add(self.recipient)
-        # Close course when it reaches full TA capacity (one of two ways courses close)
-        if self.course.current_tas.count() >= self.course.num_tas:
-            self.course.status = False
-        self.course.save()
-        self.recipient.course_working_for.set([self.course])
-        self.recipient.save()
-        self.save()
+        if Offer.course.is_cached(self):
+            self.course.refresh_from_db(fields=['status', 'filled_ta_slots', 'pending_offers'])
+        if Offer.application.is_cached(self):
+            self.application.status = ApplicationStatus.CONFIRMED.value
+        return True
 
     def reject(self):
         self.status = OfferStatus.REJECTED.value
@@ -1,3 +1,103 @@
-from django.test import TestCase
+import threading
 
-# Create your tests here.
+from django.db import connections
+from django.test import TestCase, TransactionTestCase
+
+from applications.models import Application, ApplicationStatus
+from courses.models import Course
+from main.testing import create_course
+from users.models import CustomUser
+from .models import Offer, OfferStatus
+
+# Students racing for each course's slots
+CONCURRENT_ACCEPTS = 6
+
+
+class ConcurrentAcceptTests(TransactionTestCase):
+    '''
+    Offer.accept() from several threads at once, each on its own database
+    connection, for courses with fewer open slots than offers. On SQLite the
+    test database is a file (see settings), so the writers wait on the lock.
+    '''
+
+    def make_offers(self, open_slots):
+        professor = CustomUser.objects.create_user(
+            email=f'prof{open_slots}@bc.edu', password='x', professor=True)
+        course = create_course(section=str(open_slots), num_tas=open_slots, professor=professor)
+        offers = []
+        for i in range(CONCURRENT_ACCEPTS):
+            student = CustomUser.objects.create_user(email=f'student{open_slots}-{i}@bc.edu', password='x')
+            application = Application.objects.create(student=student, course=course)
+            offers.append(Offer.objects.create(
+                application=application, course=course, recipient=student, sender=professor))
+        return course, offers
+
+    def accept_concurrently(self, offers):
+        results = {}
+        barrier = threading.Barrier(len(offers))
+
+        def accept(offer_id):
+            try:
+                offer = Offer.objects.select_related('recipient').get(pk=offer_id)
+                barrier.wait()
+                results[offer_id] = offer.accept()
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=accept, args=(offer.pk,)) for offer in offers]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results
+
+    def test_accepts_fill_exactly_the_open_slots(self):
+        for open_slots in (1, 2, 3):
+            with self.subTest(open_slots=open_slots):
+                course, offers = self.make_offers(open_slots)
+                self.assertEqual(Course.objects.get(pk=course.pk).pending_offers, CONCURRENT_ACCEPTS)
+
+                results = self.accept_concurrently(offers)
+                winners = {pk for pk, accepted in results.items() if accepted}
+                self.assertEqual(len(results), CONCURRENT_ACCEPTS)
+                self.assertEqual(len(winners), open_slots)
+
+                course.refresh_from_db()
+                self.assertEqual(
+                    set(course.current_tas.values_list('pk', flat=True)),
+                    set(Offer.objects.filter(pk__in=winners).values_list('recipient_id', flat=True)))
+                self.assertEqual(course.filled_ta_slots, open_slots)
+                self.assertEqual(course.pending_offers, CONCURRENT_ACCEPTS - open_slots)
+                self.assertFalse(course.status)
+
+                for offer in Offer.objects.filter(pk__in=[o.pk for o in offers]).select_related('application'):
+                    if offer.pk in winners:
+                        self.assertEqual(offer.status, OfferStatus.ACCEPTED.value)
+                        self.assertEqual(offer.application.status, ApplicationStatus.CONFIRMED.value)
+                    else:
+                        self.assertEqual(offer.status, OfferStatus.PENDING.value)
+                        self.assertEqual(offer.application.status, ApplicationStatus.PENDING.value)
+
+    def test_course_stays_open_until_full(self):
+        course, offers = self.make_offers(3)
+        self.accept_concurrently(offers[:2])
+        course.refresh_from_db()
+        self.assertEqual(course.filled_ta_slots, 2)
+        self.assertTrue(course.status)
+
+
+class AcceptTests(TestCase):
+    def test_recipient_already_ta_keeps_their_slot(self):
+        professor = CustomUser.objects.create_user(email='prof@bc.edu', password='x', professor=True)
+        course = create_course(num_tas=2, professor=professor)
+        student = CustomUser.objects.create_user(email='student@bc.edu', password='x')
+        student.course_working_for.add(course)
+        application = Application.objects.create(student=student, course=course)
+        offer = Offer.objects.create(application=application, course=course, recipient=student, sender=professor)
+
+        self.assertTrue(offer.accept())
+        course.refresh_from_db()
+        self.assertEqual(course.filled_ta_slots, 1)
+        self.assertEqual(course.pending_offers, 0)
+        self.assertTrue(course.status)
+        self.assertEqual(list(course.current_tas.all()), [student])
@@ -133,7 +133,9 @@ class OfferAcceptView(
         if error:
             messages.error(self.request, error)
             return self.form_invalid(form)
-        self.object.accept()
+        if not self.object.accept():
+            messages.error(self.request, "This offer can no longer be accepted")
+            return self.form_invalid(form)
         return super().form_valid(form)
 
     def test_func(self):
@@ -166,7 +168,7 @@ class OfferAcceptView(
         course = self.get_object().course
         if user.is_ta():
             return "You are already a TA for a course"
-        if course.current_tas.count() >= course.num_tas:
+        if course.filled_ta_slots >= course.num_tas:
             return "This course already has the maximum number of TAs"
 
 
@@ -4,6 +4,8 @@ from django.contrib.auth.forms import UserChangeForm
 from .models import CustomUser, Skill
 from django.utils.html import format_html
 from courses.models import Course
+from courses.staffing import refresh_filled_ta_slots
+from main.exports import invalidate_schedule_exports_on_commit
 
 
 class CustomUserChangeForm(UserChangeForm):
@@ -100,6 +102,7 @@ class CustomUserAdmin(UserAdmin):
             },
         ),
         ('Status', {'fields': ('is_active',)}),
+        ('Notifications', {'fields': ('notification_digest',)}),
     )
     add_fieldsets = (
         (
@@ -112,6 +115,15 @@ class CustomUserAdmin(UserAdmin):
     )
     inlines = [CourseTAInline]
 
+    def save_related(self, request, form, formsets, change):
+        # The TA inline writes through rows directly, which sends no m2m signal
+        user = form.instance
+        before = set(user.course_working_for.values_list('pk', flat=True)) if change else set()
+        super().save_related(request, form, formsets, change)
+        changed = before ^ set(user.course_working_for.values_list('pk', flat=True))
+        refresh_filled_ta_slots(before | changed)
+        invalidate_schedule_exports_on_commit(Course.objects.filter(pk__in=changed).values_list('term', flat=True))
+
 
 admin.site.register(CustomUser, CustomUserAdmin)
 
@@ -9,7 +9,8 @@ COURSE_CHOICES = [('', '-- Select a course --')] + [(c, c) for c in PREDEFINED_C
 class CustomUserUpdateForm(UserChangeForm):
     class Meta:
         model = CustomUser
-        fields = ['eagleid']
+        fields = ['eagleid', 'notification_digest']
+        labels = {'notification_digest': 'Notification emails'}
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
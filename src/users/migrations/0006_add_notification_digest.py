@@ -0,0 +1,18 @@
+# Generated by Django 4.2.6 on 2026-10-18 09:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0005_populate_skills'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customuser',
+            name='notification_digest',
+            field=models.IntegerField(choices=[(1, 'IMMEDIATE'), (2, 'HOURLY'), (3, 'DAILY')], default=1),
+        ),
+    ]
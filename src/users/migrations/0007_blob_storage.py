@@ -0,0 +1,30 @@
+# Generated by Django 4.2.6 on 2026-10-18 10:01
+
+from django.db import migrations, models
+import main.storage
+import users.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0006_add_notification_digest'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='studentprofile',
+            name='cv',
+            field=models.FileField(blank=True, max_length=255, null=True, storage=main.storage.BlobStorage(), upload_to=users.models.cv_upload_path),
+        ),
+        migrations.AlterField(
+            model_name='studentprofile',
+            name='profile_photo',
+            field=models.FileField(blank=True, max_length=255, null=True, storage=main.storage.BlobStorage(), upload_to=users.models.profile_photo_upload_path),
+        ),
+        migrations.AlterField(
+            model_name='studentprofile',
+            name='resume',
+            field=models.FileField(blank=True, max_length=255, null=True, storage=main.storage.BlobStorage(), upload_to=users.models.resume_upload_path),
+        ),
+    ]
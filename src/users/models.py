@@ -1,5 +1,7 @@
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager, PermissionsMixin
 from django.db import models
+from main.storage import blob_storage
+from enum import Enum
 import uuid
 
 # Predefined courses for past courses list
@@ -34,6 +36,18 @@ def profile_photo_upload_path(instance, filename):
     return f'profiles/{instance.user_id}_{base}{ext}'
 
 
+class DigestFrequency(Enum):
+    '''
+    How a user receives notification emails
+    IMMEDIATE - One email per event, as it happens
+    HOURLY - One summary email per hour (manage.py send_notification_digests)
+    DAILY - One summary email per day
+    '''
+    IMMEDIATE = 1
+    HOURLY = 2
+    DAILY = 3
+
+
 class CustomUserManager(BaseUserManager):
     def create_user(self, email, password=None, **extra_fields):
         if not email:
@@ -58,6 +72,8 @@ class CustomUser(AbstractBaseUser, PermissionsMixin):
     email = models.EmailField(unique=True)
     eagleid = models.PositiveIntegerField(default=0000000)
     professor = models.BooleanField(default=False)
+    notification_digest = models.IntegerField(choices=[(
+        tag.value, tag.name) for tag in DigestFrequency], default=DigestFrequency.IMMEDIATE.value)
 
     is_active = models.BooleanField(default=True)
     is_staff = models.BooleanField(default=False)
@@ -82,24 +98,15 @@ class CustomUser(AbstractBaseUser, PermissionsMixin):
         return not self.professor
 
     def reached_max_applications(self):
-        lecture_application_count = self.applications.filter(
-            course__class_type='Lecture').count()
-
-        non_lecture_applications = self.applications.exclude(
-            course__class_type='Lecture')
-        non_lecture_class_names = non_lecture_applications.values_list(
-            'course__course', flat=True)
-        non_lecture_count = len(set(non_lecture_class_names))
-
-        total_applications = lecture_application_count + non_lecture_count
-
-        return total_applications >= 5
+        from applications.eligibility import get_eligibility
+        return get_eligibility(self).at_limit
 
     def already_applied_to_course(self, course):
         return self.applications.filter(course=course).exists()
 
     def is_ta(self):
-        return self.course_working_for.exists()
+        from applications.eligibility import get_eligibility
+        return get_eligibility(self).is_ta
 
 
 class Skill(models.Model):
@@ -117,9 +124,9 @@ class Skill(models.Model):
 class StudentProfile(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     user = models.OneToOneField(CustomUser, on_delete=models.CASCADE, related_name='student_profile')
-    profile_photo = models.FileField(upload_to=profile_photo_upload_path, blank=True, null=True)
-    resume = models.FileField(upload_to=resume_upload_path, blank=True, null=True)
-    cv = models.FileField(upload_to=cv_upload_path, blank=True, null=True)
+    profile_photo = models.FileField(upload_to=profile_photo_upload_path, storage=blob_storage, max_length=255, blank=True, null=True)
+    resume = models.FileField(upload_to=resume_upload_path, storage=blob_storage, max_length=255, blank=True, null=True)
+    cv = models.FileField(upload_to=cv_upload_path, storage=blob_storage, max_length=255, blank=True, null=True)
     skills = models.ManyToManyField(Skill, related_name='profiles', blank=True)
 
     def __str__(self):
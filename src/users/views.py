@@ -2,12 +2,13 @@ import json
 from django.contrib import messages
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.forms import inlineformset_factory
-from django.http import FileResponse
+from django.http import HttpResponse
 from django.shortcuts import redirect, get_object_or_404
 from django.urls import reverse_lazy
 from django.views.generic import View
 from django.views.generic.edit import UpdateView
 from django.views.generic.base import TemplateResponseMixin
+from main.sendfile import content_type_for, serve_file
 from .forms import CustomUserUpdateForm, StudentProfileForm, PastCourseForm, PastCourseFormSet
 from .models import CustomUser, StudentProfile, PastCourse, Skill
 
@@ -114,19 +115,7 @@ def serve_resume(request):
         messages.warning(request, 'You have not uploaded a resume yet.')
         return redirect('student_profile')
     try:
-        file_handle = profile.resume.open('rb')
-        filename = profile.resume.name.split('/')[-1] if profile.resume.name else 'resume'
-        if filename.lower().endswith('.pdf'):
-            content_type = 'application/pdf'
-        elif filename.lower().endswith('.doc'):
-            content_type = 'application/msword'
-        elif filename.lower().endswith('.docx'):
-            content_type = 'application/vnd.openxmlformats-officedocument.wordprocessingml.document'
-        else:
-            content_type = 'application/octet-stream'
-        response = FileResponse(file_handle, content_type=content_type)
-        response['Content-Disposition'] = f'inline; filename="{filename}"'
-        return response
+        return serve_file(request, profile.resume)
     except (ValueError, OSError):
         messages.error(request, 'Your resume file could not be found. Please re-upload your resume.')
         return redirect('student_profile')
@@ -149,19 +138,7 @@ def serve_cv(request):
         messages.warning(request, 'You have not uploaded a CV yet.')
         return redirect('student_profile')
     try:
-        file_handle = profile.cv.open('rb')
-        filename = profile.cv.name.split('/')[-1] if profile.cv.name else 'cv'
-        if filename.lower().endswith('.pdf'):
-            content_type = 'application/pdf'
-        elif filename.lower().endswith('.doc'):
-            content_type = 'application/msword'
-        elif filename.lower().endswith('.docx'):
-            content_type = 'application/vnd.openxmlformats-officedocument.wordprocessingml.document'
-        else:
-            content_type = 'application/octet-stream'
-        response = FileResponse(file_handle, content_type=content_type)
-        response['Content-Disposition'] = f'inline; filename="{filename}"'
-        return response
+        return serve_file(request, profile.cv)
     except (ValueError, OSError):
         messages.error(request, 'Your CV file could not be found. Please re-upload your CV.')
         return redirect('student_profile')
@@ -169,7 +146,6 @@ def serve_cv(request):
 
 def serve_profile_photo(request):
     """Serve the current user's profile photo."""
-    from django.http import HttpResponse
     if not request.user.is_authenticated:
         return HttpResponse(status=404)
     try:
@@ -179,17 +155,6 @@ def serve_profile_photo(request):
     if not profile.profile_photo:
         return HttpResponse(status=404)
     try:
-        file_handle = profile.profile_photo.open('rb')
-        data = file_handle.read()
-        filename = (profile.profile_photo.name or '').lower()
-        if filename.endswith('.png'):
-            content_type = 'image/png'
-        elif filename.endswith('.gif'):
-            content_type = 'image/gif'
-        elif filename.endswith('.webp'):
-            content_type = 'image/webp'
-        else:
-            content_type = 'image/jpeg'
-        return HttpResponse(data, content_type=content_type)
+        return serve_file(request, profile.profile_photo, content_type=content_type_for(profile.profile_photo.name, 'image/jpeg'))
     except (ValueError, OSError):
         return HttpResponse(status=404)